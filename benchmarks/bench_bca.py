@@ -0,0 +1,155 @@
+''' Load benchmark of Bca methods against local stand-in server.
+
+Run from repository root with ``python -m benchmarks.bench_bca``. Save result with
+``--output result.json`` and compare next release with ``--baseline result.json``, which
+exits with status 1 when throughput drops or p99 latency grows over ``--tolerance``.
+'''
+import argparse
+import concurrent.futures
+import itertools
+import json
+import sys
+import threading
+import time
+import tracemalloc
+
+from cpybca.bca import Bca
+from cpybca.pool import ConnectionPool
+from cpybca.testing import FakeBcaServer
+
+
+def percentile(values, percent):
+    values = sorted(values)
+    return values[min(len(values) - 1, int(len(values) * percent / 100))]
+
+
+def make_calls(bca):
+    ''' Get benchmarked call of every Bca method.
+    '''
+    transaction_ids = itertools.count(1)
+    lock = threading.Lock()
+
+    def transfer():
+        with lock:
+            transaction_id = '{:08d}'.format(next(transaction_ids))
+        return bca.transfer('BCAAPI2016', '0201245680', '0201245681', transaction_id,
+                            '2017-07-04', transaction_id + '/DP/2017', '100000.00')
+
+    return {
+        'get_balance': lambda: bca.get_balance('BCAAPI2016', ['0201245680', '0063001004']),
+        'get_statement': lambda: bca.get_statement(
+            'BCAAPI2016', '0201245680', '2016-09-01', '2016-09-30'
+        ),
+        'transfer': transfer,
+    }
+
+
+def _run(call, requests, concurrency):
+    ''' Run call requests times. Return (latency of successful call, error count).
+    '''
+    latencies = []
+    errors = []
+
+    def timed():
+        started = time.perf_counter()
+        try:
+            call()
+        except ValueError:
+            errors.append(1)
+            return
+        latencies.append(time.perf_counter() - started)
+
+    if concurrency == 1:
+        for _ in range(requests):
+            timed()
+    else:
+        with concurrent.futures.ThreadPoolExecutor(concurrency) as executor:
+            for future in [executor.submit(timed) for _ in range(requests)]:
+                future.result()
+    return latencies, len(errors)
+
+
+def run_case(call, requests, concurrency):
+    ''' Run call requests times. Return throughput, p50, p99, error rate and peak memory.
+
+    Failed call (ApiError, NetworkError) is counted instead of aborting the run. Peak memory
+    is measured in a second, shorter pass so tracing does not slow down the timed one.
+    '''
+    started = time.perf_counter()
+    latencies, errors = _run(call, requests, concurrency)
+    elapsed = time.perf_counter() - started
+
+    tracemalloc.start()
+    _run(call, min(requests, concurrency * 4), concurrency)
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    return {
+        'throughput': len(latencies) / elapsed,
+        'p50_ms': percentile(latencies, 50) * 1000 if latencies else 0,
+        'p99_ms': percentile(latencies, 99) * 1000 if latencies else 0,
+        'error_rate': errors / requests,
+        'peak_kib': peak / 1024,
+    }
+
+
+def compare(results, baseline, tolerance):
+    ''' Get list of regression against baseline result.
+    '''
+    regressions = []
+    for name, result in results.items():
+        previous = baseline.get(name)
+        if previous is None:
+            continue
+        if result['throughput'] < previous['throughput'] * (1 - tolerance):
+            regressions.append('{} throughput {:.0f}/s < {:.0f}/s'.format(
+                name, result['throughput'], previous['throughput']))
+        if result['p99_ms'] > previous['p99_ms'] * (1 + tolerance):
+            regressions.append('{} p99 {:.2f}ms > {:.2f}ms'.format(
+                name, result['p99_ms'], previous['p99_ms']))
+    return regressions
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--requests', type=int, default=500)
+    parser.add_argument('--concurrency', type=int, default=16)
+    parser.add_argument('--latency', type=float, default=0, help='server latency in second')
+    parser.add_argument('--error-rate', type=float, default=0)
+    parser.add_argument('--rows', type=int, default=6, help='statement row per day')
+    parser.add_argument('--output', help='write result as JSON')
+    parser.add_argument('--baseline', help='JSON result to compare against')
+    parser.add_argument('--tolerance', type=float, default=0.2)
+    args = parser.parse_args(argv)
+
+    server = FakeBcaServer(latency=args.latency, error_rate=args.error_rate,
+                           statement_rows=args.rows)
+    results = {}
+    with server:
+        bca = Bca(server.api_key, server.api_secret, server.url,
+                  pool=ConnectionPool(maxsize=args.concurrency))
+        bca.sign_in(server.client_id, server.client_secret)
+        print('{:<28} {:>10} {:>9} {:>9} {:>7} {:>10}'.format(
+            'case', 'req/s', 'p50 ms', 'p99 ms', 'error', 'peak KiB'))
+        for method, call in make_calls(bca).items():
+            for mode, concurrency in (('serial', 1), ('concurrent', args.concurrency)):
+                name = '{} {}'.format(method, mode)
+                result = results[name] = run_case(call, args.requests, concurrency)
+                print('{:<28} {:>10.0f} {:>9.2f} {:>9.2f} {:>6.1%} {:>10.0f}'.format(
+                    name, result['throughput'], result['p50_ms'], result['p99_ms'],
+                    result['error_rate'], result['peak_kib']))
+        bca.pool.close()
+
+    if args.output:
+        with open(args.output, 'w') as output_file:
+            json.dump(results, output_file, indent=2)
+    if args.baseline:
+        with open(args.baseline) as baseline_file:
+            regressions = compare(results, json.load(baseline_file), args.tolerance)
+        for regression in regressions:
+            print('REGRESSION ' + regression)
+        return 1 if regressions else 0
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,74 @@
+''' Micro-benchmark of per-request signing cost, before and after prepared signing.
+
+Run from repository root with ``python -m benchmarks.bench_signing``.
+'''
+import datetime
+import hashlib
+import hmac
+import timeit
+
+from cpybca.bca import Bca
+
+NUMBER = 50000
+
+
+def legacy_prepare(bca, relative_url, http_method='GET', data=b''):
+    ''' Request preparation as it was done before prepared signing.
+    '''
+    url = bca.host + relative_url
+    timestamp = datetime.datetime.now(datetime.timezone.utc).astimezone().isoformat()
+    timestamp = timestamp[:23] + timestamp[26:]
+    signature = hmac.new(bca.api_secret.encode(), digestmod=hashlib.sha256)
+    string_to_sign = http_method + ':' + relative_url + ':' + bca.access_token + \
+        ':' + hashlib.sha256(data.replace(b' ', b'')).hexdigest() + ':' + timestamp
+    signature.update(string_to_sign.encode())
+    headers = {
+        'Authorization': 'Bearer {}'.format(bca.access_token),
+        'Content-Type': 'application/json',
+        'Origin': 'cpybca.com',
+        'X-BCA-Key': bca.api_key,
+        'X-BCA-Timestamp': timestamp,
+        'X-BCA-Signature': signature.hexdigest()
+    }
+    return url, headers
+
+
+def legacy_balance(bca):
+    relative_url = bca.get_balance_path.format(**{
+        'corporate_id': 'BCAAPI2016',
+        'account_number': '0201245680'
+    })
+    return legacy_prepare(bca, relative_url)
+
+
+def prepared_balance(bca):
+    return bca._prepare_request(bca._balance_url('BCAAPI2016', '0201245680'))
+
+
+def legacy_transfer(bca, data):
+    return legacy_prepare(bca, bca.transfer_path, 'POST', data)
+
+
+def prepared_transfer(bca, data):
+    return bca._prepare_request(bca.transfer_path, 'POST', data)
+
+
+def main():
+    bca = Bca('aa1a4ff8-9ff9-4a75-bcd9-16a0aa2c3d25', 'secret' * 6)
+    bca.access_token = 'x' * 64
+    data = Bca._transfer_body('BCAAPI2016', '0201245680', '0201245681', '00000001',
+                              '2017-07-04', '43287/DP/2017', '100000.00', 'IDR',
+                              'Transfer Test', 'Online Transfer')
+    cases = (
+        ('get_balance', lambda: legacy_balance(bca), lambda: prepared_balance(bca)),
+        ('transfer', lambda: legacy_transfer(bca, data), lambda: prepared_transfer(bca, data)),
+    )
+    print('{:<12} {:>12} {:>12} {:>8}'.format('request', 'before (us)', 'after (us)', 'speedup'))
+    for name, legacy, prepared in cases:
+        before = min(timeit.repeat(legacy, number=NUMBER, repeat=3)) / NUMBER * 1e6
+        after = min(timeit.repeat(prepared, number=NUMBER, repeat=3)) / NUMBER * 1e6
+        print('{:<12} {:>12.2f} {:>12.2f} {:>7.1f}x'.format(name, before, after, before / after))
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,5 @@
+import sys
+
+from cpybca.cli import main
+
+sys.exit(main())
@@ -0,0 +1,348 @@
+import asyncio
+import collections
+import http.client
+import ssl
+import time
+import urllib.parse
+
+from cpybca.bca import MAX_BALANCE_ACCOUNTS, BcaBase, NetworkError, chunked, statement_windows
+from cpybca.pool import IDEMPOTENT_METHODS, ConnectError
+
+# Errors raised by a reused stream the server already closed on its side.
+STALE_CONNECTION_ERRORS = (
+    asyncio.IncompleteReadError,
+    http.client.RemoteDisconnected,
+    BrokenPipeError,
+    ConnectionAbortedError,
+    ConnectionResetError,
+)
+
+
+class _AsyncHostPool():
+    ''' Idle streams and connection slots of one (scheme, host, port).
+    '''
+
+    def __init__(self, maxsize):
+        self.idle = collections.deque()
+        self.slots = asyncio.Semaphore(maxsize)
+
+
+async def _read_response(reader):
+    ''' Read one HTTP/1.1 response. Return (status, headers, body, keep_alive).
+    '''
+    status_line = await reader.readline()
+    if not status_line:
+        raise http.client.RemoteDisconnected('Remote end closed connection without response')
+    parts = status_line.decode('latin-1').rstrip('\r\n').split(' ', 2)
+    if len(parts) < 2 or not parts[0].startswith('HTTP/'):
+        raise http.client.BadStatusLine(status_line)
+    version, status = parts[0], int(parts[1])
+
+    headers = {}
+    while True:
+        line = await reader.readline()
+        if line in (b'\r\n', b'\n', b''):
+            break
+        name, _, value = line.decode('latin-1').partition(':')
+        headers[name.strip().lower()] = value.strip()
+
+    keep_alive = version == 'HTTP/1.1' and headers.get('connection', '').lower() != 'close'
+    if 'chunked' in headers.get('transfer-encoding', '').lower():
+        chunks = []
+        while True:
+            size = int((await reader.readline()).split(b';', 1)[0].strip(), 16)
+            if not size:
+                # Skip trailer headers until blank line.
+                while (await reader.readline()) not in (b'\r\n', b'\n', b''):
+                    pass
+                break
+            chunks.append(await reader.readexactly(size))
+            await reader.readexactly(2)
+        body = b''.join(chunks)
+    elif 'content-length' in headers:
+        body = await reader.readexactly(int(headers['content-length']))
+    else:
+        body = await reader.read()
+        keep_alive = False
+    return status, headers, body, keep_alive
+
+
+class AsyncConnectionPool():
+    ''' Keep-alive HTTP(S) connection pool on asyncio streams.
+    '''
+
+    def __init__(self, maxsize=100, idle_timeout=60, connect_timeout=10, read_timeout=30,
+                 ssl_context=None):
+        self.maxsize = maxsize
+        self.idle_timeout = idle_timeout
+        self.connect_timeout = connect_timeout
+        self.read_timeout = read_timeout
+        self.ssl_context = ssl_context
+
+        self._hosts = {}
+        self._stats = {
+            'created': 0,
+            'reused': 0,
+            'reconnected': 0,
+            'discarded': 0,
+            'requests': 0,
+        }
+
+    def _host_pool(self, key):
+        ''' Get or create pool for one host.
+        '''
+        host_pool = self._hosts.get(key)
+        if host_pool is None:
+            host_pool = self._hosts[key] = _AsyncHostPool(self.maxsize)
+        return host_pool
+
+    async def _new_connection(self, key):
+        ''' Open new stream pair within connect timeout.
+        '''
+        scheme, host, port = key
+        if scheme == 'https':
+            if self.ssl_context is None:
+                self.ssl_context = ssl.create_default_context()
+            connect = asyncio.open_connection(host, port or 443, ssl=self.ssl_context)
+        else:
+            connect = asyncio.open_connection(host, port or 80)
+        try:
+            reader, writer = await asyncio.wait_for(connect, self.connect_timeout)
+        except (OSError, asyncio.TimeoutError) as err:
+            raise ConnectError(err) from err
+        self._stats['created'] += 1
+        return reader, writer
+
+    def _is_usable(self, reader, writer, last_used):
+        ''' Check idle stream is not expired and not closed by server.
+        '''
+        if self.idle_timeout is not None and time.monotonic() - last_used > self.idle_timeout:
+            return False
+        return not reader.at_eof() and not writer.is_closing()
+
+    async def _checkout(self, key, host_pool):
+        ''' Take usable idle stream or open a new one. Return (reader, writer, reused).
+        '''
+        while host_pool.idle:
+            reader, writer, last_used = host_pool.idle.pop()
+            if self._is_usable(reader, writer, last_used):
+                self._stats['reused'] += 1
+                return reader, writer, True
+            writer.close()
+            self._stats['discarded'] += 1
+        reader, writer = await self._new_connection(key)
+        return reader, writer, False
+
+    async def _send(self, reader, writer, method, host, path, body, headers):
+        lines = ['{} {} HTTP/1.1'.format(method, path), 'Host: ' + host,
+                 'Accept-Encoding: identity']
+        if body is not None or method == 'POST':
+            lines.append('Content-Length: {}'.format(len(body or b'')))
+        for name, value in (headers or {}).items():
+            lines.append('{}: {}'.format(name, value))
+        writer.write(('\r\n'.join(lines) + '\r\n\r\n').encode('latin-1'))
+        if body:
+            writer.write(body)
+        await writer.drain()
+        return await asyncio.wait_for(_read_response(reader), self.read_timeout)
+
+    async def request(self, method, url, body=None, headers=None):
+        ''' Send request and read whole response. Return (status, headers, data).
+        '''
+        parts = urllib.parse.urlsplit(url)
+        key = (parts.scheme, parts.hostname, parts.port)
+        path = parts.path or '/'
+        if parts.query:
+            path += '?' + parts.query
+
+        host_pool = self._host_pool(key)
+        async with host_pool.slots:
+            reader, writer, reused = await self._checkout(key, host_pool)
+            try:
+                try:
+                    response = await self._send(
+                        reader, writer, method, parts.netloc, path, body, headers
+                    )
+                except STALE_CONNECTION_ERRORS as err:
+                    writer.close()
+                    if not reused or method not in IDEMPOTENT_METHODS:
+                        raise
+                    # Server dropped kept-alive stream before answering, retry on a fresh one.
+                    self._stats['reconnected'] += 1
+                    try:
+                        reader, writer = await self._new_connection(key)
+                    except ConnectError as connect_err:
+                        # First attempt may have reached server, do not report it as not sent.
+                        raise err from connect_err
+                    response = await self._send(
+                        reader, writer, method, parts.netloc, path, body, headers
+                    )
+            except BaseException:
+                writer.close()
+                raise
+            status, response_headers, data, keep_alive = response
+            if keep_alive:
+                host_pool.idle.append((reader, writer, time.monotonic()))
+            else:
+                writer.close()
+        self._stats['requests'] += 1
+        return status, response_headers, data
+
+    def stats(self):
+        ''' Get connection reuse stats.
+        '''
+        stats = dict(self._stats)
+        stats['idle'] = sum(len(host_pool.idle) for host_pool in self._hosts.values())
+        return stats
+
+    async def close(self):
+        ''' Close all idle connections.
+        '''
+        for host_pool in self._hosts.values():
+            while host_pool.idle:
+                _, writer, _ = host_pool.idle.pop()
+                writer.close()
+
+
+class AsyncBca(BcaBase):
+    ''' Asyncio version of :class:`Bca`, API methods are coroutines.
+
+    It shares request building and response parsing of :class:`Bca`, but not its token
+    refresh, retry, circuit breaker, scheduler, cache, instrumentation and statement streaming:
+    a call is sent once with the token of :meth:`sign_in`.
+    '''
+
+    def __init__(self, api_key, api_secret, host='https://sandbox.bca.co.id', pool=None,
+                 concurrency=100):
+        super().__init__(
+            api_key, api_secret, host, pool if pool is not None else AsyncConnectionPool()
+        )
+        self.concurrency = concurrency
+        # Created on first request so it belongs to the running event loop.
+        self._semaphore = None
+
+    async def _open_url(self, url, data=None, headers=None, endpoint=None):
+        ''' Helper to send request through asyncio connection pool.
+        '''
+        if self._semaphore is None:
+            self._semaphore = asyncio.Semaphore(self.concurrency)
+        try:
+            async with self._semaphore:
+                status, _, body = await self.pool.request(
+                    'POST' if data else 'GET', url, body=data, headers=headers
+                )
+        except ConnectError:
+            raise NetworkError('Something wrong with network connection or server', sent=False)
+        except (OSError, EOFError, asyncio.TimeoutError, http.client.HTTPException):
+            raise NetworkError('Something wrong with network connection or server')
+        return self._parse_response(status, body)
+
+    async def sign_in(self, client_id, client_secret):
+        ''' Signing in client and get access token.
+        '''
+        url, data, headers = self._prepare_sign_in(client_id, client_secret)
+        response_data = await self._open_url(url, data=data, headers=headers)
+        return self._finish_sign_in(response_data)
+
+    async def get_balance(self, corporate_id, account_number):
+        ''' Get balance from account.
+        '''
+        relative_url = self._balance_url(corporate_id, account_number)
+        url, headers = self._prepare_request(relative_url)
+
+        response_data = await self._open_url(url, headers=headers)
+        return response_data
+
+    async def get_balances(self, corporate_id, account_numbers, parallelism=4):
+        ''' Get balance of any number of account, see :meth:`Bca.get_balances`.
+        '''
+        chunks = chunked(list(account_numbers), MAX_BALANCE_ACCOUNTS)
+        result = {'AccountDetailDataSuccess': [], 'AccountDetailDataFailed': [], 'ChunkErrors': []}
+        semaphore = asyncio.Semaphore(parallelism)
+
+        async def get_chunk(chunk):
+            async with semaphore:
+                return await self.get_balance(corporate_id, chunk)
+
+        responses = await asyncio.gather(*[get_chunk(chunk) for chunk in chunks],
+                                         return_exceptions=True)
+        for chunk, response_data in zip(chunks, responses):
+            if isinstance(response_data, ValueError):
+                result['ChunkErrors'].append({
+                    'AccountNumbers': chunk,
+                    'ErrorMessage': response_data.args[0] if response_data.args
+                    else str(response_data)
+                })
+                continue
+            if isinstance(response_data, BaseException):
+                raise response_data
+            result['AccountDetailDataSuccess'].extend(
+                response_data.get('AccountDetailDataSuccess') or []
+            )
+            result['AccountDetailDataFailed'].extend(
+                response_data.get('AccountDetailDataFailed') or []
+            )
+        return result
+
+    async def get_statement(self, corporate_id, account_number, start_date, end_date=None):
+        ''' Get account statement.
+        '''
+        relative_url = self._statement_url(corporate_id, account_number, start_date, end_date)
+        url, headers = self._prepare_request(relative_url)
+
+        response_data = await self._open_url(url, headers=headers)
+        return response_data
+
+    async def iter_statement_windows(self, corporate_id, account_number, start_date, end_date,
+                                     parallelism=4):
+        ''' Get statement of any date range, async yield (start_date, end_date, response).
+
+        At most ``parallelism`` window of 31 day is fetched ahead, they are yielded in date
+        order.
+        '''
+        windows = statement_windows(start_date, end_date)
+        pending = collections.deque()
+        try:
+            for window in windows:
+                pending.append((window, asyncio.ensure_future(
+                    self.get_statement(corporate_id, account_number, *window)
+                )))
+                if len(pending) < parallelism:
+                    continue
+                window, task = pending.popleft()
+                yield window[0], window[1], await task
+            while pending:
+                window, task = pending.popleft()
+                yield window[0], window[1], await task
+        finally:
+            for _, task in pending:
+                task.cancel()
+
+    async def iter_statement(self, corporate_id, account_number, start_date, end_date,
+                             parallelism=4):
+        ''' Get statement of any date range, async yield transaction row in date order.
+        '''
+        async for _, _, response_data in self.iter_statement_windows(
+                corporate_id, account_number, start_date, end_date, parallelism):
+            for row in response_data.get('Data') or []:
+                yield row
+
+    async def transfer(self, corporate_id, source_account_number, beneficiary_account_number,
+                       transaction_id, transaction_date, reference_id, amount,
+                       currency_code='IDR', remark1=None, remark2=None):
+        ''' Transfer fund to other account.
+        '''
+        relative_url = self.transfer_path
+        data = self._transfer_body(
+            corporate_id, source_account_number, beneficiary_account_number, transaction_id,
+            transaction_date, reference_id, amount, currency_code, remark1, remark2
+        )
+        url, headers = self._prepare_request(relative_url, 'POST', data)
+
+        response_data = await self._open_url(url, data=data, headers=headers)
+        return response_data
+
+    async def close(self):
+        ''' Close idle connections of the pool.
+        '''
+        await self.pool.close()
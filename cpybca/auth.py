@@ -0,0 +1,150 @@
+import contextlib
+import json
+import os
+import tempfile
+import threading
+import time
+
+try:
+    import fcntl
+except ImportError:  # pragma: no cover - not available on Windows.
+    fcntl = None
+
+
+class FileTokenStore():
+    ''' Access token cache in a JSON file shared by processes on one host.
+
+    Refresh is serialized with ``flock`` on ``<path>.lock`` so only one process signs in
+    while the others wait and reuse its token. Without ``fcntl`` (Windows) the file is
+    still shared but refresh is not serialized between processes.
+    '''
+
+    def __init__(self, path):
+        self.path = path
+        self.lock_path = path + '.lock'
+
+    @contextlib.contextmanager
+    def lock(self):
+        ''' Hold exclusive lock of the store between processes.
+        '''
+        with open(self.lock_path, 'a') as lock_file:
+            if fcntl is not None:
+                fcntl.flock(lock_file, fcntl.LOCK_EX)
+            try:
+                yield
+            finally:
+                if fcntl is not None:
+                    fcntl.flock(lock_file, fcntl.LOCK_UN)
+
+    def _read(self):
+        try:
+            with open(self.path) as store_file:
+                return json.load(store_file)
+        except (OSError, ValueError):
+            return {}
+
+    def _write(self, content):
+        directory = os.path.dirname(os.path.abspath(self.path))
+        file_descriptor, temp_path = tempfile.mkstemp(dir=directory)
+        try:
+            with os.fdopen(file_descriptor, 'w') as temp_file:
+                json.dump(content, temp_file)
+            os.replace(temp_path, self.path)
+        except BaseException:
+            os.unlink(temp_path)
+            raise
+
+    def load(self, key):
+        ''' Get (access_token, expires_at) of key or None.
+        '''
+        entry = self._read().get(key)
+        if not entry:
+            return None
+        return entry['access_token'], entry['expires_at']
+
+    def save(self, key, access_token, expires_at):
+        ''' Keep token of key. Call it while holding :meth:`lock`.
+        '''
+        content = self._read()
+        content[key] = {'access_token': access_token, 'expires_at': expires_at}
+        self._write(content)
+
+    def delete(self, key):
+        ''' Remove token of key. Call it while holding :meth:`lock`.
+        '''
+        content = self._read()
+        if content.pop(key, None) is not None:
+            self._write(content)
+
+
+class TokenManager():
+    ''' Keep access token valid and refresh it before expiry in single flight.
+
+    ``fetch`` is called without argument and must return (access_token, expires_in).
+    '''
+
+    def __init__(self, fetch, refresh_margin=60, store=None, key='default'):
+        self.fetch = fetch
+        self.refresh_margin = refresh_margin
+        self.store = store
+        self.key = key
+
+        self.access_token = None
+        self.expires_at = 0
+        self.refreshes = 0
+        self._lock = threading.Lock()
+
+    def _is_fresh(self, expires_at):
+        return time.time() < expires_at - self.refresh_margin
+
+    def _fetch(self):
+        access_token, expires_in = self.fetch()
+        self.refreshes += 1
+        return access_token, time.time() + expires_in
+
+    def _refresh(self, stale_token):
+        ''' Get new token unless other thread or process already did it.
+        '''
+        if self.access_token and self.access_token != stale_token \
+                and self._is_fresh(self.expires_at):
+            return self.access_token
+        if self.store is None:
+            token = self._fetch()
+        else:
+            with self.store.lock():
+                token = self.store.load(self.key)
+                if token is None or token[0] == stale_token or not self._is_fresh(token[1]):
+                    token = self._fetch()
+                    self.store.save(self.key, *token)
+        self.access_token, self.expires_at = token
+        return self.access_token
+
+    def get(self):
+        ''' Get valid access token, sign in again when it is about to expire.
+        '''
+        access_token, expires_at = self.access_token, self.expires_at
+        if access_token and self._is_fresh(expires_at):
+            return access_token
+        if access_token and time.time() < expires_at:
+            # Token still works, let one caller refresh while the others keep using it.
+            if not self._lock.acquire(blocking=False):
+                return access_token
+        else:
+            self._lock.acquire()
+        try:
+            return self._refresh(access_token)
+        finally:
+            self._lock.release()
+
+    def invalidate(self, access_token):
+        ''' Forget token rejected by server so next :meth:`get` signs in again.
+        '''
+        with self._lock:
+            if self.access_token == access_token:
+                self.access_token = None
+                self.expires_at = 0
+            if self.store is not None:
+                with self.store.lock():
+                    token = self.store.load(self.key)
+                    if token is not None and token[0] == access_token:
+                        self.store.delete(self.key)
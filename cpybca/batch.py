@@ -0,0 +1,169 @@
+import concurrent.futures
+import json
+import os
+import threading
+import time
+
+from cpybca.bca import ApiError, NetworkError
+from cpybca.ratelimit import TokenBucket
+from cpybca.resilience import CircuitOpenError
+
+PENDING = 'pending'
+SENT = 'sent'
+CONFIRMED = 'confirmed'
+FAILED = 'failed'
+
+
+def transfer_key(transfer):
+    ''' Get journal key of transfer, unique by corporate, TransactionID and ReferenceID.
+    '''
+    return '{}|{}|{}'.format(
+        transfer['corporate_id'], transfer['transaction_id'], transfer['reference_id']
+    )
+
+
+class TransferJournal():
+    ''' Append-only JSON lines journal of transfer state, synced to disk on every write.
+    '''
+
+    def __init__(self, path):
+        self.path = path
+        self._lock = threading.Lock()
+        self._checked = False
+
+    def _end_cut_line(self, journal_file):
+        ''' Terminate line cut by crash so next record starts on its own line.
+        '''
+        journal_file.seek(0, os.SEEK_END)
+        if journal_file.tell():
+            journal_file.seek(journal_file.tell() - 1)
+            if journal_file.read(1) != b'\n':
+                journal_file.write(b'\n')
+        self._checked = True
+
+    def load(self):
+        ''' Get last state record of every transfer key.
+        '''
+        records = {}
+        try:
+            with open(self.path) as journal_file:
+                for line in journal_file:
+                    try:
+                        record = json.loads(line)
+                    except ValueError:
+                        # Line cut by crash in the middle of a write.
+                        continue
+                    records[record['key']] = record
+        except FileNotFoundError:
+            pass
+        return records
+
+    def record(self, key, state, **details):
+        ''' Append state of transfer and wait until it is on disk.
+        '''
+        record = dict(details, key=key, state=state, time=time.time())
+        line = json.dumps(record, separators=(',', ':')) + '\n'
+        with self._lock:
+            with open(self.path, 'a+b') as journal_file:
+                if not self._checked:
+                    self._end_cut_line(journal_file)
+                journal_file.write(line.encode())
+                journal_file.flush()
+                os.fsync(journal_file.fileno())
+        return record
+
+
+class BatchTransfer():
+    ''' Run many transfers in parallel, journaled so a restarted batch never sends twice.
+
+    Every transfer is a dict of :meth:`Bca.transfer` keyword arguments. Transfer concluded
+    in earlier run (confirmed or failed) or listed twice is skipped. Transfer sent without
+    known outcome (process died, network or server failed) is reported as ``unresolved`` and
+    only sent again, with the same TransactionID, when ``resend_unresolved`` is set. Such resend
+    rejected as duplicate TransactionID is confirmed, bank already has the transfer.
+    '''
+
+    def __init__(self, bca, journal, concurrency=4, rate_per_account=None,
+                 resend_unresolved=False):
+        self.bca = bca
+        self.journal = journal
+        self.concurrency = concurrency
+        self.rate_per_account = rate_per_account
+        self.resend_unresolved = resend_unresolved
+
+        self._buckets = {}
+        self._lock = threading.Lock()
+
+    def _throttle(self, account_number):
+        ''' Wait for rate limit of source account.
+        '''
+        if not self.rate_per_account:
+            return
+        with self._lock:
+            bucket = self._buckets.get(account_number)
+            if bucket is None:
+                bucket = self._buckets[account_number] = TokenBucket(self.rate_per_account, 1)
+        bucket.acquire()
+
+    def _send(self, key, transfer, resent=False):
+        ''' Send one transfer, journal it before and after. Return (state, record).
+
+        ``resent`` tells transfer was sent by earlier run without known outcome.
+        '''
+        self._throttle(transfer['source_account_number'])
+        self.journal.record(key, SENT)
+        try:
+            response_data = self.bca.transfer(**transfer)
+        except ApiError as err:
+            if resent and err.duplicate:
+                return CONFIRMED, self.journal.record(key, CONFIRMED, duplicate=True,
+                                                      error=str(err))
+            if err.status is None or err.status >= 500:
+                # Server failed while handling it, transfer may still be executed.
+                return SENT, {'key': key, 'state': SENT, 'error': str(err)}
+            return FAILED, self.journal.record(key, FAILED, error=str(err))
+        except ValueError as err:
+            if isinstance(err, CircuitOpenError) or \
+                    (isinstance(err, NetworkError) and not err.sent):
+                # Request surely did not leave, next run can send it safely.
+                return PENDING, self.journal.record(key, PENDING, error=str(err))
+            # Bank may or may not have received it, keep it as sent.
+            return SENT, {'key': key, 'state': SENT, 'error': str(err)}
+        if response_data.get('Status') != 'Success':
+            return FAILED, self.journal.record(key, FAILED, response=response_data)
+        return CONFIRMED, self.journal.record(key, CONFIRMED, response=response_data)
+
+    def run(self, transfers):
+        ''' Run batch. Return dict of confirmed, failed, skipped, unresolved and not_sent records.
+        '''
+        result = {
+            'confirmed': [], 'failed': [], 'skipped': [], 'unresolved': [], 'not_sent': []
+        }
+        records = self.journal.load()
+        to_send = []
+        seen = set()
+        for transfer in transfers:
+            key = transfer_key(transfer)
+            if key in seen:
+                # Same transfer listed again, sending both would race on one journal key.
+                result['skipped'].append({'key': key, 'error': 'Duplicate transfer in batch'})
+                continue
+            seen.add(key)
+            record = records.get(key)
+            if record is None:
+                self.journal.record(key, PENDING)
+            elif record['state'] in (CONFIRMED, FAILED):
+                result['skipped'].append(record)
+                continue
+            elif record['state'] == SENT and not self.resend_unresolved:
+                result['unresolved'].append(record)
+                continue
+            to_send.append((key, transfer, record is not None and record['state'] == SENT))
+
+        with concurrent.futures.ThreadPoolExecutor(max(1, self.concurrency)) as executor:
+            futures = [executor.submit(self._send, key, transfer, resent)
+                       for key, transfer, resent in to_send]
+            for future in futures:
+                state, record = future.result()
+                result[{SENT: 'unresolved', PENDING: 'not_sent'}.get(state, state)].append(record)
+        return result
@@ -1,20 +1,125 @@
 
 import base64
+import collections
+import concurrent.futures
 import datetime
 import hashlib
-import hmac
+import http.client
+import itertools
 import json
-import urllib.request
-import urllib.error
+import time
+import zlib
 
-class Bca():
-    ''' Module to integrate with BCA API.
+from cpybca.auth import TokenManager
+from cpybca.instrumentation import RequestEvent
+from cpybca.pool import ConnectError, ConnectionPool
+from cpybca.signing import Signer, UrlTemplate, format_timestamp
+from cpybca.streaming import iter_decompressed, iter_json_items
+
+# Maximum account number of one get balance call.
+MAX_BALANCE_ACCOUNTS = 20
+# Maximum day from start to end date of one get statement call.
+MAX_STATEMENT_DAYS = 31
+# Error code of transfer rejected because its TransactionID was already received.
+DUPLICATE_TRANSACTION_CODE = 'ESB-82-011'
+
+
+def chunked(items, size):
+    ''' Split list into lists of at most size item.
+    '''
+    return [items[index:index + size] for index in range(0, len(items), size)]
+
+
+def to_date(value):
+    ''' Convert 'yyyy-MM-dd' string to date, date is returned as is.
     '''
+    if isinstance(value, datetime.datetime):
+        return value.date()
+    if isinstance(value, datetime.date):
+        return value
+    return datetime.datetime.strptime(value, '%Y-%m-%d').date()
+
+
+def row_date(transaction_date, start_date, end_date):
+    ''' Get date of statement row from its 'dd/MM' TransactionDate inside window.
+
+    Return None when it is pending ('PEND') or can not be placed inside window.
+    '''
+    try:
+        day, month = (int(part) for part in transaction_date.split('/'))
+        date = datetime.date(end_date.year, month, day)
+    except (AttributeError, ValueError):
+        return None
+    if date > end_date:
+        # Window crosses new year, row belongs to previous year.
+        try:
+            date = date.replace(year=end_date.year - 1)
+        except ValueError:
+            return None
+    if not start_date <= date <= end_date:
+        return None
+    return date
+
+
+def _counted(chunks, event):
+    ''' Yield chunks, adding their size to response_bytes of event.
+    '''
+    for chunk in chunks:
+        event.response_bytes += len(chunk)
+        yield chunk
+
+
+def statement_windows(start_date, end_date, days=MAX_STATEMENT_DAYS):
+    ''' Split date range into list of ('yyyy-MM-dd', 'yyyy-MM-dd') of at most days day.
+    '''
+    start_date, end_date = to_date(start_date), to_date(end_date)
+    if start_date > end_date:
+        raise ValueError('Start date must not be after end date')
+    windows = []
+    while start_date <= end_date:
+        window_end = min(start_date + datetime.timedelta(days - 1), end_date)
+        windows.append((start_date.isoformat(), window_end.isoformat()))
+        start_date = window_end + datetime.timedelta(1)
+    return windows
+
 
-    def __init__(self, api_key, api_secret, host='https://sandbox.bca.co.id'):
+class ApiError(ValueError):
+    ''' Error response from BCA API server.
+    '''
+
+    def __init__(self, message, status=None, error_code=None):
+        super().__init__(message)
+        self.status = status
+        self.error_code = error_code
+
+    @property
+    def duplicate(self):
+        ''' True when transfer was rejected because its TransactionID was already received.
+        '''
+        return self.error_code == DUPLICATE_TRANSACTION_CODE
+
+
+class NetworkError(ValueError):
+    ''' Network or server failure without API response.
+
+    ``sent`` is False when connection could not be opened, so server did not get request.
+    '''
+
+    def __init__(self, message, sent=True):
+        super().__init__(message)
+        self.sent = sent
+
+
+class BcaBase():
+    ''' Request building and response parsing shared by :class:`Bca` and ``AsyncBca``.
+    '''
+
+    def __init__(self, api_key, api_secret, host, pool):
         self.api_key = api_key
         self.api_secret = api_secret
         self.access_token = ''
+        # Keep-alive connections, can be shared between instances.
+        self.pool = pool
 
         self.host = host
         self.oauth_path = '/api/oauth/token'
@@ -23,35 +128,87 @@ class Bca():
             '{account_number}/statements?EndDate={end_date}&StartDate={start_date}'
         self.transfer_path = '/banking/corporates/transfers'
 
-    def _open_url(self, url, data=None, headers=None):
-        ''' Helper to call urlopen
+        # Prepared signing state, rebuilt when api_key or api_secret is changed.
+        self._signer = None
+        self._header_skeleton = None
+        self._url_templates = {}
+
+    @staticmethod
+    def _parse_response(status, body):
+        ''' Decode response body, raise error message given by server.
         '''
-        try:
-            if data:
-                request = urllib.request.Request(url, data=data, headers=headers)
-            else:
-                request = urllib.request.Request(url, headers=headers)
-            with urllib.request.urlopen(request) as response:
-                response_data = json.loads(response.read().decode('UTF-8'))
-                return response_data
-        except urllib.error.HTTPError as err:
-            error_content = json.loads(err.read().decode('UTF-8'))
-            # print(error_content)
-            raise ValueError(error_content['ErrorMessage']['English'])
-        except urllib.error.URLError:
-            raise ValueError('Something wrong with network connection or server')
-
-    def _generate_signature(self, relative_url, timestamp, http_method='GET', request_body=b''):
+        if status >= 400:
+            try:
+                error_content = json.loads(body.decode('UTF-8'))
+                message = error_content['ErrorMessage']['English']
+            except (ValueError, KeyError, TypeError):
+                # Proxy or load balancer error page is not API error, keep its status only.
+                raise ApiError('Server responded with status {}'.format(status), status)
+            raise ApiError(message, status, error_content.get('ErrorCode'))
+        response_data = json.loads(body.decode('UTF-8'))
+        return response_data
+
+    def _generate_signature(self, relative_url, timestamp, http_method='GET', request_body=b'',
+                            access_token=None):
         ''' Generate signature to be sent.
         '''
-        signature = hmac.new(self.api_secret.encode(), digestmod=hashlib.sha256)
-        string_to_sign = http_method + ':' + relative_url + ':' + self.access_token + \
-            ':' + hashlib.sha256(request_body.replace(b' ', b'')).hexdigest() + ':' + timestamp
-        signature.update(string_to_sign.encode())
-        return signature.hexdigest()
+        if access_token is None:
+            access_token = self.access_token
+        return self._get_signer().sign(
+            relative_url, timestamp, http_method, access_token, Signer.body_hash(request_body)
+        )
 
-    def sign_in(self, client_id, client_secret):
-        ''' Signing in client and get access token.
+    def _get_signer(self):
+        ''' Get signer keyed with current api_secret.
+        '''
+        signer = self._signer
+        if signer is None or signer.api_secret != self.api_secret:
+            signer = self._signer = Signer(self.api_secret)
+        return signer
+
+    def _get_header_skeleton(self):
+        ''' Get headers shared by every API call, to be copied and completed per call.
+        '''
+        skeleton = self._header_skeleton
+        if skeleton is None or skeleton['X-BCA-Key'] != self.api_key:
+            skeleton = self._header_skeleton = {
+                'Authorization': None,
+                'Content-Type': 'application/json',
+                'Origin': 'cpybca.com',
+                'X-BCA-Key': self.api_key,
+                'X-BCA-Timestamp': None,
+                'X-BCA-Signature': None
+            }
+        return skeleton
+
+    def _render_url(self, template, values):
+        ''' Fill url template, compiled once per template.
+        '''
+        url_template = self._url_templates.get(template)
+        if url_template is None:
+            url_template = self._url_templates[template] = UrlTemplate(template)
+        return url_template.render(values)
+
+    def _prepare_request(self, relative_url, http_method='GET', data=b'', access_token=None):
+        ''' Build url and signed headers of API call. Return (url, headers).
+        '''
+        if access_token is None:
+            access_token = self.access_token
+        url = self.host + relative_url
+
+        timestamp = format_timestamp()
+        signature = self._get_signer().sign(
+            relative_url, timestamp, http_method, access_token, Signer.body_hash(data)
+        )
+
+        headers = self._get_header_skeleton().copy()
+        headers['Authorization'] = 'Bearer ' + access_token
+        headers['X-BCA-Timestamp'] = timestamp
+        headers['X-BCA-Signature'] = signature
+        return url, headers
+
+    def _prepare_sign_in(self, client_id, client_secret):
+        ''' Build sign in request. Return (url, data, headers).
         '''
         url = self.host + self.oauth_path
         data = b'grant_type=client_credentials'
@@ -60,80 +217,46 @@ class Bca():
             'Authorization': 'Basic ' + \
                 base64.b64encode(str.encode(client_id + ':' + client_secret)).decode('UTF-8')
         }
-        response_data = self._open_url(url, data=data, headers=headers)
+        return url, data, headers
+
+    def _finish_sign_in(self, response_data):
+        ''' Keep access token from sign in response.
+        '''
         if 'access_token' in response_data:
             self.access_token = response_data['access_token']
             return True
         return response_data
 
-    def get_balance(self, corporate_id, account_number):
-        ''' Get balance from account.
+    def _balance_url(self, corporate_id, account_number):
+        ''' Build relative url of get balance.
         '''
         if isinstance(account_number, list):
-            if len(account_number) > 20:
-                raise ValueError('Maximum account number is 20')
-        relative_url = self.get_balance_path.format(**{
+            if len(account_number) > MAX_BALANCE_ACCOUNTS:
+                raise ValueError('Maximum account number is {}'.format(MAX_BALANCE_ACCOUNTS))
+        return self._render_url(self.get_balance_path, {
             'corporate_id': corporate_id,
             # Using '%2C' instead ',' because url does not know comma.
             # Avoid using parse.quote to reduce memory consumption.
             'account_number': '%2C'.join(account_number) \
                 if isinstance(account_number, list) else account_number
         })
-        url = self.host + relative_url
 
-        timestamp = datetime.datetime.now(datetime.timezone.utc).astimezone().isoformat()
-        timestamp = timestamp[:23] + timestamp[26:]
-        signature = self._generate_signature(relative_url, timestamp)
-
-        headers = {
-            'Authorization': 'Bearer {}'.format(self.access_token),
-            'Content-Type': 'application/json',
-            'Origin': 'cpybca.com',
-            'X-BCA-Key': self.api_key,
-            'X-BCA-Timestamp': timestamp,
-            'X-BCA-Signature': signature
-        }
-
-        response_data = self._open_url(url, headers=headers)
-        return response_data
-
-    def get_statement(self, corporate_id, account_number, start_date, end_date=None):
-        ''' Get account statement.
+    def _statement_url(self, corporate_id, account_number, start_date, end_date=None):
+        ''' Build relative url of get statement.
         '''
-        relative_url = self.get_statement_path.format(**{
+        return self._render_url(self.get_statement_path, {
             'corporate_id': corporate_id,
             'account_number': account_number,
             'start_date': start_date,
             'end_date': end_date if end_date else start_date
         })
-        url = self.host + relative_url
 
-        timestamp = datetime.datetime.now(datetime.timezone.utc).astimezone().isoformat()
-        timestamp = timestamp[:23] + timestamp[26:]
-        signature = self._generate_signature(relative_url, timestamp)
-
-        headers = {
-            'Authorization': 'Bearer {}'.format(self.access_token),
-            'Content-Type': 'application/json',
-            'Origin': 'cpybca.com',
-            'X-BCA-Key': self.api_key,
-            'X-BCA-Timestamp': timestamp,
-            'X-BCA-Signature': signature
-        }
-
-        response_data = self._open_url(url, headers=headers)
-        return response_data
-
-    def transfer(self, corporate_id, source_account_number, beneficiary_account_number,
-                 transaction_id, transaction_date, reference_id, amount, currency_code='IDR',
-                 remark1=None, remark2=None):
-        ''' Transfer fund to other account.
+    @staticmethod
+    def _transfer_body(corporate_id, source_account_number, beneficiary_account_number,
+                       transaction_id, transaction_date, reference_id, amount,
+                       currency_code='IDR', remark1=None, remark2=None):
+        ''' Build request body of transfer.
         '''
-        relative_url = self.transfer_path
-        url = self.host + relative_url
-
-        timestamp = datetime.datetime.now(datetime.timezone.utc).astimezone().isoformat()
-        timestamp = timestamp[:23] + timestamp[26:]
         request_body = {
             'CorporateID': corporate_id,
             'SourceAccountNumber': source_account_number,
@@ -148,17 +271,385 @@ class Bca():
             request_body['Remark1'] = remark1
         if remark2:
             request_body['Remark2'] = remark2
-        data = json.dumps(request_body, separators=(',', ':')).encode()
-        signature = self._generate_signature(relative_url, timestamp, 'POST', data)
+        return json.dumps(request_body, separators=(',', ':')).encode()
 
-        headers = {
-            'Authorization': 'Bearer {}'.format(self.access_token),
-            'Content-Type': 'application/json',
-            'Origin': 'cpybca.com',
-            'X-BCA-Key': self.api_key,
-            'X-BCA-Timestamp': timestamp,
-            'X-BCA-Signature': signature
+
+class Bca(BcaBase):
+    ''' Module to integrate with BCA API.
+    '''
+
+    def __init__(self, api_key, api_secret, host='https://sandbox.bca.co.id', pool=None,
+                 token_store=None, refresh_margin=60, balance_cache=None, scheduler=None,
+                 retry_policy=None, circuit_breaker=None, hedge_policy=None,
+                 instrumentation=None):
+        super().__init__(api_key, api_secret, host,
+                         pool if pool is not None else ConnectionPool())
+        # Token manager is created by sign_in, token_store shares token between processes.
+        self.token_manager = None
+        self.token_store = token_store
+        self.refresh_margin = refresh_margin
+        # Optional BalanceCache, entries are dropped when transfer moves money.
+        self.balance_cache = balance_cache
+        # Optional Scheduler applying rate limit and priority per endpoint.
+        self.scheduler = scheduler
+        # Optional resilience layer, see cpybca.resilience.
+        self.retry_policy = retry_policy
+        self.circuit_breaker = circuit_breaker
+        self.hedge_policy = hedge_policy
+        # Optional Instrumentation, costs nothing when it is not given.
+        self.instrumentation = instrumentation
+
+    def _acquire(self, endpoint):
+        ''' Wait for scheduler slot of endpoint, before request is signed so its timestamp
+        is not aged by queueing.
+        '''
+        if self.scheduler is not None and endpoint is not None:
+            self.scheduler.acquire(endpoint)
+
+    def _open_url(self, url, data=None, headers=None, endpoint=None):
+        ''' Helper to send request through connection pool.
+        '''
+        if self.instrumentation is not None:
+            return self._open_url_instrumented(url, data, headers, endpoint)
+        status, body = self._pool_request(url, data, headers)
+        return self._parse_response(status, body)
+
+    def _pool_request(self, url, data, headers, timings=None):
+        ''' Send request through pool. Return (status, body).
+        '''
+        try:
+            status, _, body = self.pool.request(
+                'POST' if data else 'GET', url, body=data, headers=headers, timings=timings
+            )
+        except ConnectError:
+            raise NetworkError('Something wrong with network connection or server', sent=False)
+        except (OSError, http.client.HTTPException):
+            raise NetworkError('Something wrong with network connection or server')
+        return status, body
+
+    def _open_url_instrumented(self, url, data, headers, endpoint):
+        ''' Same as _open_url, reporting phase timing to instrumentation hooks.
+        '''
+        event = RequestEvent(endpoint or 'unknown', 'POST' if data else 'GET', url,
+                             len(data) if data else 0)
+        self.instrumentation.request_started(event)
+        try:
+            event.status, body = self._pool_request(url, data, headers, event.timings)
+            event.response_bytes = len(body)
+            started = time.perf_counter()
+            try:
+                return self._parse_response(event.status, body)
+            finally:
+                event.timings['decode'] = time.perf_counter() - started
+        except Exception as err:
+            event.error = err
+            raise
+        finally:
+            self.instrumentation.request_finished(event)
+
+    def _current_token(self):
+        ''' Get access token, refreshed by token manager when it is about to expire.
+        '''
+        if self.token_manager is None:
+            return self.access_token
+        self.access_token = self.token_manager.get()
+        return self.access_token
+
+    def _send(self, url, data, headers, endpoint, idempotent):
+        ''' Open url through circuit breaker, hedged when call is idempotent.
+        '''
+        if self.circuit_breaker is not None:
+            self.circuit_breaker.before_call()
+        try:
+            if idempotent and self.hedge_policy is not None:
+                sent = itertools.count()
+
+                def attempt():
+                    # Slot of first request is taken by caller, hedged one takes its own.
+                    if next(sent):
+                        self._acquire(endpoint)
+                    return self._open_url(url, data=data, headers=headers, endpoint=endpoint)
+
+                response_data = self.hedge_policy.run(attempt)
+            else:
+                response_data = self._open_url(url, data=data, headers=headers, endpoint=endpoint)
+        except Exception as err:
+            # Any failure must be recorded, else half open circuit waits for its trial forever.
+            if self.circuit_breaker is not None:
+                self.circuit_breaker.record(err)
+            raise
+        if self.circuit_breaker is not None:
+            self.circuit_breaker.record(None)
+        return response_data
+
+    def _call(self, relative_url, http_method='GET', data=None, endpoint=None):
+        ''' Send signed API call.
+
+        Call is signed again and retried once when token is rejected. With retry_policy,
+        GET is retried on failure. POST is retried only when it surely did not reach server,
+        or with the same TransactionID when the policy allows it. Duplicate TransactionID
+        answer to such resend means earlier attempt may have been executed, it is raised as
+        NetworkError with ``sent`` set instead of ApiError.
+        '''
+        idempotent = http_method == 'GET'
+        attempt = 0
+        reauthenticated = False
+        # Earlier attempt of POST which server may have received.
+        maybe_sent = False
+        while True:
+            access_token = self._current_token()
+            self._acquire(endpoint)
+            url, headers = self._prepare_request(
+                relative_url, http_method, data or b'', access_token
+            )
+            try:
+                return self._send(url, data, headers, endpoint, idempotent)
+            except ApiError as err:
+                if err.status == 401 and self.token_manager is not None \
+                        and not reauthenticated:
+                    self.token_manager.invalidate(access_token)
+                    reauthenticated = True
+                    continue
+                if maybe_sent and err.duplicate:
+                    raise NetworkError('Transfer may have been executed by earlier attempt',
+                                       sent=True) from err
+                if self.retry_policy is None \
+                        or not self.retry_policy.should_retry(err, attempt, idempotent):
+                    raise
+                maybe_sent = maybe_sent or err.status is None or err.status >= 500
+            except NetworkError as err:
+                if self.retry_policy is None \
+                        or not self.retry_policy.should_retry(err, attempt, idempotent):
+                    raise
+                maybe_sent = maybe_sent or err.sent
+            time.sleep(self.retry_policy.delay(attempt))
+            attempt += 1
+
+    def _fetch_token(self, client_id, client_secret):
+        ''' Request new access token. Return (access_token, expires_in).
+        '''
+        url, data, headers = self._prepare_sign_in(client_id, client_secret)
+        self._acquire('oauth')
+        response_data = self._open_url(url, data=data, headers=headers, endpoint='oauth')
+        if 'access_token' not in response_data:
+            raise ValueError('Access token not found in response')
+        return response_data['access_token'], int(response_data.get('expires_in', 3600))
+
+    def sign_in(self, client_id, client_secret, lazy=False):
+        ''' Signing in client and get access token.
+
+        Token is refreshed automatically before it expires. With ``token_store`` processes
+        on one host share it, so only one of them calls the OAuth endpoint. With ``lazy``
+        token is fetched by first API call instead.
+        '''
+        key = hashlib.sha256(
+            (self.host + ':' + self.api_key + ':' + client_id).encode()
+        ).hexdigest()
+        self.token_manager = TokenManager(
+            lambda: self._fetch_token(client_id, client_secret),
+            refresh_margin=self.refresh_margin, store=self.token_store, key=key
+        )
+        if not lazy:
+            self._current_token()
+        return True
+
+    def get_balance(self, corporate_id, account_number):
+        ''' Get balance from account.
+        '''
+        relative_url = self._balance_url(corporate_id, account_number)
+        if self.balance_cache is None:
+            return self._call(relative_url, endpoint='balance')
+
+        account_numbers = account_number if isinstance(account_number, list) \
+            else [account_number]
+        cached = {}
+        for number in account_numbers:
+            entry = self.balance_cache.get(corporate_id, number)
+            if entry is not None:
+                cached[number] = entry
+        missing = [number for number in account_numbers if number not in cached]
+
+        response_data = {'AccountDetailDataSuccess': [], 'AccountDetailDataFailed': []}
+        if missing:
+            # Transfer finishing while call runs invalidates account, then entry is not kept.
+            versions = {number: self.balance_cache.version(number) for number in missing}
+            response_data = self._call(self._balance_url(
+                corporate_id, missing if isinstance(account_number, list) else missing[0]
+            ), endpoint='balance')
+            for entry in response_data.get('AccountDetailDataSuccess') or []:
+                self.balance_cache.set(corporate_id, entry['AccountNumber'], entry,
+                                       versions.get(entry['AccountNumber']))
+            if not cached:
+                return response_data
+
+        # Merge cached entries with fetched ones following requested order.
+        fetched = {
+            entry['AccountNumber']: entry
+            for entry in response_data.get('AccountDetailDataSuccess') or []
         }
+        return {
+            'AccountDetailDataSuccess': [
+                cached.get(number) or fetched[number]
+                for number in account_numbers if number in cached or number in fetched
+            ],
+            'AccountDetailDataFailed': response_data.get('AccountDetailDataFailed') or []
+        }
+
+    def get_balances(self, corporate_id, account_numbers, parallelism=4):
+        ''' Get balance of any number of account, 20 account per call running in parallel.
+
+        Result is merged into one response. Chunk which fails is reported in
+        ``ChunkErrors`` with its account numbers and error message.
+        '''
+        chunks = chunked(list(account_numbers), MAX_BALANCE_ACCOUNTS)
+        result = {'AccountDetailDataSuccess': [], 'AccountDetailDataFailed': [], 'ChunkErrors': []}
+        if not chunks:
+            return result
+
+        with concurrent.futures.ThreadPoolExecutor(min(parallelism, len(chunks))) as executor:
+            futures = [executor.submit(self.get_balance, corporate_id, chunk) for chunk in chunks]
+            for chunk, future in zip(chunks, futures):
+                try:
+                    response_data = future.result()
+                except ValueError as err:
+                    result['ChunkErrors'].append({
+                        'AccountNumbers': chunk,
+                        'ErrorMessage': err.args[0] if err.args else str(err)
+                    })
+                    continue
+                result['AccountDetailDataSuccess'].extend(
+                    response_data.get('AccountDetailDataSuccess') or []
+                )
+                result['AccountDetailDataFailed'].extend(
+                    response_data.get('AccountDetailDataFailed') or []
+                )
+        return result
+
+    def get_statement(self, corporate_id, account_number, start_date, end_date=None):
+        ''' Get account statement.
+        '''
+        relative_url = self._statement_url(corporate_id, account_number, start_date, end_date)
 
-        response_data = self._open_url(url, data=data, headers=headers)
+        response_data = self._call(relative_url, endpoint='statement')
+        return response_data
+
+    def stream_statement(self, corporate_id, account_number, start_date, end_date=None,
+                         fields=None, chunk_size=65536):
+        ''' Get account statement as gzip stream, yield transaction row as soon as it is decoded.
+
+        Only one row and one chunk of body is held in memory. Other response value like
+        StartBalance is put in ``fields`` dict when it is given. Call is signed again once when
+        token is rejected, but it is not retried after failure because rows may be consumed.
+        It goes through circuit breaker and instrumentation, ``response_bytes`` counts the
+        decompressed body.
+        '''
+        relative_url = self._statement_url(corporate_id, account_number, start_date, end_date)
+        reauthenticated = False
+        while True:
+            access_token = self._current_token()
+            self._acquire('statement')
+            url, headers = self._prepare_request(relative_url, access_token=access_token)
+            headers['Accept-Encoding'] = 'gzip'
+            if self.circuit_breaker is not None:
+                self.circuit_breaker.before_call()
+            event = None
+            if self.instrumentation is not None:
+                event = RequestEvent('statement', 'GET', url, 0)
+                self.instrumentation.request_started(event)
+            error = None
+            try:
+                try:
+                    connection, response = self.pool.urlopen(
+                        'GET', url, headers=headers,
+                        timings=event.timings if event is not None else None
+                    )
+                except ConnectError:
+                    raise NetworkError('Something wrong with network connection or server',
+                                       sent=False)
+                except (OSError, http.client.HTTPException):
+                    raise NetworkError('Something wrong with network connection or server')
+                if event is not None:
+                    event.status = response.status
+                try:
+                    chunks = iter_decompressed(response, chunk_size)
+                    if event is not None:
+                        chunks = _counted(chunks, event)
+                    if response.status >= 400:
+                        try:
+                            self._parse_response(response.status, b''.join(chunks))
+                        except ApiError as err:
+                            if err.status == 401 and self.token_manager is not None \
+                                    and not reauthenticated:
+                                self.token_manager.invalidate(access_token)
+                                reauthenticated = True
+                                continue
+                            raise
+                    for row in iter_json_items(chunks, 'Data', fields):
+                        yield row
+                    return
+                except (OSError, http.client.HTTPException, zlib.error):
+                    raise NetworkError('Something wrong with network connection or server')
+                finally:
+                    self.pool.release(connection, response)
+            except Exception as err:
+                error = err
+                raise
+            finally:
+                # Caller closing the generator early is not a failure.
+                if self.circuit_breaker is not None:
+                    self.circuit_breaker.record(error)
+                if event is not None:
+                    event.error = error
+                    self.instrumentation.request_finished(event)
+
+    def iter_statement_windows(self, corporate_id, account_number, start_date, end_date,
+                               parallelism=4):
+        ''' Get statement of any date range, yield (start_date, end_date, response) per window.
+
+        Range is split into windows of 31 day. At most ``parallelism`` window is fetched at
+        the same time and they are yielded in date order.
+        '''
+        windows = iter(statement_windows(start_date, end_date))
+        with concurrent.futures.ThreadPoolExecutor(parallelism) as executor:
+            pending = collections.deque(
+                (window, executor.submit(self.get_statement, corporate_id, account_number, *window))
+                for window in itertools.islice(windows, parallelism)
+            )
+            while pending:
+                window, future = pending.popleft()
+                response_data = future.result()
+                # Keep pipeline full while caller consumes this window.
+                for next_window in itertools.islice(windows, 1):
+                    pending.append((next_window, executor.submit(
+                        self.get_statement, corporate_id, account_number, *next_window
+                    )))
+                yield window[0], window[1], response_data
+
+    def iter_statement(self, corporate_id, account_number, start_date, end_date,
+                       parallelism=4):
+        ''' Get statement of any date range, yield transaction row in date order.
+        '''
+        for _, _, response_data in self.iter_statement_windows(
+                corporate_id, account_number, start_date, end_date, parallelism):
+            for row in response_data.get('Data') or []:
+                yield row
+
+    def transfer(self, corporate_id, source_account_number, beneficiary_account_number,
+                 transaction_id, transaction_date, reference_id, amount, currency_code='IDR',
+                 remark1=None, remark2=None):
+        ''' Transfer fund to other account.
+        '''
+        relative_url = self.transfer_path
+        data = self._transfer_body(
+            corporate_id, source_account_number, beneficiary_account_number, transaction_id,
+            transaction_date, reference_id, amount, currency_code, remark1, remark2
+        )
+
+        try:
+            response_data = self._call(relative_url, 'POST', data, 'transfer')
+        finally:
+            # Even failed call may have moved money, never keep balance of both accounts.
+            if self.balance_cache is not None:
+                self.balance_cache.invalidate(source_account_number, corporate_id)
+                self.balance_cache.invalidate(beneficiary_account_number)
         return response_data
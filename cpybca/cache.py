@@ -0,0 +1,100 @@
+import collections
+import threading
+import time
+
+
+class BalanceCache():
+    ''' Thread-safe LRU cache of balance entry with time to live.
+
+    Entry is keyed by (corporate_id, account_number). Caller fetching balance takes
+    :meth:`version` of account before the call and gives it to :meth:`set`, so balance
+    fetched before a transfer invalidated the account is not cached after it.
+    '''
+
+    def __init__(self, ttl=5, maxsize=10000):
+        self.ttl = ttl
+        self.maxsize = maxsize
+        self.hits = 0
+        self.misses = 0
+
+        self._lock = threading.Lock()
+        self._entries = collections.OrderedDict()
+        # Account number: corporate ids having its entry, so invalidate does not scan all.
+        self._corporates = {}
+        # Account number: invalidate count. Reset when too big, epoch tells version is stale.
+        self._versions = {}
+        self._epoch = 0
+
+    def _drop(self, key):
+        ''' Remove entry and its corporate index. Lock must be held.
+        '''
+        del self._entries[key]
+        corporates = self._corporates[key[1]]
+        corporates.discard(key[0])
+        if not corporates:
+            del self._corporates[key[1]]
+
+    def get(self, corporate_id, account_number):
+        ''' Get copy of cached entry or None when it is missing or expired.
+        '''
+        key = (corporate_id, account_number)
+        with self._lock:
+            item = self._entries.get(key)
+            if item is not None and item[0] > time.monotonic():
+                self._entries.move_to_end(key)
+                self.hits += 1
+                return dict(item[1])
+            if item is not None:
+                self._drop(key)
+            self.misses += 1
+            return None
+
+    def version(self, account_number):
+        ''' Get version of account to give to :meth:`set`.
+        '''
+        with self._lock:
+            return self._epoch, self._versions.get(account_number, 0)
+
+    def set(self, corporate_id, account_number, entry, version=None):
+        ''' Keep entry until ttl passes, drop least recently used one when full.
+
+        Entry is not kept when account was invalidated since ``version`` was taken.
+        '''
+        key = (corporate_id, account_number)
+        with self._lock:
+            if version is not None and \
+                    version != (self._epoch, self._versions.get(account_number, 0)):
+                return
+            self._entries[key] = (time.monotonic() + self.ttl, dict(entry))
+            self._entries.move_to_end(key)
+            self._corporates.setdefault(account_number, set()).add(corporate_id)
+            while len(self._entries) > self.maxsize:
+                self._drop(next(iter(self._entries)))
+
+    def invalidate(self, account_number, corporate_id=None):
+        ''' Drop entry of account, of every corporate when corporate_id is not given.
+        '''
+        with self._lock:
+            self._versions[account_number] = self._versions.get(account_number, 0) + 1
+            if len(self._versions) > self.maxsize:
+                self._versions.clear()
+                self._epoch += 1
+            corporates = self._corporates.get(account_number)
+            if not corporates:
+                return
+            for corporate in [corporate_id] if corporate_id is not None else list(corporates):
+                if (corporate, account_number) in self._entries:
+                    self._drop((corporate, account_number))
+
+    def clear(self):
+        ''' Drop all entry.
+        '''
+        with self._lock:
+            self._entries.clear()
+            self._corporates.clear()
+
+    def stats(self):
+        ''' Get hit and miss counters.
+        '''
+        with self._lock:
+            return {'hits': self.hits, 'misses': self.misses, 'size': len(self._entries)}
@@ -0,0 +1,241 @@
+''' Command line tool of cpybca.
+
+Credentials are read from option or CPYBCA_HOST, CPYBCA_API_KEY, CPYBCA_API_SECRET,
+CPYBCA_CLIENT_ID and CPYBCA_CLIENT_SECRET environment variable. Heavy module is imported
+by the command which needs it, so ``cpybca --help`` starts quickly.
+'''
+import argparse
+import os
+import sys
+
+STATEMENT_FIELDS = ('TransactionDate', 'BranchCode', 'TransactionType', 'TransactionAmount',
+                    'TransactionName', 'Trailer')
+
+
+def read_accounts(path):
+    ''' Get account numbers of file, one per line. Blank line and '#' comment are skipped.
+    '''
+    if path == '-':
+        # Standard input is left open, it may be read again.
+        return _parse_accounts(sys.stdin)
+    with open(path) as account_file:
+        return _parse_accounts(account_file)
+
+
+def _parse_accounts(lines):
+    ''' Get account numbers of lines.
+    '''
+    accounts = []
+    for line in lines:
+        line = line.split('#', 1)[0].strip()
+        if line:
+            accounts.append(line)
+    return accounts
+
+
+def output_path(directory, corporate_id, account_number, start_date, end_date, output_format,
+                compress):
+    ''' Get export file path of account statement.
+    '''
+    return os.path.join(directory, '{}-{}-{}-{}.{}{}'.format(
+        corporate_id, account_number, start_date, end_date, output_format,
+        '.gz' if compress else ''
+    ))
+
+
+def _load_progress(path):
+    ''' Get progress sidecar, None when it is missing or unreadable.
+    '''
+    import json
+
+    try:
+        with open(path) as progress_file:
+            return json.load(progress_file)
+    except (OSError, ValueError):
+        return None
+
+
+def _save_progress(path, progress):
+    ''' Replace progress sidecar atomically.
+    '''
+    import json
+
+    with open(path + '.tmp', 'w') as progress_file:
+        json.dump(progress, progress_file)
+        progress_file.flush()
+        os.fsync(progress_file.fileno())
+    os.replace(path + '.tmp', path)
+
+
+def _encode_rows(rows, output_format, header):
+    ''' Get bytes of rows as NDJSON or CSV.
+    '''
+    import io
+
+    if output_format == 'csv':
+        import csv
+
+        text = io.StringIO()
+        writer = csv.DictWriter(text, STATEMENT_FIELDS, extrasaction='ignore')
+        if header:
+            writer.writeheader()
+        writer.writerows(rows)
+        return text.getvalue().encode('UTF-8')
+
+    import json
+
+    return b''.join(
+        json.dumps(row, ensure_ascii=False, separators=(',', ':')).encode('UTF-8') + b'\n'
+        for row in rows
+    )
+
+
+def export_statement(bca, corporate_id, account_number, start_date, end_date, path,
+                     output_format='ndjson', compress=False, parallelism=4):
+    ''' Write statement rows of account to path window by window. Return row count.
+
+    '<path>.progress' keeps the last written window and file size, so export stopped
+    midway continues from there, dropping part of window written after it. Gzip output is
+    one gzip member per window. Export is skipped when path exists without progress file.
+    '''
+    from cpybca.bca import statement_windows
+
+    progress_path = path + '.progress'
+    progress = _load_progress(progress_path)
+    if progress is None:
+        if os.path.exists(path):
+            return None
+        progress = {'end_date': None, 'size': 0, 'rows': 0}
+        _save_progress(progress_path, progress)
+
+    windows = [window for window in statement_windows(start_date, end_date)
+               if progress['end_date'] is None or window[0] > progress['end_date']]
+    with open(path, 'ab') as output:
+        output.truncate(progress['size'])
+        if windows:
+            for window_start, window_end, response_data in bca.iter_statement_windows(
+                    corporate_id, account_number, windows[0][0], windows[-1][1], parallelism):
+                rows = response_data.get('Data') or []
+                data = _encode_rows(rows, output_format, progress['size'] == 0)
+                if compress:
+                    import gzip
+
+                    data = gzip.compress(data)
+                output.write(data)
+                output.flush()
+                os.fsync(output.fileno())
+                progress = {'end_date': window_end, 'size': progress['size'] + len(data),
+                            'rows': progress['rows'] + len(rows)}
+                _save_progress(progress_path, progress)
+    os.remove(progress_path)
+    return progress['rows']
+
+
+def statement(args):
+    ''' Export statement of every account, ``concurrency`` account at a time.
+    '''
+    import concurrent.futures
+
+    from cpybca.bca import Bca
+    from cpybca.pool import ConnectionPool
+    from cpybca.resilience import RetryPolicy
+    from cpybca.scheduler import Scheduler
+
+    accounts = list(args.account_numbers)
+    for path in args.accounts or []:
+        accounts.extend(read_accounts(path))
+    if not accounts:
+        sys.stderr.write('No account number given\n')
+        return 2
+    os.makedirs(args.output_dir, exist_ok=True)
+
+    bca = Bca(args.api_key, args.api_secret, args.host,
+              pool=ConnectionPool(maxsize=args.concurrency * args.parallelism),
+              scheduler=Scheduler(rates={'statement': args.rate}) if args.rate else None,
+              retry_policy=RetryPolicy(max_attempts=args.attempts))
+    try:
+        bca.sign_in(args.client_id, args.client_secret)
+    except (OSError, ValueError) as err:
+        sys.stderr.write('Sign in failed: {}\n'.format(err))
+        return 1
+
+    def export(account_number):
+        path = output_path(args.output_dir, args.corporate_id, account_number, args.start,
+                           args.end, args.format, args.gzip)
+        return path, export_statement(bca, args.corporate_id, account_number, args.start,
+                                      args.end, path, args.format, args.gzip, args.parallelism)
+
+    failed = 0
+    with concurrent.futures.ThreadPoolExecutor(args.concurrency) as executor:
+        futures = {executor.submit(export, number): number for number in accounts}
+        for future in concurrent.futures.as_completed(futures):
+            try:
+                path, rows = future.result()
+            except (OSError, ValueError) as err:
+                failed += 1
+                sys.stderr.write('{} failed: {}\n'.format(futures[future], err))
+                continue
+            if rows is None:
+                sys.stderr.write('{} skipped, {} exists\n'.format(futures[future], path))
+            else:
+                sys.stderr.write('{} {} rows written to {}\n'.format(futures[future], rows,
+                                                                   path))
+    bca.pool.close()
+    return 1 if failed else 0
+
+
+def build_parser():
+    ''' Build argument parser of every command.
+    '''
+    environ = os.environ
+    parser = argparse.ArgumentParser(prog='cpybca', description='Access BCA API.')
+    parser.add_argument('--host', default=environ.get('CPYBCA_HOST',
+                                                      'https://sandbox.bca.co.id'))
+    parser.add_argument('--api-key', default=environ.get('CPYBCA_API_KEY'))
+    parser.add_argument('--api-secret', default=environ.get('CPYBCA_API_SECRET'))
+    parser.add_argument('--client-id', default=environ.get('CPYBCA_CLIENT_ID'))
+    parser.add_argument('--client-secret', default=environ.get('CPYBCA_CLIENT_SECRET'))
+    commands = parser.add_subparsers(dest='command')
+
+    statement_parser = commands.add_parser(
+        'statement', help='export statement of accounts to NDJSON or CSV files',
+        description='Export statement of accounts, one file per account. Export stopped '
+                    'midway is continued when it is run again.'
+    )
+    statement_parser.add_argument('corporate_id')
+    statement_parser.add_argument('start', help='yyyy-MM-dd')
+    statement_parser.add_argument('end', help='yyyy-MM-dd')
+    statement_parser.add_argument('account_numbers', nargs='*')
+    statement_parser.add_argument('--accounts', action='append', metavar='FILE',
+                                  help="file of account number per line, '-' for stdin")
+    statement_parser.add_argument('--output-dir', default='.')
+    statement_parser.add_argument('--format', choices=('ndjson', 'csv'), default='ndjson')
+    statement_parser.add_argument('--gzip', action='store_true')
+    statement_parser.add_argument('--concurrency', type=int, default=4,
+                                  help='account exported at the same time')
+    statement_parser.add_argument('--parallelism', type=int, default=2,
+                                  help='31 day window fetched at the same time per account')
+    statement_parser.add_argument('--rate', type=float, help='maximum statement call per second')
+    statement_parser.add_argument('--attempts', type=int, default=3,
+                                  help='attempt per failing call')
+    statement_parser.set_defaults(func=statement)
+    return parser
+
+
+def main(argv=None):
+    ''' Run command given by argv. Return exit status.
+    '''
+    parser = build_parser()
+    args = parser.parse_args(argv)
+    if args.command is None:
+        parser.print_help()
+        return 2
+    for option in ('api_key', 'api_secret', 'client_id', 'client_secret'):
+        if not getattr(args, option):
+            parser.error('--{} or CPYBCA_{} is required'.format(option.replace('_', '-'),
+                                                               option.upper()))
+    return args.func(args)
+
+
+if __name__ == '__main__':
+    sys.exit(main())
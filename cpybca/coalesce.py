@@ -0,0 +1,122 @@
+import concurrent.futures
+import threading
+
+from cpybca.bca import MAX_BALANCE_ACCOUNTS
+
+
+class _Batch():
+    ''' Accounts of one corporate waiting to be sent together.
+    '''
+
+    __slots__ = ('account_numbers', 'full')
+
+    def __init__(self):
+        self.account_numbers = []
+        self.full = threading.Event()
+
+
+class BalanceCoalescer():
+    ''' Merge concurrent get balance of one corporate into multi account calls.
+
+    Caller asking an account which is already requested waits for the same call. First
+    caller of a batch waits up to ``window`` second for other account to join, then sends
+    the batch from its own thread. Batch is sent at once when it has ``max_batch`` account.
+    '''
+
+    def __init__(self, bca, window=0.005, max_batch=MAX_BALANCE_ACCOUNTS):
+        self.bca = bca
+        self.window = window
+        self.max_batch = min(max_batch, MAX_BALANCE_ACCOUNTS)
+        self.requests = 0
+        self.coalesced = 0
+        self.calls = 0
+
+        self._lock = threading.Lock()
+        self._batches = {}
+        # (corporate_id, account_number): future of pending or running call, dropped once resolved.
+        self._in_flight = {}
+
+    def _submit(self, corporate_id, account_number):
+        ''' Get future of account balance, return (future, batch to send or None).
+        '''
+        with self._lock:
+            self.requests += 1
+            future = self._in_flight.get((corporate_id, account_number))
+            if future is not None:
+                self.coalesced += 1
+                return future, None
+            future = self._in_flight[(corporate_id, account_number)] = \
+                concurrent.futures.Future()
+            batch = self._batches.get(corporate_id)
+            leader = batch is None
+            if leader:
+                batch = self._batches[corporate_id] = _Batch()
+            batch.account_numbers.append(account_number)
+            if len(batch.account_numbers) >= self.max_batch:
+                del self._batches[corporate_id]
+                batch.full.set()
+        return future, batch if leader else None
+
+    def _send(self, corporate_id, batch):
+        ''' Wait for batch to fill, call API and give each caller its entries.
+        '''
+        batch.full.wait(self.window)
+        with self._lock:
+            if self._batches.get(corporate_id) is batch:
+                del self._batches[corporate_id]
+            account_numbers = list(batch.account_numbers)
+            futures = [self._in_flight[(corporate_id, number)] for number in account_numbers]
+            self.calls += 1
+        try:
+            self._resolve(corporate_id, account_numbers, futures)
+        finally:
+            # Caller asking the account while call runs shares it, later caller calls again.
+            with self._lock:
+                for number in account_numbers:
+                    del self._in_flight[(corporate_id, number)]
+
+    def _resolve(self, corporate_id, account_numbers, futures):
+        ''' Call API and set each future to entries of its account.
+        '''
+        try:
+            response_data = self.bca.get_balance(corporate_id, account_numbers)
+        except Exception as err:
+            for future in futures:
+                future.set_exception(err)
+            return
+        success = {entry.get('AccountNumber'): entry
+                   for entry in response_data.get('AccountDetailDataSuccess') or []}
+        failed = {entry.get('AccountNumber'): entry
+                  for entry in response_data.get('AccountDetailDataFailed') or []}
+        for number, future in zip(account_numbers, futures):
+            future.set_result({
+                'AccountDetailDataSuccess': [success[number]] if number in success else [],
+                'AccountDetailDataFailed': [failed[number]] if number in failed else []
+            })
+
+    def get_balance(self, corporate_id, account_number):
+        ''' Get balance like :meth:`Bca.get_balance`, sharing API call with other thread.
+        '''
+        account_numbers = account_number if isinstance(account_number, list) \
+            else [account_number]
+        futures, batches = [], []
+        for number in account_numbers:
+            future, batch = self._submit(corporate_id, number)
+            futures.append(future)
+            if batch is not None:
+                batches.append(batch)
+        for batch in batches:
+            self._send(corporate_id, batch)
+        result = {'AccountDetailDataSuccess': [], 'AccountDetailDataFailed': []}
+        for future in futures:
+            response_data = future.result()
+            result['AccountDetailDataSuccess'].extend(response_data['AccountDetailDataSuccess'])
+            result['AccountDetailDataFailed'].extend(response_data['AccountDetailDataFailed'])
+        return result
+
+    def stats(self):
+        ''' Get request, coalesced request and API call counters.
+        '''
+        with self._lock:
+            return {'requests': self.requests, 'coalesced': self.coalesced,
+                    'calls': self.calls}
@@ -0,0 +1,167 @@
+import bisect
+import threading
+import time
+
+# Upper bound in second of latency histogram buckets.
+DEFAULT_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10)
+
+
+class RequestEvent():
+    ''' One API call seen by instrumentation hooks.
+
+    ``timings`` has second spent in 'pool_wait', 'connect', 'tls', 'ttfb', 'read', 'decode'
+    and 'total'. ``status`` is None and ``error`` is set when no response is received.
+    '''
+
+    __slots__ = ('endpoint', 'method', 'url', 'status', 'request_bytes', 'response_bytes',
+                 'error', 'timings', 'started')
+
+    def __init__(self, endpoint, method, url, request_bytes):
+        self.endpoint = endpoint
+        self.method = method
+        self.url = url
+        self.status = None
+        self.request_bytes = request_bytes
+        self.response_bytes = 0
+        self.error = None
+        self.timings = {}
+        self.started = time.perf_counter()
+
+
+class Metrics():
+    ''' Counters and latency histograms per endpoint.
+    '''
+
+    def __init__(self, buckets=DEFAULT_BUCKETS):
+        self.buckets = tuple(buckets)
+        self._lock = threading.Lock()
+        self._endpoints = {}
+
+    def record(self, event):
+        ''' Add finished request event.
+        '''
+        status = str(event.status) if event.status is not None else 'error'
+        total = event.timings.get('total', 0)
+        with self._lock:
+            metrics = self._endpoints.get(event.endpoint)
+            if metrics is None:
+                metrics = self._endpoints[event.endpoint] = {
+                    'requests': {},
+                    'request_bytes': 0,
+                    'response_bytes': 0,
+                    'buckets': [0] * (len(self.buckets) + 1),
+                    'duration_sum': 0.0,
+                    'duration_count': 0,
+                    'phases': {},
+                }
+            metrics['requests'][status] = metrics['requests'].get(status, 0) + 1
+            metrics['request_bytes'] += event.request_bytes
+            metrics['response_bytes'] += event.response_bytes
+            metrics['buckets'][bisect.bisect_left(self.buckets, total)] += 1
+            metrics['duration_sum'] += total
+            metrics['duration_count'] += 1
+            for phase, duration in event.timings.items():
+                metrics['phases'][phase] = metrics['phases'].get(phase, 0.0) + duration
+
+    def snapshot(self):
+        ''' Get copy of all metrics as dict per endpoint.
+        '''
+        with self._lock:
+            return {
+                endpoint: dict(metrics, requests=dict(metrics['requests']),
+                               buckets=list(metrics['buckets']), phases=dict(metrics['phases']))
+                for endpoint, metrics in self._endpoints.items()
+            }
+
+    def prometheus(self, prefix='cpybca'):
+        ''' Get metrics in Prometheus text exposition format.
+        '''
+        snapshot = self.snapshot()
+        lines = [
+            '# HELP {}_requests_total API calls by endpoint and status.'.format(prefix),
+            '# TYPE {}_requests_total counter'.format(prefix),
+        ]
+        for endpoint, metrics in sorted(snapshot.items()):
+            for status, count in sorted(metrics['requests'].items()):
+                lines.append('{}_requests_total{{endpoint="{}",status="{}"}} {}'.format(
+                    prefix, endpoint, status, count))
+        lines += [
+            '# HELP {}_bytes_total Bytes sent and received by endpoint.'.format(prefix),
+            '# TYPE {}_bytes_total counter'.format(prefix),
+        ]
+        for endpoint, metrics in sorted(snapshot.items()):
+            for direction in ('request', 'response'):
+                lines.append('{}_bytes_total{{endpoint="{}",direction="{}"}} {}'.format(
+                    prefix, endpoint, direction, metrics[direction + '_bytes']))
+        lines += [
+            '# HELP {}_request_duration_seconds API call latency.'.format(prefix),
+            '# TYPE {}_request_duration_seconds histogram'.format(prefix),
+        ]
+        for endpoint, metrics in sorted(snapshot.items()):
+            cumulative = 0
+            for bound, count in zip(self.buckets + ('+Inf',), metrics['buckets']):
+                cumulative += count
+                lines.append('{}_request_duration_seconds_bucket{{endpoint="{}",le="{}"}} {}'
+                             .format(prefix, endpoint, bound, cumulative))
+            lines.append('{}_request_duration_seconds_sum{{endpoint="{}"}} {}'.format(
+                prefix, endpoint, metrics['duration_sum']))
+            lines.append('{}_request_duration_seconds_count{{endpoint="{}"}} {}'.format(
+                prefix, endpoint, metrics['duration_count']))
+        lines += [
+            '# HELP {}_phase_seconds_total Time spent per request phase.'.format(prefix),
+            '# TYPE {}_phase_seconds_total counter'.format(prefix),
+        ]
+        for endpoint, metrics in sorted(snapshot.items()):
+            for phase, duration in sorted(metrics['phases'].items()):
+                lines.append('{}_phase_seconds_total{{endpoint="{}",phase="{}"}} {}'.format(
+                    prefix, endpoint, phase, duration))
+        return '\n'.join(lines) + '\n'
+
+
+class Instrumentation():
+    ''' Request start and end hooks plus built-in metrics.
+
+    Hook is called with :class:`RequestEvent`, error raised by hook is ignored so it can
+    not break API call. Give ``metrics=None`` to only run hooks.
+    '''
+
+    def __init__(self, metrics=True):
+        self.metrics = Metrics() if metrics is True else metrics
+        self.start_hooks = []
+        self.end_hooks = []
+
+    def add_start_hook(self, hook):
+        ''' Call hook with RequestEvent before request is sent.
+        '''
+        self.start_hooks.append(hook)
+
+    def add_end_hook(self, hook):
+        ''' Call hook with RequestEvent after request is finished or failed.
+        '''
+        self.end_hooks.append(hook)
+
+    def request_started(self, event):
+        ''' Run start hooks, their error is ignored.
+        '''
+        for hook in self.start_hooks:
+            try:
+                hook(event)
+            except Exception:
+                pass
+
+    def request_finished(self, event):
+        ''' Record event to metrics and run end hooks, their error is ignored.
+        '''
+        event.timings['total'] = time.perf_counter() - event.started
+        if self.metrics is not None:
+            self.metrics.record(event)
+        for hook in self.end_hooks:
+            try:
+                hook(event)
+            except Exception:
+                pass
+
+    def export(self, callback):
+        ''' Give metrics snapshot to callback, e.g. to push it to other monitoring system.
+        '''
+        callback(self.metrics.snapshot())
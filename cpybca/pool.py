@@ -0,0 +1,277 @@
+import base64
+import collections
+import http.client
+import select
+import ssl
+import threading
+import time
+import urllib.parse
+import urllib.request
+
+# Errors raised by a reused socket the server already closed on its side.
+STALE_CONNECTION_ERRORS = (
+    http.client.RemoteDisconnected,
+    http.client.BadStatusLine,
+    BrokenPipeError,
+    ConnectionAbortedError,
+    ConnectionResetError,
+)
+
+# Methods sent again on a fresh socket when reused one turns out to be dropped. Other method
+# may have been processed by server before it closed the socket, so it is never resent.
+IDEMPOTENT_METHODS = ('GET', 'HEAD')
+
+
+class ConnectError(OSError):
+    ''' Connection could not be opened, so request was not sent.
+    '''
+
+
+class _HostPool():
+    ''' Idle connections and connection slots of one (scheme, host, port).
+    '''
+
+    def __init__(self, maxsize):
+        self.idle = collections.deque()
+        self.slots = threading.BoundedSemaphore(maxsize)
+
+
+class ConnectionPool():
+    ''' Thread-safe pool of keep-alive HTTP(S) connections per host.
+
+    ``proxies`` maps scheme to proxy url like urllib does. By default it is read from
+    HTTP_PROXY, HTTPS_PROXY and NO_PROXY environment variable, give ``{}`` to never use one.
+    '''
+
+    def __init__(self, maxsize=10, idle_timeout=60, connect_timeout=10, read_timeout=30,
+                 ssl_context=None, proxies=None):
+        self.maxsize = maxsize
+        self.idle_timeout = idle_timeout
+        self.connect_timeout = connect_timeout
+        self.read_timeout = read_timeout
+        self.ssl_context = ssl_context
+        self.proxies = urllib.request.getproxies() if proxies is None else proxies
+
+        self._lock = threading.Lock()
+        self._hosts = {}
+        self._stats = {
+            'created': 0,
+            'reused': 0,
+            'reconnected': 0,
+            'discarded': 0,
+            'requests': 0,
+        }
+
+    def _host_pool(self, key):
+        ''' Get or create pool for one host.
+        '''
+        with self._lock:
+            host_pool = self._hosts.get(key)
+            if host_pool is None:
+                host_pool = self._hosts[key] = _HostPool(self.maxsize)
+            return host_pool
+
+    def _count(self, name):
+        with self._lock:
+            self._stats[name] += 1
+
+    def _proxy(self, scheme, host):
+        ''' Get (host, port, headers) of proxy to reach host, None to connect directly.
+        '''
+        proxy_url = self.proxies.get(scheme)
+        if not proxy_url:
+            return None
+        no_proxy = self.proxies.get('no')
+        if no_proxy is not None:
+            if no_proxy == '*' or any(
+                    host == name or host.endswith('.' + name.lstrip('.'))
+                    for name in (name.strip() for name in no_proxy.split(',')) if name):
+                return None
+        elif urllib.request.proxy_bypass(host):
+            return None
+        parts = urllib.parse.urlsplit(proxy_url if '://' in proxy_url else '//' + proxy_url)
+        headers = {}
+        if parts.username is not None:
+            credentials = urllib.parse.unquote(parts.username) + ':' + \
+                urllib.parse.unquote(parts.password or '')
+            headers['Proxy-Authorization'] = 'Basic ' + \
+                base64.b64encode(credentials.encode()).decode()
+        return parts.hostname, parts.port or 8080, headers
+
+    def _new_connection(self, key):
+        ''' Open new connection, apply connect timeout then switch to read timeout.
+        '''
+        scheme, host, port = key
+        proxy = self._proxy(scheme, host)
+        address = (proxy[0], proxy[1]) if proxy is not None else (host, port)
+        if scheme == 'https':
+            if self.ssl_context is None:
+                self.ssl_context = ssl.create_default_context()
+            connection = http.client.HTTPSConnection(
+                *address, timeout=self.connect_timeout, context=self.ssl_context
+            )
+            if proxy is not None:
+                # TLS goes through CONNECT tunnel, proxy never sees request.
+                connection.set_tunnel(host, port, headers=proxy[2])
+            connection.proxy_headers = None
+        else:
+            connection = http.client.HTTPConnection(*address, timeout=self.connect_timeout)
+            # Plain HTTP proxy gets absolute url and its own headers on every request.
+            connection.proxy_headers = proxy[2] if proxy is not None else None
+        connection.pool_key = key
+        # Time TCP connect apart from TLS handshake, both are reported by request timings.
+        create_connection = connection._create_connection
+        tcp_time = [0]
+
+        def timed_create_connection(*args, **kwargs):
+            started = time.perf_counter()
+            sock = create_connection(*args, **kwargs)
+            tcp_time[0] = time.perf_counter() - started
+            return sock
+
+        connection._create_connection = timed_create_connection
+        started = time.perf_counter()
+        try:
+            connection.connect()
+        except OSError as err:
+            connection.close()
+            raise ConnectError(err) from err
+        connection.connect_time = tcp_time[0]
+        connection.tls_time = time.perf_counter() - started - tcp_time[0] \
+            if scheme == 'https' else 0
+        connection.sock.settimeout(self.read_timeout)
+        self._count('created')
+        return connection
+
+    def _is_usable(self, connection, last_used):
+        ''' Check idle connection is not expired and not closed by server.
+        '''
+        if connection.sock is None:
+            return False
+        if self.idle_timeout is not None and time.monotonic() - last_used > self.idle_timeout:
+            return False
+        # Readable idle socket means server sent EOF (or garbage), both unusable.
+        try:
+            readable, _, _ = select.select([connection.sock], [], [], 0)
+        except (OSError, ValueError):
+            return False
+        return not readable
+
+    def _checkout(self, key, host_pool):
+        ''' Take usable idle connection or open a new one. Return (connection, reused).
+        '''
+        while True:
+            try:
+                connection, last_used = host_pool.idle.pop()
+            except IndexError:
+                return self._new_connection(key), False
+            if self._is_usable(connection, last_used):
+                self._count('reused')
+                return connection, True
+            connection.close()
+            self._count('discarded')
+
+    def _send(self, connection, method, url, path, body, headers):
+        if connection.proxy_headers is not None:
+            path = url
+            headers = dict(headers or {}, **connection.proxy_headers)
+        connection.request(method, path, body=body, headers=headers or {})
+        return connection.getresponse()
+
+    def urlopen(self, method, url, body=None, headers=None, timings=None):
+        ''' Send request and return (connection, response) without reading the body.
+
+        Caller must read the response and give connection back with :meth:`release`.
+        When ``timings`` dict is given, second spent in 'pool_wait', 'connect', 'tls' and
+        'ttfb' (send until response headers) is written to it.
+        '''
+        parts = urllib.parse.urlsplit(url)
+        key = (parts.scheme, parts.hostname, parts.port)
+        path = parts.path or '/'
+        if parts.query:
+            path += '?' + parts.query
+
+        host_pool = self._host_pool(key)
+        if timings is not None:
+            started = time.perf_counter()
+        host_pool.slots.acquire()
+        try:
+            if timings is not None:
+                timings['pool_wait'] = time.perf_counter() - started
+            connection, reused = self._checkout(key, host_pool)
+            if timings is not None:
+                sent = time.perf_counter()
+            try:
+                response = self._send(connection, method, url, path, body, headers)
+            except STALE_CONNECTION_ERRORS as err:
+                connection.close()
+                if not reused or method not in IDEMPOTENT_METHODS:
+                    raise
+                # Server dropped kept-alive socket before answering, retry on a fresh one.
+                self._count('reconnected')
+                try:
+                    connection = self._new_connection(key)
+                except ConnectError as connect_err:
+                    # First attempt may have reached server, do not report it as not sent.
+                    raise err from connect_err
+                reused = False
+                response = self._send(connection, method, url, path, body, headers)
+        except BaseException:
+            host_pool.slots.release()
+            raise
+        self._count('requests')
+        if timings is not None:
+            timings['ttfb'] = time.perf_counter() - sent
+            timings['connect'] = 0 if reused else connection.connect_time
+            timings['tls'] = 0 if reused else connection.tls_time
+        return connection, response
+
+    def release(self, connection, response):
+        ''' Put connection back to pool when it can be kept alive.
+        '''
+        host_pool = self._host_pool(connection.pool_key)
+        if response.will_close or not response.isclosed() or connection.sock is None:
+            connection.close()
+        else:
+            host_pool.idle.append((connection, time.monotonic()))
+        host_pool.slots.release()
+
+    def request(self, method, url, body=None, headers=None, timings=None):
+        ''' Send request and read whole response. Return (status, headers, data).
+
+        With ``timings`` dict, 'read' time of body is written too, see :meth:`urlopen`.
+        '''
+        connection, response = self.urlopen(method, url, body, headers, timings)
+        try:
+            if timings is not None:
+                started = time.perf_counter()
+            data = response.read()
+            if timings is not None:
+                timings['read'] = time.perf_counter() - started
+        except BaseException:
+            connection.close()
+            raise
+        finally:
+            self.release(connection, response)
+        return response.status, response.headers, data
+
+    def stats(self):
+        ''' Get connection reuse stats.
+        '''
+        with self._lock:
+            stats = dict(self._stats)
+            stats['idle'] = sum(len(host_pool.idle) for host_pool in self._hosts.values())
+        return stats
+
+    def close(self):
+        ''' Close all idle connections.
+        '''
+        with self._lock:
+            host_pools = list(self._hosts.values())
+        for host_pool in host_pools:
+            while True:
+                try:
+                    connection, _ = host_pool.idle.pop()
+                except IndexError:
+                    break
+                connection.close()
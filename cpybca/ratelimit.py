@@ -0,0 +1,49 @@
+import threading
+import time
+
+
+class TokenBucket():
+    ''' Thread-safe token bucket, ``rate`` token per second up to ``capacity`` token.
+    '''
+
+    def __init__(self, rate, capacity=None):
+        self.rate = float(rate)
+        self.capacity = float(capacity if capacity is not None else max(rate, 1))
+        self._tokens = self.capacity
+        self._updated = time.monotonic()
+        self._lock = threading.Lock()
+
+    def _fill(self, now):
+        self._tokens = min(self.capacity, self._tokens + (now - self._updated) * self.rate)
+        self._updated = now
+
+    def wait_time(self, tokens=1):
+        ''' Get second to wait until tokens are available, 0 when they are.
+        '''
+        with self._lock:
+            self._fill(time.monotonic())
+            if self._tokens >= tokens:
+                return 0
+            return (tokens - self._tokens) / self.rate
+
+    def try_acquire(self, tokens=1):
+        ''' Take tokens when available without waiting.
+        '''
+        with self._lock:
+            self._fill(time.monotonic())
+            if self._tokens >= tokens:
+                self._tokens -= tokens
+                return True
+            return False
+
+    def acquire(self, tokens=1):
+        ''' Take tokens, sleep until they are available.
+        '''
+        while True:
+            with self._lock:
+                self._fill(time.monotonic())
+                if self._tokens >= tokens:
+                    self._tokens -= tokens
+                    return
+                delay = (tokens - self._tokens) / self.rate
+            time.sleep(delay)
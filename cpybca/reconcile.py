@@ -0,0 +1,233 @@
+import array
+import itertools
+
+from cpybca.bca import row_date, to_date
+from cpybca.records import to_minor
+
+# How transfer is recognized in statement row, strongest first.
+MATCH_REFERENCE = 'reference'
+MATCH_REMARK = 'remark'
+MATCH_AMOUNT = 'amount'
+
+# BCA keeps at most 18 character of remark.
+REMARK_LENGTH = 18
+
+
+def normalize(text):
+    ''' Upper case text with whitespace collapsed, for tolerant comparison.
+    '''
+    return ' '.join(text.upper().split()) if text else ''
+
+
+def _add(index_of, key, index):
+    ''' Add row index under key. Single row is kept as int, most keys have only one.
+    '''
+    current = index_of.get(key)
+    if current is None:
+        index_of[key] = index
+    elif current.__class__ is int:
+        index_of[key] = [current, index]
+    else:
+        current.append(index)
+
+
+def _indexes(value):
+    if value is None:
+        return ()
+    return (value,) if value.__class__ is int else value
+
+
+class Reconciler():
+    ''' Match transfers against statement rows of the source account.
+
+    Debit rows are indexed by (amount in minor unit, day). A transfer takes, in this order,
+    a row having its ReferenceID or TransactionID as a word, a row containing its remark from
+    the start of a word, or any row of its amount. Row date must be within ``date_tolerance``
+    day of TransactionDate and the closest one is taken, pending row matches any date. A row
+    matches at most one transfer.
+    '''
+
+    def __init__(self, date_tolerance=1, transaction_type='D'):
+        self.date_tolerance = date_tolerance
+        self.transaction_type = transaction_type
+        self.rows = []
+
+        self._amounts = array.array('q')
+        self._days = array.array('l')
+        self._texts = []
+        # (amount, day ordinal or 0 when pending): row index or list of them.
+        self._buckets = {}
+
+    def add_rows(self, rows, start_date, end_date):
+        ''' Index statement rows of window from start_date to end_date.
+        '''
+        start_date, end_date = to_date(start_date), to_date(end_date)
+        dates = {}
+        for row in rows:
+            if row.get('TransactionType') != self.transaction_type:
+                continue
+            transaction_date = row.get('TransactionDate')
+            day = dates.get(transaction_date)
+            if day is None:
+                date = row_date(transaction_date, start_date, end_date)
+                day = dates[transaction_date] = date.toordinal() if date is not None else 0
+            amount = to_minor(row.get('TransactionAmount'))
+            _add(self._buckets, (amount, day), len(self.rows))
+            self._amounts.append(amount)
+            self._days.append(day)
+            self._texts.append(normalize(
+                (row.get('Trailer') or '') + ' ' + (row.get('TransactionName') or '')
+            ))
+            self.rows.append(row)
+
+    def add_response(self, response_data):
+        ''' Index rows of one get statement response.
+        '''
+        self.add_rows(response_data.get('Data') or [], response_data['StartDate'],
+                      response_data['EndDate'])
+
+    def add_windows(self, windows):
+        ''' Index (start_date, end_date, response) of :meth:`Bca.iter_statement_windows`.
+        '''
+        for start_date, end_date, response_data in windows:
+            self.add_rows(response_data.get('Data') or [], start_date, end_date)
+
+    def _index_words(self, words, remark_keys):
+        ''' Get {word or (word prefix, amount): row index or list} of rows having one of them.
+        '''
+        index_of = {}
+        for index, text in enumerate(self._texts):
+            amount = self._amounts[index]
+            for word in text.split():
+                if word in words:
+                    _add(index_of, word, index)
+                # Remark is cut to 18 character, so may end with part of a word.
+                key = (word[:REMARK_LENGTH], amount)
+                if key in remark_keys:
+                    _add(index_of, key, index)
+        return index_of
+
+    def _find_reference(self, index_of, amount, day, references, used):
+        ''' Get closest unused row of amount having one of references as a word.
+        '''
+        best, best_distance = None, None
+        for reference in references:
+            for index in _indexes(index_of.get(reference)):
+                if index in used or self._amounts[index] != amount:
+                    continue
+                row_day = self._days[index]
+                distance = abs(row_day - day) if row_day else 0
+                if distance <= self.date_tolerance \
+                        and (best is None or distance < best_distance):
+                    best, best_distance = index, distance
+        return best
+
+    def _find_remark(self, index_of, starts, amount, day, remarks, used):
+        ''' Get closest unused row of amount containing one of remarks.
+
+        ``starts`` keeps position of first unused row per index key.
+        '''
+        best, best_distance = None, None
+        for remark in remarks:
+            key = (remark.split(' ', 1)[0], amount)
+            rows = _indexes(index_of.get(key))
+            # Skip used rows at the front so identical transfers do not scan them again.
+            start = starts.get(key, 0)
+            while start < len(rows) and rows[start] in used:
+                start += 1
+            starts[key] = start
+            for index in itertools.islice(rows, start, None):
+                if index in used or remark not in self._texts[index]:
+                    continue
+                row_day = self._days[index]
+                distance = abs(row_day - day) if row_day else 0
+                if distance <= self.date_tolerance \
+                        and (best is None or distance < best_distance):
+                    best, best_distance = index, distance
+                    if not distance:
+                        return best
+        return best
+
+    def _find(self, starts, amount, day, used):
+        ''' Get closest unused row of amount.
+
+        ``starts`` keeps position of first unused row per bucket.
+        '''
+        days = [day]
+        for distance in range(1, self.date_tolerance + 1):
+            days += [day - distance, day + distance]
+        days.append(0)
+        for row_day in days:
+            key = (amount, row_day)
+            bucket = _indexes(self._buckets.get(key))
+            # Skip used rows at the front so identical transfers do not scan them again.
+            start = starts.get(key, 0)
+            while start < len(bucket) and bucket[start] in used:
+                start += 1
+            starts[key] = start
+            for index in itertools.islice(bucket, start, None):
+                if index not in used:
+                    return index
+        return None
+
+    def reconcile(self, transfers):
+        ''' Match transfers. Return dict of matched, missing and unexpected.
+
+        Transfer is dict like the one given to :class:`BatchTransfer`. ``matched`` is list
+        of {'transfer', 'row', 'match'} where match tells how it was recognized, ``missing``
+        is transfer without row and ``unexpected`` is indexed row without transfer.
+        '''
+        transfers = list(transfers)
+        keys = []
+        days = {}
+        words = set()
+        remark_keys = set()
+        for transfer in transfers:
+            day = days.get(transfer['transaction_date'])
+            if day is None:
+                day = days[transfer['transaction_date']] = \
+                    to_date(transfer['transaction_date']).toordinal()
+            references = [normalize(transfer.get(key))
+                          for key in ('reference_id', 'transaction_id') if transfer.get(key)]
+            remarks = [normalize(transfer.get(key))[:REMARK_LENGTH]
+                       for key in ('remark1', 'remark2') if normalize(transfer.get(key))]
+            amount = to_minor(transfer['amount'])
+            words.update(references)
+            remark_keys.update((remark.split(' ', 1)[0], amount) for remark in remarks)
+            keys.append((amount, day, references, remarks))
+
+        found = [None] * len(transfers)
+        used = set()
+        starts = {}
+        index_of = self._index_words(words, remark_keys)
+        # Strong match first so a weak one can not take row of other transfer.
+        for match in (MATCH_REFERENCE, MATCH_REMARK, MATCH_AMOUNT):
+            for position, (amount, day, references, remarks) in enumerate(keys):
+                if found[position] is not None:
+                    continue
+                if match == MATCH_REFERENCE:
+                    index = self._find_reference(index_of, amount, day, references, used)
+                elif match == MATCH_REMARK:
+                    index = self._find_remark(index_of, starts, amount, day, remarks, used) \
+                        if remarks else None
+                else:
+                    index = self._find(starts, amount, day, used)
+                if index is not None:
+                    used.add(index)
+                    found[position] = (index, match)
+        return {
+            'matched': [
+                {'transfer': transfer, 'row': self.rows[item[0]], 'match': item[1]}
+                for transfer, item in zip(transfers, found) if item is not None
+            ],
+            'missing': [transfer for transfer, item in zip(transfers, found) if item is None],
+            'unexpected': [row for index, row in enumerate(self.rows) if index not in used],
+        }
+
+
+def reconcile(transfers, windows, date_tolerance=1):
+    ''' Match transfers against (start_date, end_date, response) of statement windows.
+    '''
+    reconciler = Reconciler(date_tolerance)
+    reconciler.add_windows(windows)
+    return reconciler.reconcile(transfers)
@@ -0,0 +1,362 @@
+import array
+import collections
+import datetime
+import decimal
+import itertools
+
+from cpybca.bca import row_date, to_date
+
+# Digit after decimal point of minor unit, IDR amount is given with 2 decimal.
+MINOR_DIGITS = 2
+_MINOR_FACTOR = 10 ** MINOR_DIGITS
+_EPOCH_ORDINAL = datetime.date(1970, 1, 1).toordinal()
+
+
+def to_minor(amount):
+    ''' Convert amount like '118849999.53', Decimal or int to integer minor unit.
+    '''
+    if isinstance(amount, str):
+        # Fast path of plain 'digits.dd' given by API.
+        negative = amount.startswith('-')
+        whole, _, fraction = amount[negative:].partition('.')
+        if whole.isdigit() and len(fraction) <= MINOR_DIGITS \
+                and (not fraction or fraction.isdigit()):
+            minor = int(whole) * _MINOR_FACTOR + int(fraction.ljust(MINOR_DIGITS, '0'))
+            return -minor if negative else minor
+    try:
+        value = decimal.Decimal(amount if isinstance(amount, (str, int, decimal.Decimal))
+                                else str(amount))
+        return int((value * _MINOR_FACTOR).to_integral_value(decimal.ROUND_HALF_UP))
+    except decimal.InvalidOperation:
+        raise ValueError('Invalid amount {!r}'.format(amount))
+
+
+def from_minor(minor):
+    ''' Convert integer minor unit back to Decimal.
+    '''
+    return decimal.Decimal(minor).scaleb(-MINOR_DIGITS)
+
+
+class _Amount():
+    ''' Amount kept as received, parsed to Decimal (or minor unit) when it is read.
+    '''
+
+    def __init__(self, slot, minor=False):
+        self.slot = slot
+        self.minor = minor
+
+    def __get__(self, record, owner):
+        if record is None:
+            return self
+        value = getattr(record, self.slot)
+        if value is None:
+            return None
+        return to_minor(value) if self.minor else decimal.Decimal(value)
+
+
+class Balance():
+    ''' One account of get balance response.
+    '''
+
+    __slots__ = ('account_number', 'currency', '_balance', '_available_balance',
+                 '_float_amount', '_hold_amount', '_plafon')
+
+    balance = _Amount('_balance')
+    available_balance = _Amount('_available_balance')
+    float_amount = _Amount('_float_amount')
+    hold_amount = _Amount('_hold_amount')
+    plafon = _Amount('_plafon')
+    balance_minor = _Amount('_balance', minor=True)
+    available_balance_minor = _Amount('_available_balance', minor=True)
+
+    def __init__(self, account_number, currency, balance, available_balance,
+                 float_amount=None, hold_amount=None, plafon=None):
+        self.account_number = account_number
+        self.currency = currency
+        self._balance = balance
+        self._available_balance = available_balance
+        self._float_amount = float_amount
+        self._hold_amount = hold_amount
+        self._plafon = plafon
+
+    @classmethod
+    def from_dict(cls, entry):
+        ''' Build from get balance response entry.
+        '''
+        return cls(entry.get('AccountNumber'), entry.get('Currency'), entry.get('Balance'),
+                   entry.get('AvailableBalance'), entry.get('FloatAmount'),
+                   entry.get('HoldAmount'), entry.get('Plafon'))
+
+    def to_dict(self):
+        ''' Get entry as in get balance response.
+        '''
+        return {
+            'AccountNumber': self.account_number,
+            'Currency': self.currency,
+            'Balance': self._balance,
+            'AvailableBalance': self._available_balance,
+            'FloatAmount': self._float_amount,
+            'HoldAmount': self._hold_amount,
+            'Plafon': self._plafon
+        }
+
+    def __repr__(self):
+        return 'Balance({!r}, {!r}, {!r})'.format(self.account_number, self.currency,
+                                                 self._balance)
+
+
+class Transaction():
+    ''' One row of get statement response. ``date`` is None for pending row.
+    '''
+
+    __slots__ = ('date', 'transaction_date', 'branch_code', 'transaction_type', '_amount',
+                 'transaction_name', 'trailer')
+
+    amount = _Amount('_amount')
+    amount_minor = _Amount('_amount', minor=True)
+
+    def __init__(self, transaction_date, branch_code, transaction_type, amount,
+                 transaction_name, trailer, date=None):
+        self.date = date
+        self.transaction_date = transaction_date
+        self.branch_code = branch_code
+        self.transaction_type = transaction_type
+        self._amount = amount
+        self.transaction_name = transaction_name
+        self.trailer = trailer
+
+    @classmethod
+    def from_dict(cls, row, start_date=None, end_date=None):
+        ''' Build from statement row, ``date`` is resolved when window is given.
+        '''
+        date = None
+        if end_date is not None:
+            date = row_date(row.get('TransactionDate'), to_date(start_date), to_date(end_date))
+        return cls(row.get('TransactionDate'), row.get('BranchCode'),
+                   row.get('TransactionType'), row.get('TransactionAmount'),
+                   row.get('TransactionName'), row.get('Trailer'), date)
+
+    @property
+    def signed_minor(self):
+        ''' Amount in minor unit, negative for debit.
+        '''
+        amount = self.amount_minor
+        return -amount if self.transaction_type == 'D' else amount
+
+    def to_dict(self):
+        ''' Get row as in get statement response.
+        '''
+        return {
+            'TransactionDate': self.transaction_date,
+            'BranchCode': self.branch_code,
+            'TransactionType': self.transaction_type,
+            'TransactionAmount': self._amount,
+            'TransactionName': self.transaction_name,
+            'Trailer': self.trailer
+        }
+
+    def __repr__(self):
+        return 'Transaction({!r}, {!r}, {!r})'.format(self.transaction_date,
+                                                     self.transaction_type, self._amount)
+
+
+def balances(response_data):
+    ''' Get list of Balance of get balance response.
+    '''
+    return [Balance.from_dict(entry)
+            for entry in response_data.get('AccountDetailDataSuccess') or []]
+
+
+def transactions(response_data):
+    ''' Get list of Transaction of get statement response.
+    '''
+    start_date, end_date = response_data.get('StartDate'), response_data.get('EndDate')
+    if not (start_date and end_date):
+        start_date = end_date = None
+    return [Transaction.from_dict(row, start_date, end_date)
+            for row in response_data.get('Data') or []]
+
+
+class StringDictionary():
+    ''' Dictionary encoding of string column, each distinct value is kept once.
+    '''
+
+    def __init__(self):
+        self.values = []
+        self.codes = {}
+
+    def encode(self, value):
+        ''' Get code of value, added when it is new.
+        '''
+        code = self.codes.get(value)
+        if code is None:
+            code = self.codes[value] = len(self.values)
+            self.values.append(value)
+        return code
+
+    def __len__(self):
+        return len(self.values)
+
+
+class StatementTable():
+    ''' Statement rows kept column by column in ``array``.
+
+    Date is kept as ordinal (0 for pending row), amount as signed 64 bit minor unit and
+    string column as code of :class:`StringDictionary`. Aggregation loops over arrays
+    without building object per row.
+    '''
+
+    STRING_COLUMNS = ('transaction_date', 'branch_code', 'transaction_type',
+                      'transaction_name', 'trailer')
+
+    def __init__(self, dictionaries=None):
+        self.dictionaries = dictionaries if dictionaries is not None else {
+            column: StringDictionary() for column in self.STRING_COLUMNS
+        }
+        self.day = array.array('l')
+        self.amount = array.array('q')
+        self.codes = {column: array.array('l') for column in self.STRING_COLUMNS}
+
+    @classmethod
+    def from_windows(cls, windows):
+        ''' Build from iterable of (start_date, end_date, response), see iter_statement_windows.
+        '''
+        table = cls()
+        for start_date, end_date, response_data in windows:
+            table.extend(response_data.get('Data') or [], start_date, end_date)
+        return table
+
+    @classmethod
+    def from_response(cls, response_data):
+        ''' Build from one get statement response.
+        '''
+        table = cls()
+        table.extend(response_data.get('Data') or [], response_data['StartDate'],
+                     response_data['EndDate'])
+        return table
+
+    def extend(self, rows, start_date, end_date):
+        ''' Append statement rows of window from start_date to end_date.
+        '''
+        start_date, end_date = to_date(start_date), to_date(end_date)
+        dates = {}
+        columns = [(self.codes[column].append, self.dictionaries[column].encode, key)
+                   for column, key in zip(self.STRING_COLUMNS, (
+                       'TransactionDate', 'BranchCode', 'TransactionType', 'TransactionName',
+                       'Trailer'))]
+        for row in rows:
+            transaction_date = row.get('TransactionDate')
+            day = dates.get(transaction_date)
+            if day is None:
+                date = row_date(transaction_date, start_date, end_date)
+                day = dates[transaction_date] = date.toordinal() if date is not None else 0
+            self.day.append(day)
+            self.amount.append(to_minor(row.get('TransactionAmount')))
+            for append, encode, key in columns:
+                append(encode(row.get(key)))
+
+    def __len__(self):
+        return len(self.amount)
+
+    def column(self, name):
+        ''' Get decoded string column as list.
+        '''
+        values = self.dictionaries[name].values
+        return [values[code] for code in self.codes[name]]
+
+    def row(self, index):
+        ''' Get one row as Transaction.
+        '''
+        strings = [self.dictionaries[column].values[self.codes[column][index]]
+                   for column in self.STRING_COLUMNS]
+        day = self.day[index]
+        return Transaction(strings[0], strings[1], strings[2], str(from_minor(self.amount[index])),
+                           strings[3], strings[4],
+                           datetime.date.fromordinal(day) if day else None)
+
+    def __iter__(self):
+        for index in range(len(self)):
+            yield self.row(index)
+
+    def _signs(self):
+        ''' Get +1/-1 per transaction type code, debit is negative.
+        '''
+        return [-1 if value == 'D' else 1
+                for value in self.dictionaries['transaction_type'].values]
+
+    def totals_by_type(self):
+        ''' Get {transaction_type: total minor unit}.
+        '''
+        types = self.dictionaries['transaction_type']
+        totals = [0] * len(types)
+        for code, amount in zip(self.codes['transaction_type'], self.amount):
+            totals[code] += amount
+        return dict(zip(types.values, totals))
+
+    def net_flow_by_day(self):
+        ''' Get OrderedDict {date: credit minus debit in minor unit} in date order.
+
+        Pending row is put under None, at the end.
+        '''
+        signs = self._signs()
+        flows = collections.defaultdict(int)
+        for day, code, amount in zip(self.day, self.codes['transaction_type'], self.amount):
+            flows[day] += signs[code] * amount
+        result = collections.OrderedDict(
+            (datetime.date.fromordinal(day), flows[day]) for day in sorted(flows) if day
+        )
+        if 0 in flows:
+            result[None] = flows[0]
+        return result
+
+    def filter(self, min_amount=None, max_amount=None, transaction_type=None):
+        ''' Get new table of rows with amount inside range (currency unit, both included).
+        '''
+        low = to_minor(min_amount) if min_amount is not None else None
+        high = to_minor(max_amount) if max_amount is not None else None
+        selector = (
+            (low is None or amount >= low) and (high is None or amount <= high)
+            for amount in self.amount
+        )
+        if transaction_type is not None:
+            type_code = self.dictionaries['transaction_type'].codes.get(transaction_type)
+            selector = [
+                selected and code == type_code
+                for selected, code in zip(selector, self.codes['transaction_type'])
+            ]
+        else:
+            selector = list(selector)
+        table = StatementTable(self.dictionaries)
+        table.day = array.array('l', itertools.compress(self.day, selector))
+        table.amount = array.array('q', itertools.compress(self.amount, selector))
+        table.codes = {
+            column: array.array('l', itertools.compress(codes, selector))
+            for column, codes in self.codes.items()
+        }
+        return table
+
+    def to_numpy(self):
+        ''' Get dict of NumPy array per column, sharing memory of numeric column.
+
+        'date' is datetime64[D] (NaT for pending row), 'amount' is int64 minor unit and string
+        column is object array. NumPy is needed, install it with ``pip install numpy``.
+        '''
+        import numpy
+
+        days = numpy.frombuffer(self.day, dtype=numpy.dtype('i%d' % self.day.itemsize)) \
+            if len(self.day) else numpy.zeros(0, dtype=numpy.int64)
+        dates = (days.astype(numpy.int64) - _EPOCH_ORDINAL).astype('datetime64[D]')
+        dates[days == 0] = numpy.datetime64('NaT')
+        columns = {
+            'date': dates,
+            'amount': numpy.frombuffer(self.amount, dtype=numpy.int64)
+            if len(self.amount) else numpy.zeros(0, dtype=numpy.int64),
+        }
+        for column in self.STRING_COLUMNS:
+            values = numpy.empty(len(self.dictionaries[column]), dtype=object)
+            values[:] = self.dictionaries[column].values
+            codes = numpy.frombuffer(self.codes[column], dtype=numpy.dtype(
+                'i%d' % self.codes[column].itemsize)) if len(self.codes[column]) \
+                else numpy.zeros(0, dtype=numpy.intp)
+            columns[column] = values[codes]
+        return columns
@@ -0,0 +1,130 @@
+import collections
+import threading
+import time
+
+from cpybca.bca import Bca
+from cpybca.pool import ConnectionPool
+
+
+class BcaRegistry():
+    ''' Bca client per tenant (corporate ID) sharing one connection pool and scheduler.
+
+    Credentials are registered once, client is created and signed in lazily on its first
+    call. Client unused for ``idle_timeout`` second, or least recently used one above
+    ``max_clients``, is evicted and created again when it is needed. Give ``token_store`` so
+    token of evicted client is not fetched again. Other keyword argument (balance_cache,
+    retry_policy, instrumentation, ...) is given to every client, so its object is shared.
+    '''
+
+    def __init__(self, host='https://sandbox.bca.co.id', pool=None, scheduler=None,
+                 token_store=None, max_clients=1000, idle_timeout=600, **options):
+        self.host = host
+        self.pool = pool if pool is not None else ConnectionPool()
+        self.scheduler = scheduler
+        self.token_store = token_store
+        self.max_clients = max_clients
+        self.idle_timeout = idle_timeout
+        self.options = options
+        self.created = 0
+        self.evicted = 0
+
+        self._lock = threading.Lock()
+        self._credentials = {}
+        # corporate_id: (client, last used time), least recently used first.
+        self._clients = collections.OrderedDict()
+
+    def register(self, corporate_id, api_key, api_secret, client_id, client_secret,
+                 host=None):
+        ''' Add or replace credentials of tenant.
+        '''
+        with self._lock:
+            self._credentials[corporate_id] = (api_key, api_secret, client_id, client_secret,
+                                               host or self.host)
+            self._clients.pop(corporate_id, None)
+
+    def unregister(self, corporate_id):
+        ''' Drop credentials and client of tenant.
+        '''
+        with self._lock:
+            self._credentials.pop(corporate_id, None)
+            self._clients.pop(corporate_id, None)
+
+    def __contains__(self, corporate_id):
+        return corporate_id in self._credentials
+
+    def __len__(self):
+        return len(self._credentials)
+
+    def _evict(self, now):
+        ''' Drop idle and least recently used client, lock must be held.
+        '''
+        while self._clients:
+            corporate_id, (_, last_used) = next(iter(self._clients.items()))
+            if len(self._clients) <= self.max_clients and now - last_used < self.idle_timeout:
+                break
+            del self._clients[corporate_id]
+            self.evicted += 1
+
+    def client(self, corporate_id):
+        ''' Get Bca client of tenant, raise KeyError when it is not registered.
+        '''
+        now = time.monotonic()
+        with self._lock:
+            item = self._clients.get(corporate_id)
+            if item is not None:
+                client = item[0]
+                self._clients.move_to_end(corporate_id)
+            else:
+                try:
+                    api_key, api_secret, client_id, client_secret, host = \
+                        self._credentials[corporate_id]
+                except KeyError:
+                    raise KeyError('Corporate ID {} is not registered'.format(corporate_id))
+                client = Bca(api_key, api_secret, host, pool=self.pool,
+                             token_store=self.token_store, scheduler=self.scheduler,
+                             **self.options)
+                # Token is fetched by first call, outside of registry lock.
+                client.sign_in(client_id, client_secret, lazy=True)
+                self.created += 1
+            self._clients[corporate_id] = (client, now)
+            self._evict(now)
+        return client
+
+    def stats(self):
+        ''' Get tenant and client counters.
+        '''
+        with self._lock:
+            return {'tenants': len(self._credentials), 'clients': len(self._clients),
+                    'created': self.created, 'evicted': self.evicted}
+
+    def get_balance(self, corporate_id, *args, **kwargs):
+        ''' See :meth:`Bca.get_balance`, sent with credentials of corporate_id.
+        '''
+        return self.client(corporate_id).get_balance(corporate_id, *args, **kwargs)
+
+    def get_balances(self, corporate_id, *args, **kwargs):
+        ''' See :meth:`Bca.get_balances`.
+        '''
+        return self.client(corporate_id).get_balances(corporate_id, *args, **kwargs)
+
+    def get_statement(self, corporate_id, *args, **kwargs):
+        ''' See :meth:`Bca.get_statement`.
+        '''
+        return self.client(corporate_id).get_statement(corporate_id, *args, **kwargs)
+
+    def iter_statement(self, corporate_id, *args, **kwargs):
+        ''' See :meth:`Bca.iter_statement`.
+        '''
+        return self.client(corporate_id).iter_statement(corporate_id, *args, **kwargs)
+
+    def transfer(self, corporate_id, *args, **kwargs):
+        ''' See :meth:`Bca.transfer`.
+        '''
+        return self.client(corporate_id).transfer(corporate_id, *args, **kwargs)
+
+    def close(self):
+        ''' Drop every client and close shared pool.
+        '''
+        with self._lock:
+            self._clients.clear()
+        self.pool.close()
@@ -0,0 +1,166 @@
+import collections
+import concurrent.futures
+import random
+import threading
+import time
+
+from cpybca.bca import ApiError, NetworkError
+
+CLOSED = 'closed'
+OPEN = 'open'
+HALF_OPEN = 'half_open'
+
+
+class CircuitOpenError(ValueError):
+    ''' Call refused because upstream is considered unhealthy.
+    '''
+
+
+class RetryPolicy():
+    ''' Retry failed call with exponential backoff and full jitter.
+
+    GET is retried on network error and on ``retry_statuses``. Transfer is retried when
+    it surely did not reach server (connection not opened, 429). Set ``retry_transfer``
+    to also resend it on ambiguous failure, only when bank rejects duplicate TransactionID.
+    Such rejection of a resend is raised as NetworkError, earlier attempt may be executed.
+    '''
+
+    def __init__(self, max_attempts=3, backoff=0.2, max_backoff=5,
+                 retry_statuses=(429, 500, 502, 503, 504), retry_transfer=False):
+        self.max_attempts = max_attempts
+        self.backoff = backoff
+        self.max_backoff = max_backoff
+        self.retry_statuses = retry_statuses
+        self.retry_transfer = retry_transfer
+
+    def delay(self, attempt):
+        ''' Get second to sleep before next attempt.
+        '''
+        return random.uniform(0, min(self.max_backoff, self.backoff * 2 ** attempt))
+
+    def should_retry(self, err, attempt, idempotent):
+        ''' Check failed attempt (counted from 0) can be tried again.
+        '''
+        if attempt + 1 >= self.max_attempts:
+            return False
+        if isinstance(err, NetworkError):
+            return idempotent or not err.sent or self.retry_transfer
+        if isinstance(err, ApiError) and err.status in self.retry_statuses:
+            return idempotent or err.status == 429 or self.retry_transfer
+        return False
+
+
+class CircuitBreaker():
+    ''' Fail fast after ``failure_threshold`` consecutive failure until ``reset_timeout`` pass.
+
+    Then one trial call is let through, its success closes the circuit again.
+    '''
+
+    def __init__(self, failure_threshold=5, reset_timeout=30):
+        self.failure_threshold = failure_threshold
+        self.reset_timeout = reset_timeout
+        self.state = CLOSED
+
+        self._failures = 0
+        self._opened_at = 0
+        self._trial = False
+        self._lock = threading.Lock()
+
+    def before_call(self):
+        ''' Raise CircuitOpenError when call must not be sent.
+        '''
+        with self._lock:
+            if self.state == CLOSED:
+                return
+            if self.state == OPEN and time.monotonic() - self._opened_at >= self.reset_timeout:
+                self.state = HALF_OPEN
+                self._trial = False
+            if self.state == HALF_OPEN and not self._trial:
+                self._trial = True
+                return
+        raise CircuitOpenError('Server is unavailable, try again later')
+
+    def record(self, err):
+        ''' Record outcome of call, err is None on success.
+
+        Error response below 500 is caused by request itself and counts as success.
+        '''
+        failed = err is not None and not (
+            isinstance(err, ApiError) and (err.status is None or err.status < 500)
+        )
+        with self._lock:
+            if not failed:
+                self.state = CLOSED
+                self._failures = 0
+                return
+            self._failures += 1
+            if self.state == HALF_OPEN or self._failures >= self.failure_threshold:
+                self.state = OPEN
+                self._opened_at = time.monotonic()
+
+
+class HedgePolicy():
+    ''' Send second identical request when first is slower than ``percentile`` of latency.
+
+    Hedging starts after ``min_samples`` successful call is recorded.
+    '''
+
+    def __init__(self, percentile=95, min_samples=20, window=200, max_workers=16):
+        self.percentile = percentile
+        self.min_samples = min_samples
+        self.max_workers = max_workers
+        self.hedged = 0
+        self.hedge_wins = 0
+
+        self._latencies = collections.deque(maxlen=window)
+        self._executor = None
+        self._lock = threading.Lock()
+
+    def threshold(self):
+        ''' Get latency after which request is hedged, None before enough samples.
+        '''
+        with self._lock:
+            if len(self._latencies) < self.min_samples:
+                return None
+            latencies = sorted(self._latencies)
+        index = min(len(latencies) - 1, int(len(latencies) * self.percentile / 100))
+        return latencies[index]
+
+    def _record(self, started):
+        with self._lock:
+            self._latencies.append(time.monotonic() - started)
+
+    def run(self, call):
+        ''' Run call, hedged by second one when it is slow. Return first success.
+        '''
+        threshold = self.threshold()
+        started = time.monotonic()
+        if threshold is None:
+            result = call()
+            self._record(started)
+            return result
+
+        with self._lock:
+            if self._executor is None:
+                self._executor = concurrent.futures.ThreadPoolExecutor(self.max_workers)
+        first = self._executor.submit(call)
+        done, _ = concurrent.futures.wait([first], timeout=threshold)
+        if done:
+            result = first.result()
+            self._record(started)
+            return result
+
+        self.hedged += 1
+        second = self._executor.submit(call)
+        error = None
+        for future in concurrent.futures.as_completed([first, second]):
+            try:
+                result = future.result()
+            except ValueError as err:
+                error = err
+                continue
+            self._record(started)
+            if future is second:
+                self.hedge_wins += 1
+            return result
+        raise error
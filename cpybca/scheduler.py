@@ -0,0 +1,169 @@
+import bisect
+import collections
+import contextlib
+import itertools
+import threading
+import time
+
+from cpybca.ratelimit import TokenBucket
+
+# Lower value goes first.
+DEFAULT_PRIORITIES = {
+    'oauth': 0,
+    'transfer': 0,
+    'balance': 1,
+    'statement': 2,
+}
+
+
+class _Waiter():
+    ''' Call waiting in scheduler queue, woken by its own condition.
+    '''
+
+    __slots__ = ('endpoint', 'condition', 'granted', 'timeout')
+
+    def __init__(self, endpoint, condition):
+        self.endpoint = endpoint
+        self.condition = condition
+        self.granted = False
+        # Second until rate may allow it, None while other waiter of endpoint is ahead.
+        self.timeout = None
+
+
+class Scheduler():
+    ''' Rate limiter and priority queue in front of API calls of every thread.
+
+    ``rates`` maps endpoint ('oauth', 'balance', 'statement', 'transfer') to call per
+    second, ``global_rate`` limits all endpoints together like the API key quota. Waiting
+    call with lower priority value always goes first once its rate allows it. Only the first
+    waiter of each endpoint sleeps with a timeout, the others sleep until they are granted.
+    '''
+
+    def __init__(self, rates=None, global_rate=None, priorities=None, burst=None):
+        self.priorities = dict(DEFAULT_PRIORITIES, **(priorities or {}))
+        self.buckets = {
+            endpoint: TokenBucket(rate, burst) for endpoint, rate in (rates or {}).items()
+        }
+        self.global_bucket = TokenBucket(global_rate, burst) if global_rate else None
+
+        self._lock = threading.Lock()
+        # Sorted (priority, sequence, waiter) and count of queued waiter per endpoint.
+        self._waiters = []
+        self._queued = collections.Counter()
+        self._sequence = itertools.count()
+        self._local = threading.local()
+        self._metrics = {}
+
+    def _wait_time(self, endpoint):
+        ''' Get second until endpoint and global rate allow one call.
+        '''
+        wait_time = 0
+        if endpoint in self.buckets:
+            wait_time = self.buckets[endpoint].wait_time()
+        if self.global_bucket is not None:
+            wait_time = max(wait_time, self.global_bucket.wait_time())
+        return wait_time
+
+    def _remove(self, index):
+        ''' Remove queued waiter at index. Lock must be held.
+        '''
+        waiter = self._waiters.pop(index)[2]
+        self._queued[waiter.endpoint] -= 1
+        if not self._queued[waiter.endpoint]:
+            del self._queued[waiter.endpoint]
+
+    def _dispatch(self):
+        ''' Grant waiters allowed by rate in priority order. Lock must be held.
+
+        First blocked waiter of each endpoint gets the timeout to wake at, walk stops once
+        every queued endpoint or global rate is blocked.
+        '''
+        blocked = set()
+        index = 0
+        while index < len(self._waiters):
+            waiter = self._waiters[index][2]
+            if waiter.endpoint in blocked:
+                waiter.timeout = None
+                index += 1
+                continue
+            wait_time = self._wait_time(waiter.endpoint)
+            if not wait_time:
+                if waiter.endpoint in self.buckets:
+                    self.buckets[waiter.endpoint].try_acquire()
+                if self.global_bucket is not None:
+                    self.global_bucket.try_acquire()
+                self._remove(index)
+                waiter.granted = True
+                waiter.condition.notify()
+                continue
+            if waiter.timeout is None:
+                # Sleeping without timeout, wake it to sleep until its rate allows.
+                waiter.condition.notify()
+            waiter.timeout = wait_time
+            blocked.add(waiter.endpoint)
+            if len(blocked) == len(self._queued) or \
+                    (self.global_bucket is not None and self.global_bucket.wait_time()):
+                break
+            index += 1
+
+    def _endpoint_metrics(self, endpoint):
+        metrics = self._metrics.get(endpoint)
+        if metrics is None:
+            metrics = self._metrics[endpoint] = {
+                'requests': 0, 'waiting': 0, 'wait_time_total': 0.0, 'wait_time_max': 0.0
+            }
+        return metrics
+
+    @contextlib.contextmanager
+    def priority(self, priority):
+        ''' Override priority of calls made by current thread inside the block.
+        '''
+        previous = getattr(self._local, 'priority', None)
+        self._local.priority = priority
+        try:
+            yield
+        finally:
+            self._local.priority = previous
+
+    def acquire(self, endpoint, priority=None):
+        ''' Wait until call to endpoint is allowed.
+        '''
+        if priority is None:
+            priority = getattr(self._local, 'priority', None)
+        if priority is None:
+            priority = self.priorities.get(endpoint, max(self.priorities.values()) + 1)
+        started = time.monotonic()
+        with self._lock:
+            metrics = self._endpoint_metrics(endpoint)
+            waiter = _Waiter(endpoint, threading.Condition(self._lock))
+            item = (priority, next(self._sequence), waiter)
+            bisect.insort(self._waiters, item)
+            self._queued[endpoint] += 1
+            metrics['waiting'] += 1
+            try:
+                self._dispatch()
+                while not waiter.granted:
+                    waiter.condition.wait(waiter.timeout)
+                    if not waiter.granted:
+                        self._dispatch()
+            finally:
+                metrics['waiting'] -= 1
+                if not waiter.granted:
+                    # Interrupted, let next waiter of endpoint take over the timeout.
+                    self._remove(bisect.bisect_left(self._waiters, item))
+                    self._dispatch()
+            wait_time = time.monotonic() - started
+            metrics['requests'] += 1
+            metrics['wait_time_total'] += wait_time
+            metrics['wait_time_max'] = max(metrics['wait_time_max'], wait_time)
+
+    def metrics(self):
+        ''' Get queue depth and wait time per endpoint.
+        '''
+        with self._lock:
+            return {
+                'queue_depth': len(self._waiters),
+                'endpoints': {
+                    endpoint: dict(metrics) for endpoint, metrics in self._metrics.items()
+                },
+            }
@@ -0,0 +1,85 @@
+import hashlib
+import hmac
+import string
+import time
+
+# SHA-256 of empty request body, used by every GET.
+EMPTY_BODY_HASH = hashlib.sha256(b'').hexdigest()
+
+
+class Signer():
+    ''' X-BCA-Signature signer with HMAC keyed once and copied per request.
+    '''
+
+    def __init__(self, api_secret):
+        self.api_secret = api_secret
+        self._hmac = hmac.new(api_secret.encode(), digestmod=hashlib.sha256)
+
+    @staticmethod
+    def body_hash(request_body):
+        ''' Get hex SHA-256 of request body without whitespace.
+        '''
+        if not request_body:
+            return EMPTY_BODY_HASH
+        return hashlib.sha256(request_body.replace(b' ', b'')).hexdigest()
+
+    def sign(self, relative_url, timestamp, http_method, access_token, body_hash=EMPTY_BODY_HASH):
+        ''' Generate signature of request.
+        '''
+        signature = self._hmac.copy()
+        signature.update((
+            http_method + ':' + relative_url + ':' + access_token + ':' + body_hash + ':' +
+            timestamp
+        ).encode())
+        return signature.hexdigest()
+
+
+class TimestampFormatter():
+    ''' Local time as 'yyyy-MM-ddTHH:mm:ss.SSS+HH:MM', date part formatted once per second.
+    '''
+
+    def __init__(self):
+        # (second, date part, offset part), replaced as a whole so threads see matching parts.
+        self._cache = (None, '', '')
+
+    @staticmethod
+    def _format_second(second):
+        local_time = time.localtime(second)
+        offset = local_time.tm_gmtoff // 60
+        return (
+            second,
+            time.strftime('%Y-%m-%dT%H:%M:%S.', local_time),
+            '{}{:02d}:{:02d}'.format('+' if offset >= 0 else '-', abs(offset) // 60,
+                                     abs(offset) % 60)
+        )
+
+    def __call__(self, now=None):
+        now = time.time() if now is None else now
+        second = int(now)
+        cache = self._cache
+        if cache[0] != second:
+            cache = self._cache = self._format_second(second)
+        return '{}{:03d}{}'.format(cache[1], int((now - second) * 1000), cache[2])
+
+
+# Shared formatter of X-BCA-Timestamp.
+format_timestamp = TimestampFormatter()
+
+
+class UrlTemplate():
+    ''' URL template like '/corporates/{corporate_id}' compiled once to %-format.
+    '''
+
+    def __init__(self, template):
+        self.template = template
+        pieces = []
+        for literal, field, _, _ in string.Formatter().parse(template):
+            pieces.append(literal.replace('%', '%%'))
+            if field is not None:
+                pieces.append('%(' + field + ')s')
+        self._format = ''.join(pieces)
+
+    def render(self, values):
+        ''' Fill template with dict of values.
+        '''
+        return self._format % values
@@ -0,0 +1,133 @@
+import codecs
+import json
+import zlib
+
+_WHITESPACE = ' \t\n\r'
+# Characters which may continue a number decoded at end of buffer.
+_NUMBER_CHARACTERS = '0123456789.eE+-'
+
+
+def iter_decompressed(response, chunk_size=65536):
+    ''' Yield body of http.client response by chunk, gunzipped on the fly when needed.
+
+    Decompressed chunk is at most ``chunk_size`` too, so highly compressed body does not
+    expand in memory at once.
+    '''
+    encoding = (response.getheader('Content-Encoding') or '').lower()
+    decompressor = zlib.decompressobj(16 + zlib.MAX_WBITS) if encoding in ('gzip', 'x-gzip') \
+        else None
+    while True:
+        chunk = response.read(chunk_size)
+        if not chunk:
+            break
+        if decompressor is None:
+            yield chunk
+            continue
+        while True:
+            data = decompressor.decompress(chunk, chunk_size)
+            if data:
+                yield data
+            chunk = decompressor.unconsumed_tail
+            # Full output may leave more pending even when all input is consumed.
+            if not chunk and len(data) < chunk_size:
+                break
+    if decompressor is not None:
+        rest = decompressor.flush()
+        if rest:
+            yield rest
+
+
+class _Reader():
+    ''' Text buffer over byte chunks, consumed part is dropped as parsing goes.
+    '''
+
+    def __init__(self, chunks):
+        self.chunks = iter(chunks)
+        self.decoder = codecs.getincrementaldecoder('UTF-8')()
+        self.buffer = ''
+        self.position = 0
+        self.eof = False
+
+    def fill(self):
+        ''' Read next chunk. Return False at end of data.
+        '''
+        if self.eof:
+            return False
+        if self.position > 65536 or self.position > len(self.buffer) // 2:
+            self.buffer = self.buffer[self.position:]
+            self.position = 0
+        for chunk in self.chunks:
+            text = self.decoder.decode(chunk)
+            if text:
+                self.buffer += text
+                return True
+        self.buffer += self.decoder.decode(b'', final=True)
+        self.eof = True
+        return False
+
+    def peek(self):
+        ''' Get next non whitespace character without consuming it, '' at end of data.
+        '''
+        while True:
+            while self.position < len(self.buffer) and self.buffer[self.position] in _WHITESPACE:
+                self.position += 1
+            if self.position < len(self.buffer):
+                return self.buffer[self.position]
+            if not self.fill():
+                return ''
+
+    def expect(self, characters):
+        ''' Consume one of characters. Return it.
+        '''
+        character = self.peek()
+        if not character or character not in characters:
+            raise ValueError('Invalid JSON: expecting {!r} at {!r}'.format(
+                characters, self.buffer[self.position:self.position + 20]))
+        self.position += 1
+        return character
+
+    def value(self, decoder=json.JSONDecoder()):
+        ''' Decode next JSON value, reading more data until it is complete.
+        '''
+        self.peek()
+        while True:
+            try:
+                value, end = decoder.raw_decode(self.buffer, self.position)
+            except ValueError:
+                if self.fill():
+                    continue
+                raise
+            # Number cut by chunk boundary (as '12', '12.' or '1e') may continue in next chunk.
+            if not self.eof and not self.buffer[end:].strip(_NUMBER_CHARACTERS) and self.fill():
+                continue
+            self.position = end
+            return value
+
+
+def iter_json_items(chunks, key='Data', fields=None):
+    ''' Yield items of array under key of top level JSON object, one by one.
+
+    Other top level value is put in ``fields`` dict when it is given.
+    '''
+    reader = _Reader(chunks)
+    reader.expect('{')
+    if reader.peek() == '}':
+        return
+    while True:
+        name = reader.value()
+        reader.expect(':')
+        if name == key and reader.peek() == '[':
+            reader.expect('[')
+            if reader.peek() == ']':
+                reader.position += 1
+            else:
+                while True:
+                    yield reader.value()
+                    if reader.expect(',]') == ']':
+                        break
+        else:
+            value = reader.value()
+            if fields is not None:
+                fields[name] = value
+        if reader.expect(',}') == '}':
+            return
@@ -0,0 +1,141 @@
+import datetime
+import json
+import sqlite3
+import threading
+import time
+
+from cpybca.bca import row_date, statement_windows, to_date
+
+SCHEMA = '''
+CREATE TABLE IF NOT EXISTS statement_day (
+    corporate_id TEXT NOT NULL,
+    account_number TEXT NOT NULL,
+    date TEXT NOT NULL,
+    closed INTEGER NOT NULL,
+    fetched_at REAL NOT NULL,
+    PRIMARY KEY (corporate_id, account_number, date)
+);
+CREATE TABLE IF NOT EXISTS statement_row (
+    corporate_id TEXT NOT NULL,
+    account_number TEXT NOT NULL,
+    date TEXT NOT NULL,
+    seq INTEGER NOT NULL,
+    row TEXT NOT NULL,
+    PRIMARY KEY (corporate_id, account_number, date, seq)
+);
+'''
+
+
+class StatementSync():
+    ''' Incremental statement download kept in local SQLite index.
+
+    Day before the last ``open_days`` day (today included) is fetched once. Recent day and
+    day having pending row stay open and are fetched again on every sync, replacing their
+    rows.
+    '''
+
+    def __init__(self, bca, path, open_days=1, parallelism=4):
+        self.bca = bca
+        self.path = path
+        self.open_days = open_days
+        self.parallelism = parallelism
+
+        self._lock = threading.Lock()
+        self._connection = sqlite3.connect(path, check_same_thread=False)
+        self._connection.executescript(SCHEMA)
+
+    def close(self):
+        ''' Close database connection.
+        '''
+        self._connection.close()
+
+    def _missing_ranges(self, corporate_id, account_number, start_date, end_date):
+        ''' Get list of (start_date, end_date) of contiguous day which is not closed yet.
+        '''
+        with self._lock:
+            closed = set(row[0] for row in self._connection.execute(
+                'SELECT date FROM statement_day WHERE corporate_id = ? AND account_number = ? '
+                'AND date BETWEEN ? AND ? AND closed = 1',
+                (corporate_id, account_number, start_date.isoformat(), end_date.isoformat())
+            ))
+        ranges = []
+        date = start_date
+        while date <= end_date:
+            if date.isoformat() not in closed:
+                if ranges and ranges[-1][1] == date - datetime.timedelta(1):
+                    ranges[-1][1] = date
+                else:
+                    ranges.append([date, date])
+            date += datetime.timedelta(1)
+        return ranges
+
+    def _store_window(self, corporate_id, account_number, start_date, end_date, rows, today):
+        ''' Replace rows of every day in window.
+        '''
+        days = {}
+        date = start_date
+        while date <= end_date:
+            days[date] = []
+            date += datetime.timedelta(1)
+        open_dates = set()
+        for row in rows:
+            date = row_date(row.get('TransactionDate'), start_date, end_date)
+            if date is None:
+                # Pending row is kept on last day, which stays open until it is posted.
+                date = end_date
+                open_dates.add(date)
+            days[date].append(row)
+
+        last_closed = today - datetime.timedelta(self.open_days)
+        fetched_at = time.time()
+        key = (corporate_id, account_number)
+        with self._lock, self._connection:
+            for date, day_rows in days.items():
+                closed = date <= last_closed and date not in open_dates
+                self._connection.execute(
+                    'DELETE FROM statement_row WHERE corporate_id = ? AND account_number = ? '
+                    'AND date = ?', key + (date.isoformat(),)
+                )
+                self._connection.executemany(
+                    'INSERT INTO statement_row VALUES (?, ?, ?, ?, ?)',
+                    [key + (date.isoformat(), seq, json.dumps(row, separators=(',', ':')))
+                     for seq, row in enumerate(day_rows)]
+                )
+                self._connection.execute(
+                    'INSERT OR REPLACE INTO statement_day VALUES (?, ?, ?, ?, ?)',
+                    key + (date.isoformat(), int(closed), fetched_at)
+                )
+        return len(rows)
+
+    def sync(self, corporate_id, account_number, start_date, end_date, today=None):
+        ''' Fetch only day which is missing or still open. Return sync summary.
+        '''
+        start_date, end_date = to_date(start_date), to_date(end_date)
+        today = to_date(today) if today else datetime.date.today()
+        summary = {'windows': 0, 'days': 0, 'rows': 0}
+        for range_start, range_end in self._missing_ranges(
+                corporate_id, account_number, start_date, end_date):
+            for window_start, window_end, response_data in self.bca.iter_statement_windows(
+                    corporate_id, account_number, range_start, range_end, self.parallelism):
+                window_start, window_end = to_date(window_start), to_date(window_end)
+                summary['windows'] += 1
+                summary['days'] += (window_end - window_start).days + 1
+                summary['rows'] += self._store_window(
+                    corporate_id, account_number, window_start, window_end,
+                    response_data.get('Data') or [], today
+                )
+        return summary
+
+    def rows(self, corporate_id, account_number, start_date, end_date):
+        ''' Yield stored statement row of date range in date order.
+        '''
+        # Read window by window so lock is not held while caller consumes rows.
+        for window_start, window_end in statement_windows(start_date, end_date):
+            with self._lock:
+                rows = self._connection.execute(
+                    'SELECT row FROM statement_row WHERE corporate_id = ? '
+                    'AND account_number = ? AND date BETWEEN ? AND ? ORDER BY date, seq',
+                    (corporate_id, account_number, window_start, window_end)
+                ).fetchall()
+            for row in rows:
+                yield json.loads(row[0])
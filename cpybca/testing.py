@@ -0,0 +1,261 @@
+import base64
+import datetime
+import gzip
+import http.server
+import json
+import random
+import socketserver
+import threading
+import time
+import urllib.parse
+import uuid
+
+from cpybca.signing import Signer
+
+
+def _error(code, english, indonesian=None):
+    return {
+        'ErrorCode': code,
+        'ErrorMessage': {'Indonesian': indonesian or english, 'English': english}
+    }
+
+
+class _Server(socketserver.ThreadingMixIn, http.server.HTTPServer):
+    daemon_threads = True
+    # Benchmarks open many connections at once.
+    request_queue_size = 1024
+
+
+class _Handler(http.server.BaseHTTPRequestHandler):
+    protocol_version = 'HTTP/1.1'
+    # Headers and body are written separately, do not let Nagle delay the body.
+    disable_nagle_algorithm = True
+
+    def log_message(self, *args):
+        pass
+
+    def _reply(self, status, content):
+        body = json.dumps(content).encode()
+        self.send_response(status)
+        self.send_header('Content-Type', 'application/json')
+        if 'gzip' in (self.headers.get('Accept-Encoding') or ''):
+            body = gzip.compress(body)
+            self.send_header('Content-Encoding', 'gzip')
+        self.send_header('Content-Length', str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def _handle(self, method):
+        fake = self.server.fake
+        body = self.rfile.read(int(self.headers.get('Content-Length') or 0))
+        status, content = fake.handle(method, self.path, self.headers, body)
+        self._reply(status, content)
+
+    def do_GET(self):
+        self._handle('GET')
+
+    def do_POST(self):
+        self._handle('POST')
+
+
+class FakeBcaServer():
+    ''' Local stand-in of BCA API server for offline test and benchmark.
+
+    It implements OAuth token, balance, statement and transfer endpoints and verifies
+    X-BCA-Signature. ``latency`` (second, or (min, max) tuple) delays every response,
+    ``error_rate`` is fraction of call answered with 500 and ``statement_rows`` is row
+    per day of statement. Response is gzipped when request accepts it.
+    '''
+
+    def __init__(self, api_key='api-key', api_secret='api-secret', client_id='client-id',
+                 client_secret='client-secret', latency=0, error_rate=0, statement_rows=6,
+                 expires_in=3600, seed=None):
+        self.api_key = api_key
+        self.api_secret = api_secret
+        self.client_id = client_id
+        self.client_secret = client_secret
+        self.latency = latency
+        self.error_rate = error_rate
+        self.statement_rows = statement_rows
+        self.expires_in = expires_in
+
+        self.tokens = {}
+        self.transfers = {}
+        self.calls = {}
+        self._signer = Signer(api_secret)
+        self._random = random.Random(seed)
+        self._lock = threading.Lock()
+        self._server = None
+        self._thread = None
+
+    @property
+    def url(self):
+        ''' Base url to give to Bca as host.
+        '''
+        return 'http://{}:{}'.format(*self._server.server_address[:2])
+
+    def start(self):
+        ''' Start serving in background thread. Return base url.
+        '''
+        self._server = _Server(('127.0.0.1', 0), _Handler)
+        self._server.fake = self
+        self._thread = threading.Thread(target=self._server.serve_forever, daemon=True)
+        self._thread.start()
+        return self.url
+
+    def stop(self):
+        ''' Stop serving.
+        '''
+        self._server.shutdown()
+        self._server.server_close()
+
+    def __enter__(self):
+        self.start()
+        return self
+
+    def __exit__(self, *args):
+        self.stop()
+
+    def _count(self, endpoint):
+        with self._lock:
+            self.calls[endpoint] = self.calls.get(endpoint, 0) + 1
+
+    def _delay(self):
+        latency = self.latency
+        if isinstance(latency, (tuple, list)):
+            with self._lock:
+                latency = self._random.uniform(*latency)
+        if latency:
+            time.sleep(latency)
+
+    def _fails(self):
+        if not self.error_rate:
+            return False
+        with self._lock:
+            return self._random.random() < self.error_rate
+
+    def handle(self, method, path, headers, body):
+        ''' Answer one request. Return (status, content).
+        '''
+        self._delay()
+        if self._fails():
+            return 500, _error('ESB-99-999', 'Internal server error')
+
+        relative_url, _, query = path.partition('?')
+        if method == 'POST' and relative_url == '/api/oauth/token':
+            self._count('oauth')
+            return self._token(headers)
+
+        error = self._verify(method, path, headers, body)
+        if error is not None:
+            return error
+        parts = relative_url.strip('/').split('/')
+        if method == 'GET' and len(parts) == 6 and parts[:3] == ['banking', 'v2', 'corporates']:
+            self._count('balance')
+            return self._balance(urllib.parse.unquote(parts[5]).split(','))
+        if method == 'GET' and len(parts) == 7 and parts[6] == 'statements':
+            self._count('statement')
+            return self._statement(urllib.parse.parse_qs(query))
+        if method == 'POST' and relative_url == '/banking/corporates/transfers':
+            self._count('transfer')
+            return self._transfer(json.loads(body.decode()))
+        return 404, _error('ESB-82-001', 'Service not found')
+
+    def _token(self, headers):
+        expected = 'Basic ' + base64.b64encode(
+            (self.client_id + ':' + self.client_secret).encode()
+        ).decode()
+        if headers.get('Authorization') != expected:
+            return 401, _error('ESB-14-001', 'Invalid client_id/client_secret/grant_type')
+        access_token = uuid.uuid4().hex
+        with self._lock:
+            self.tokens[access_token] = time.time() + self.expires_in
+        return 200, {
+            'access_token': access_token,
+            'token_type': 'bearer',
+            'expires_in': self.expires_in,
+            'scope': 'resource.WRITE resource.READ'
+        }
+
+    def _verify(self, method, path, headers, body):
+        ''' Check access token, API key and signature. Return error or None.
+        '''
+        access_token = (headers.get('Authorization') or '')[len('Bearer '):]
+        with self._lock:
+            expires_at = self.tokens.get(access_token)
+        if expires_at is None or expires_at < time.time():
+            return 401, _error('ESB-14-009', 'Unauthorized')
+        if headers.get('X-BCA-Key') != self.api_key:
+            return 401, _error('ESB-14-011', 'Invalid API Key')
+        signature = self._signer.sign(
+            path, headers.get('X-BCA-Timestamp') or '', method, access_token,
+            Signer.body_hash(body)
+        )
+        if headers.get('X-BCA-Signature') != signature:
+            return 400, _error('ESB-14-021', 'Invalid Signature')
+        return None
+
+    def _balance(self, account_numbers):
+        success, failed = [], []
+        for account_number in account_numbers:
+            if not account_number.isdigit():
+                failed.append({
+                    'English': 'Invalid AccountNumber',
+                    'Indonesian': 'AccountNumber Tidak Valid',
+                    'AccountNumber': account_number
+                })
+                continue
+            balance = '{:.2f}'.format(int(account_number) % 1000000007 / 100)
+            success.append({
+                'AccountNumber': account_number,
+                'Currency': 'IDR',
+                'Balance': balance,
+                'AvailableBalance': balance,
+                'FloatAmount': '0.00',
+                'HoldAmount': '0.00',
+                'Plafon': '0.00'
+            })
+        return 200, {'AccountDetailDataSuccess': success, 'AccountDetailDataFailed': failed}
+
+    def _statement(self, query):
+        try:
+            start_date = datetime.datetime.strptime(query['StartDate'][0], '%Y-%m-%d').date()
+            end_date = datetime.datetime.strptime(query['EndDate'][0], '%Y-%m-%d').date()
+        except (KeyError, ValueError):
+            return 400, _error('ESB-82-003', 'Invalid date format')
+        if end_date < start_date or (end_date - start_date).days > 30:
+            return 400, _error('ESB-82-019', 'Maximum date range is 31 days')
+        rows = []
+        date = start_date
+        while date <= end_date:
+            for number in range(self.statement_rows):
+                rows.append({
+                    'TransactionDate': date.strftime('%d/%m'),
+                    'BranchCode': '0000',
+                    'TransactionType': 'D' if number % 2 else 'C',
+                    'TransactionAmount': '{}.00'.format((number + 1) * 1000),
+                    'TransactionName': 'TRSF E-BANKING DB' if number % 2 else 'KR OTOMATIS',
+                    'Trailer': '{:04d}/FTSCY/WS95051 Transfer {}'.format(number, date.isoformat())
+                })
+            date += datetime.timedelta(1)
+        return 200, {
+            'StartDate': start_date.isoformat(),
+            'EndDate': end_date.isoformat(),
+            'Currency': 'IDR',
+            'StartBalance': '94163880.00',
+            'Data': rows
+        }
+
+    def _transfer(self, request_body):
+        key = (request_body.get('CorporateID'), request_body.get('TransactionID'),
+               request_body.get('TransactionDate', '')[:10])
+        with self._lock:
+            if key in self.transfers:
+                return 400, _error('ESB-82-011', 'Duplicate TransactionID')
+            self.transfers[key] = request_body
+        return 200, {
+            'TransactionID': request_body.get('TransactionID'),
+            'TransactionDate': request_body.get('TransactionDate'),
+            'ReferenceID': request_body.get('ReferenceID'),
+            'Status': 'Success'
+        }
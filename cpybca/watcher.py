@@ -0,0 +1,262 @@
+import asyncio
+import heapq
+import itertools
+import threading
+import time
+
+from cpybca.bca import MAX_BALANCE_ACCOUNTS
+from cpybca.ratelimit import TokenBucket
+
+# Balance entry field compared between polls.
+WATCHED_FIELDS = ('Balance', 'AvailableBalance')
+
+
+class BalanceChange():
+    ''' Balance of account differs from previous poll.
+
+    ``previous`` and ``current`` are balance entries, ``fields`` names changed fields.
+    '''
+
+    __slots__ = ('corporate_id', 'account_number', 'previous', 'current', 'fields',
+                 'detected_at')
+
+    def __init__(self, corporate_id, account_number, previous, current, fields):
+        self.corporate_id = corporate_id
+        self.account_number = account_number
+        self.previous = previous
+        self.current = current
+        self.fields = fields
+        self.detected_at = time.time()
+
+    def __repr__(self):
+        return 'BalanceChange({!r}, {!r}, {!r})'.format(self.account_number, self.fields,
+                                                        self.current)
+
+
+class _Account():
+    __slots__ = ('account_number', 'interval', 'due', 'entry', 'removed')
+
+    def __init__(self, account_number, interval, due):
+        self.account_number = account_number
+        self.interval = interval
+        self.due = due
+        self.entry = None
+        self.removed = False
+
+
+class _EventIterator():
+    ''' Async iterator of watcher changes, fed from poll thread.
+    '''
+
+    def __init__(self, watcher):
+        self.watcher = watcher
+        self.loop = asyncio.get_running_loop()
+        self.queue = asyncio.Queue()
+        watcher.add_callback(self._put)
+
+    def _put(self, change):
+        self.loop.call_soon_threadsafe(self.queue.put_nowait, change)
+
+    def __aiter__(self):
+        return self
+
+    async def __anext__(self):
+        return await self.queue.get()
+
+    def close(self):
+        self.watcher.remove_callback(self._put)
+
+
+class BalanceWatcher():
+    ''' Poll balance of many accounts of one corporate and report changes.
+
+    Accounts are polled 20 per call with at most ``budget`` call per second. Interval of
+    account is halved (down to ``min_interval``) when its balance changes and grows by
+    half (up to ``max_interval``) when it does not, so active account is polled more often.
+    When a call has room, account past half of its interval joins it early. First poll
+    of account only keeps its balance, later change is given to every callback.
+    '''
+
+    def __init__(self, bca, corporate_id, account_numbers=(), callback=None, budget=1,
+                 min_interval=5, max_interval=300):
+        self.bca = bca
+        self.corporate_id = corporate_id
+        self.budget = TokenBucket(budget)
+        self.min_interval = min_interval
+        self.max_interval = max_interval
+        self.callbacks = [callback] if callback is not None else []
+        self.calls = 0
+        self.changes = 0
+        self.errors = 0
+
+        self._lock = threading.Lock()
+        self._accounts = {}
+        self._queue = []
+        self._sequence = itertools.count()
+        self._stop = threading.Event()
+        self._thread = None
+        for account_number in account_numbers:
+            self.add(account_number)
+
+    def add(self, account_number, now=None):
+        ''' Start watching account, it is polled as soon as budget allows.
+        '''
+        now = time.monotonic() if now is None else now
+        with self._lock:
+            if account_number in self._accounts:
+                return
+            account = self._accounts[account_number] = _Account(account_number,
+                                                                 self.min_interval, now)
+            heapq.heappush(self._queue, (now, next(self._sequence), account))
+
+    def remove(self, account_number):
+        ''' Stop watching account.
+        '''
+        with self._lock:
+            account = self._accounts.pop(account_number, None)
+            if account is not None:
+                account.removed = True
+
+    def add_callback(self, callback):
+        ''' Give later BalanceChange to callback too.
+        '''
+        self.callbacks.append(callback)
+
+    def remove_callback(self, callback):
+        ''' Stop giving BalanceChange to callback.
+        '''
+        self.callbacks.remove(callback)
+
+    def _next_due(self):
+        ''' Get due time of next account, None when nothing is watched. Lock must be held.
+        '''
+        while self._queue and self._queue[0][2].removed:
+            heapq.heappop(self._queue)
+        return self._queue[0][0] if self._queue else None
+
+    def _take_batch(self, now):
+        ''' Pop up to 20 account, due one first, when at least one is due.
+        '''
+        with self._lock:
+            due = self._next_due()
+            if due is None or due > now:
+                return []
+            batch = []
+            while self._queue and len(batch) < MAX_BALANCE_ACCOUNTS:
+                due, _, account = self._queue[0]
+                # Account not due yet joins only past half of its interval.
+                if due > now and due - now > account.interval / 2:
+                    break
+                heapq.heappop(self._queue)
+                if not account.removed:
+                    batch.append(account)
+            return batch
+
+    def _schedule(self, account, now):
+        with self._lock:
+            if not account.removed:
+                account.due = now + account.interval
+                heapq.heappush(self._queue, (account.due, next(self._sequence), account))
+
+    def poll_once(self, now=None):
+        ''' Poll next batch when it is due. Return list of BalanceChange.
+        '''
+        now = time.monotonic() if now is None else now
+        batch = self._take_batch(now)
+        if not batch:
+            return []
+        self.calls += 1
+        changes = []
+        try:
+            response_data = self.bca.get_balance(
+                self.corporate_id, [account.account_number for account in batch]
+            )
+            entries = {entry.get('AccountNumber'): entry
+                       for entry in response_data.get('AccountDetailDataSuccess') or []}
+            for account in batch:
+                entry = entries.get(account.account_number)
+                if entry is None:
+                    # Rejected account, keep asking rarely.
+                    account.interval = self.max_interval
+                elif account.entry is None:
+                    account.entry = entry
+                else:
+                    fields = tuple(field for field in WATCHED_FIELDS
+                                   if entry.get(field) != account.entry.get(field))
+                    if fields:
+                        changes.append(BalanceChange(self.corporate_id,
+                                                     account.account_number,
+                                                     account.entry, entry, fields))
+                        account.interval = max(self.min_interval, account.interval / 2)
+                    else:
+                        account.interval = min(self.max_interval, account.interval * 1.5)
+                    account.entry = entry
+        except ValueError:
+            self.errors += 1
+            return []
+        except Exception:
+            # Unexpected error is raised, but accounts are not lost.
+            self.errors += 1
+            raise
+        finally:
+            # Batch was taken out of queue, it must go back whatever happened.
+            for account in batch:
+                self._schedule(account, now)
+
+        self.changes += len(changes)
+        for change in changes:
+            for callback in list(self.callbacks):
+                try:
+                    callback(change)
+                except Exception:
+                    pass
+        return changes
+
+    def run(self):
+        ''' Poll until :meth:`stop` is called.
+        '''
+        while not self._stop.is_set():
+            with self._lock:
+                due = self._next_due()
+            delay = self.max_interval if due is None else due - time.monotonic()
+            if delay > 0:
+                self._stop.wait(min(delay, 1))
+                continue
+            self.budget.acquire()
+            try:
+                self.poll_once()
+            except Exception:
+                # Counted as error by poll_once, keep watching.
+                pass
+
+    def start(self):
+        ''' Run poll loop in background thread.
+        '''
+        if self._thread is None or not self._thread.is_alive():
+            self._stop.clear()
+            self._thread = threading.Thread(target=self.run, daemon=True)
+            self._thread.start()
+
+    def stop(self):
+        ''' Stop poll loop and wait for its thread.
+        '''
+        self._stop.set()
+        if self._thread is not None:
+            self._thread.join()
+            self._thread = None
+
+    def events(self):
+        ''' Get async iterator of BalanceChange, poll loop is started in background thread.
+
+        Call ``close()`` of the iterator to stop receiving changes.
+        '''
+        iterator = _EventIterator(self)
+        self.start()
+        return iterator
+
+    def stats(self):
+        ''' Get count of watched accounts, calls, changes and errors.
+        '''
+        with self._lock:
+            return {'accounts': len(self._accounts), 'calls': self.calls,
+                    'changes': self.changes, 'errors': self.errors}
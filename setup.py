@@ -25,11 +25,15 @@ setup(
     long_description=README,
     packages=['cpybca'],
     zip_safe=False,
+    entry_points={
+        'console_scripts': ['cpybca = cpybca.cli:main'],
+    },
     platforms='any',
     extras_require={
         'dev': ['nose'],
+        'numpy': ['numpy'],
     },
-    python_requires='~=3.3',
+    python_requires='>=3.7',
     classifiers=[
         'Development Status :: 5 - Production/Stable',
         'Environment :: Plugins',
@@ -38,10 +42,8 @@ setup(
         'Operating System :: OS Independent',
         'Programming Language :: Python',
         'Programming Language :: Python :: 3',
-        'Programming Language :: Python :: 3.3',
-        'Programming Language :: Python :: 3.4',
-        'Programming Language :: Python :: 3.5',
-        'Programming Language :: Python :: 3.6',
+        'Programming Language :: Python :: 3.7',
+        'Programming Language :: Python :: 3.8',
         'Topic :: Office/Business :: Financial',
         'Topic :: Software Development :: Libraries :: Python Modules',
     ],
@@ -0,0 +1,63 @@
+import datetime
+import threading
+import urllib.parse
+
+from cpybca.bca import Bca, to_date
+
+
+class StubBca(Bca):
+    ''' Bca answering API call from memory instead of server, recording every call.
+
+    Balance of account in ``balances`` is answered, other account is failed. Call asking
+    account in ``errors`` raises its error. Statement has one row per day and a pending row
+    on ``today``. Call is recorded as account list, (start_date, end_date) or transfer body.
+    '''
+
+    def __init__(self, balances=None, today=None, **kwargs):
+        super().__init__('key', 'secret', 'http://localhost', **kwargs)
+        self.balances = {} if balances is None else balances
+        self.errors = {}
+        self.today = today
+        self.calls = []
+        self.lock = threading.Lock()
+
+    def _call(self, relative_url, http_method='GET', data=None, endpoint=None):
+        if endpoint == 'balance':
+            return self._balance(relative_url.rsplit('/', 1)[1].split('%2C'))
+        if endpoint == 'statement':
+            query = urllib.parse.parse_qs(urllib.parse.urlsplit(relative_url).query)
+            return self._statement(query['StartDate'][0], query['EndDate'][0])
+        with self.lock:
+            self.calls.append(data)
+        return {'Status': 'Success'}
+
+    def _balance(self, numbers):
+        with self.lock:
+            self.calls.append(numbers)
+            balances = dict(self.balances)
+        for number in numbers:
+            if number in self.errors:
+                raise self.errors[number]
+        return {
+            'AccountDetailDataSuccess': [
+                {'AccountNumber': number, 'Balance': balances[number],
+                 'AvailableBalance': balances[number]}
+                for number in numbers if number in balances
+            ],
+            'AccountDetailDataFailed': [
+                {'AccountNumber': number, 'English': 'Invalid AccountNumber'}
+                for number in numbers if number not in balances
+            ]
+        }
+
+    def _statement(self, start_date, end_date):
+        with self.lock:
+            self.calls.append((start_date, end_date))
+        rows = []
+        date = to_date(start_date)
+        while date <= to_date(end_date):
+            rows.append({'TransactionDate': date.strftime('%d/%m'), 'TransactionAmount': '1.00'})
+            if date == self.today:
+                rows.append({'TransactionDate': 'PEND', 'TransactionAmount': '2.00'})
+            date += datetime.timedelta(1)
+        return {'StartDate': start_date, 'EndDate': end_date, 'Data': rows}
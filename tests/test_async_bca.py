@@ -0,0 +1,116 @@
+import asyncio
+import http.server
+import json
+import socket
+import threading
+import unittest
+
+from cpybca.async_bca import AsyncBca
+from cpybca.bca import NetworkError
+
+
+class _Handler(http.server.BaseHTTPRequestHandler):
+    protocol_version = 'HTTP/1.1'
+
+    def log_message(self, *args):
+        pass
+
+    def _reply(self, status, content):
+        body = json.dumps(content).encode()
+        self.send_response(status)
+        self.send_header('Content-Type', 'application/json')
+        self.send_header('Content-Length', str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def do_POST(self):
+        self.rfile.read(int(self.headers['Content-Length']))
+        self._reply(200, {'access_token': 'token'})
+
+    def do_GET(self):
+        if 'X-BCA-Signature' not in self.headers:
+            self._reply(401, {'ErrorMessage': {'English': 'Unauthorized'}})
+            return
+        if '/statements' in self.path:
+            self._reply(200, {'Data': [{'Path': self.path}]})
+            return
+        self._reply(200, {'Path': self.path, 'Authorization': self.headers['Authorization']})
+
+
+class TestAsyncBca(unittest.TestCase):
+    ''' Test asyncio BCA API connector against local server.
+    '''
+
+    def setUp(self):
+        self.server = http.server.ThreadingHTTPServer(('127.0.0.1', 0), _Handler)
+        self.thread = threading.Thread(target=self.server.serve_forever, daemon=True)
+        self.thread.start()
+        self.bca = AsyncBca(
+            'key', 'secret', 'http://127.0.0.1:{}'.format(self.server.server_address[1]),
+            concurrency=4
+        )
+
+    def tearDown(self):
+        self.server.shutdown()
+        self.server.server_close()
+
+    def test_get_balance(self):
+        ''' Ensure signed concurrent requests share pooled connections.
+        '''
+        async def run():
+            assert await self.bca.sign_in('client', 'secret')
+            responses = await asyncio.gather(*[
+                self.bca.get_balance('BCAAPI2016', ['0201245680', '0063001004'])
+                for _ in range(20)
+            ])
+            await self.bca.close()
+            return responses
+
+        responses = asyncio.run(run())
+
+        assert len(responses) == 20
+        assert responses[0] == {
+            'Path': '/banking/v2/corporates/BCAAPI2016/accounts/0201245680%2C0063001004',
+            'Authorization': 'Bearer token',
+        }
+        stats = self.bca.pool.stats()
+        assert stats['requests'] == 21
+        assert stats['created'] <= 5
+
+    def test_get_balances(self):
+        ''' Ensure many accounts are asked 20 per call without chunk error.
+        '''
+        numbers = ['{:010d}'.format(number) for number in range(45)]
+        result = asyncio.run(self.bca.get_balances('BCAAPI2016', numbers, parallelism=2))
+
+        assert len(result['AccountDetailDataSuccess']) == 0
+        assert result['ChunkErrors'] == []
+        assert self.bca.pool.stats()['requests'] == 3
+
+    def test_iter_statement(self):
+        ''' Ensure statement of long range is fetched per window in date order.
+        '''
+        async def run():
+            return [row async for row in self.bca.iter_statement(
+                'BCAAPI2016', '0201245680', '2017-01-01', '2017-03-15', parallelism=2)]
+
+        rows = asyncio.run(run())
+        assert [row['Path'].split('?')[1] for row in rows] == [
+            'EndDate=2017-01-31&StartDate=2017-01-01',
+            'EndDate=2017-03-03&StartDate=2017-02-01',
+            'EndDate=2017-03-15&StartDate=2017-03-04',
+        ]
+
+    def test_network_error(self):
+        ''' Ensure unreachable server raises NetworkError and sync-only method is not exposed.
+        '''
+        assert not hasattr(self.bca, 'stream_statement')
+        assert not hasattr(self.bca, '_call')
+
+        with socket.socket() as closed:
+            closed.bind(('127.0.0.1', 0))
+            port = closed.getsockname()[1]
+        bca = AsyncBca('key', 'secret', 'http://127.0.0.1:{}'.format(port))
+        with self.assertRaises(NetworkError) as err:
+            asyncio.run(bca.get_balance('BCAAPI2016', '0201245680'))
+        assert not err.exception.sent
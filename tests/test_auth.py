@@ -0,0 +1,92 @@
+import os
+import tempfile
+import threading
+import time
+import unittest
+
+from cpybca.auth import FileTokenStore, TokenManager
+from cpybca.bca import ApiError, Bca
+
+
+class TestTokenManager(unittest.TestCase):
+    ''' Test access token lifecycle.
+    '''
+
+    def setUp(self):
+        self.fetched = []
+
+    def fetch(self, expires_in=3600):
+        time.sleep(0.05)
+        self.fetched.append(1)
+        return 'token{}'.format(len(self.fetched)), expires_in
+
+    def test_single_flight(self):
+        ''' Ensure concurrent callers trigger only one sign in.
+        '''
+        manager = TokenManager(self.fetch)
+        tokens = []
+        threads = [threading.Thread(target=lambda: tokens.append(manager.get()))
+                   for _ in range(10)]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+
+        assert tokens == ['token1'] * 10
+        assert len(self.fetched) == 1
+
+    def test_refresh_before_expiry(self):
+        ''' Ensure token inside refresh margin is replaced.
+        '''
+        manager = TokenManager(lambda: self.fetch(30), refresh_margin=60)
+        assert manager.get() == 'token1'
+        assert manager.get() == 'token2'
+
+    def test_invalidate(self):
+        ''' Ensure rejected token is not used again.
+        '''
+        manager = TokenManager(self.fetch)
+        manager.get()
+        manager.invalidate('token1')
+        assert manager.get() == 'token2'
+
+    def test_shared_store(self):
+        ''' Ensure managers sharing a store sign in once.
+        '''
+        with tempfile.TemporaryDirectory() as directory:
+            store = FileTokenStore(os.path.join(directory, 'tokens.json'))
+            first = TokenManager(self.fetch, store=store, key='client')
+            second = TokenManager(self.fetch, store=store, key='client')
+
+            assert first.get() == 'token1'
+            assert second.get() == 'token1'
+            assert len(self.fetched) == 1
+
+
+class _RejectingBca(Bca):
+
+    def __init__(self):
+        super().__init__('key', 'secret', 'http://localhost')
+        self.calls = []
+
+    def _open_url(self, url, data=None, headers=None, endpoint=None):
+        if url.endswith(self.oauth_path):
+            return {'access_token': 'token{}'.format(len(self.calls)), 'expires_in': 3600}
+        self.calls.append(headers['Authorization'])
+        if len(self.calls) == 1:
+            raise ApiError('Unauthorized', 401)
+        return {'Status': 'Success'}
+
+
+class TestBcaReauth(unittest.TestCase):
+    ''' Test Bca signs in again when token is rejected.
+    '''
+
+    def test_retry_after_unauthorized(self):
+        ''' Ensure call is retried once with new token.
+        '''
+        bca = _RejectingBca()
+        bca.sign_in('client', 'secret')
+
+        assert bca.get_balance('BCAAPI2016', '0201245680') == {'Status': 'Success'}
+        assert bca.calls == ['Bearer token0', 'Bearer token1']
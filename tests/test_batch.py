@@ -0,0 +1,118 @@
+import os
+import tempfile
+import threading
+import unittest
+
+from cpybca.batch import BatchTransfer, TransferJournal
+from cpybca.bca import ApiError, Bca, NetworkError
+
+
+class _TransferBca(Bca):
+    ''' Bca accepting transfer from memory, breaking on chosen TransactionID.
+    '''
+
+    def __init__(self, rejected=(), broken=(), unreachable=(), failing=(), duplicate=()):
+        super().__init__('key', 'secret', 'http://localhost')
+        self.rejected = rejected
+        self.broken = broken
+        self.unreachable = unreachable
+        self.failing = failing
+        self.duplicate = duplicate
+        self.sent = []
+        self.lock = threading.Lock()
+
+    def transfer(self, corporate_id, source_account_number, beneficiary_account_number,
+                 transaction_id, transaction_date, reference_id, amount, currency_code='IDR',
+                 remark1=None, remark2=None):
+        with self.lock:
+            self.sent.append(transaction_id)
+        if transaction_id in self.rejected:
+            raise ApiError('Insufficient fund', 400)
+        if transaction_id in self.broken:
+            raise NetworkError('Something wrong with network connection or server')
+        if transaction_id in self.unreachable:
+            raise NetworkError('Something wrong with network connection or server', sent=False)
+        if transaction_id in self.failing:
+            raise ApiError('Gateway Timeout', 504)
+        if transaction_id in self.duplicate:
+            raise ApiError('Duplicate TransactionID', 400, 'ESB-82-011')
+        return {'TransactionID': transaction_id, 'Status': 'Success'}
+
+
+def _transfers(count):
+    return [{
+        'corporate_id': 'BCAAPI2016',
+        'source_account_number': '0201245680',
+        'beneficiary_account_number': '0201245681',
+        'transaction_id': '{:08d}'.format(number),
+        'transaction_date': '2017-01-01',
+        'reference_id': '{}/DP/2017'.format(number),
+        'amount': '100.00',
+    } for number in range(count)]
+
+
+class TestBatchTransfer(unittest.TestCase):
+    ''' Test journaled batch transfer.
+    '''
+
+    def setUp(self):
+        self.directory = tempfile.TemporaryDirectory()
+        self.journal = TransferJournal(os.path.join(self.directory.name, 'journal.jsonl'))
+
+    def tearDown(self):
+        self.directory.cleanup()
+
+    def test_run(self):
+        ''' Ensure transfer outcome is reported by state.
+        '''
+        bca = _TransferBca(rejected=('00000001',), broken=('00000002',),
+                           unreachable=('00000003',), failing=('00000004',))
+        result = BatchTransfer(bca, self.journal, concurrency=3).run(_transfers(6))
+
+        assert len(result['confirmed']) == 2
+        assert [record['key'] for record in result['not_sent']] \
+            == ['BCAAPI2016|00000003|3/DP/2017']
+        assert [record['error'] for record in result['failed']] == ['Insufficient fund']
+        assert [record['key'] for record in result['unresolved']] \
+            == ['BCAAPI2016|00000002|2/DP/2017', 'BCAAPI2016|00000004|4/DP/2017']
+
+    def test_resume(self):
+        ''' Ensure restarted batch does not send concluded or unresolved transfer again.
+        '''
+        BatchTransfer(_TransferBca(broken=('00000002',)), self.journal).run(_transfers(3))
+        with open(self.journal.path, 'a') as journal_file:
+            journal_file.write('{"key": "cut')
+
+        bca = _TransferBca()
+        result = BatchTransfer(bca, self.journal).run(_transfers(5))
+        assert sorted(bca.sent) == ['00000003', '00000004']
+        assert len(result['skipped']) == 2
+        assert len(result['unresolved']) == 1
+
+        result = BatchTransfer(bca, self.journal, resend_unresolved=True).run(_transfers(5))
+        assert bca.sent[-1] == '00000002'
+        assert len(result['confirmed']) == 1
+        assert len(self.journal.load()) == 5
+
+    def test_resend_duplicate(self):
+        ''' Ensure unresolved transfer rejected as duplicate on resend is confirmed.
+        '''
+        BatchTransfer(_TransferBca(broken=('00000000',)), self.journal).run(_transfers(1))
+
+        bca = _TransferBca(duplicate=('00000000',))
+        result = BatchTransfer(bca, self.journal, resend_unresolved=True).run(_transfers(1))
+        assert [record['duplicate'] for record in result['confirmed']] == [True]
+        assert result['failed'] == []
+
+    def test_duplicate_in_batch(self):
+        ''' Ensure transfer listed twice in one batch is sent once and the copy is skipped.
+        '''
+        bca = _TransferBca()
+        transfers = _transfers(2)
+        result = BatchTransfer(bca, self.journal, concurrency=3).run(transfers + transfers[:1])
+
+        assert sorted(bca.sent) == ['00000000', '00000001']
+        assert len(result['confirmed']) == 2
+        assert result['skipped'] == [{'key': 'BCAAPI2016|00000000|0/DP/2017',
+                                      'error': 'Duplicate transfer in batch'}]
+        assert self.journal.load()['BCAAPI2016|00000000|0/DP/2017']['state'] == 'confirmed'
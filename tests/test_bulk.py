@@ -0,0 +1,68 @@
+import datetime
+import unittest
+
+from cpybca.bca import statement_windows
+from tests._stubs import StubBca
+
+
+class TestBulkBalance(unittest.TestCase):
+    ''' Test balance fan-out over 20 account limit.
+    '''
+
+    def test_get_balances(self):
+        ''' Ensure accounts are split by 20 and merged in order.
+        '''
+        numbers = ['{:010d}'.format(number) for number in range(45)] + ['x1']
+        bca = StubBca(dict.fromkeys(numbers[:-1], '1.00'))
+        response = bca.get_balances('BCAAPI2016', numbers, parallelism=3)
+
+        assert sorted(len(call) for call in bca.calls) == [6, 20, 20]
+        assert [entry['AccountNumber'] for entry in response['AccountDetailDataSuccess']] \
+            == numbers[:-1]
+        assert response['AccountDetailDataFailed'] == [
+            {'AccountNumber': 'x1', 'English': 'Invalid AccountNumber'}
+        ]
+        assert response['ChunkErrors'] == []
+
+    def test_get_balances_partial_failure(self):
+        ''' Ensure failed chunk is reported without losing other chunks.
+        '''
+        numbers = ['{:010d}'.format(number) for number in range(20)] + ['9000000000']
+        bca = StubBca(dict.fromkeys(numbers, '1.00'))
+        bca.errors['9000000000'] = ValueError('Something wrong with network connection or server')
+        response = bca.get_balances('BCAAPI2016', numbers)
+
+        assert len(response['AccountDetailDataSuccess']) == 20
+        assert response['ChunkErrors'] == [{
+            'AccountNumbers': ['9000000000'],
+            'ErrorMessage': 'Something wrong with network connection or server'
+        }]
+
+
+class TestStatementIterator(unittest.TestCase):
+    ''' Test statement of date range longer than 31 day.
+    '''
+
+    def test_statement_windows(self):
+        ''' Ensure range is split into windows of 31 day.
+        '''
+        assert statement_windows('2016-01-01', '2016-03-05') == [
+            ('2016-01-01', '2016-01-31'),
+            ('2016-02-01', '2016-03-02'),
+            ('2016-03-03', '2016-03-05'),
+        ]
+        with self.assertRaises(ValueError):
+            statement_windows('2016-02-01', '2016-01-01')
+
+    def test_iter_statement(self):
+        ''' Ensure rows are yielded in date order.
+        '''
+        bca = StubBca()
+        rows = list(bca.iter_statement('BCAAPI2016', '0201245680', '2016-01-01', '2016-12-31',
+                                       parallelism=3))
+
+        assert sorted(bca.calls) == statement_windows('2016-01-01', '2016-12-31')
+        assert [row['TransactionDate'] for row in rows] == [
+            (datetime.date(2016, 1, 1) + datetime.timedelta(day)).strftime('%d/%m')
+            for day in range(366)
+        ]
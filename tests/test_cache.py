@@ -0,0 +1,84 @@
+import time
+import unittest
+
+from cpybca.cache import BalanceCache
+from tests._stubs import StubBca
+
+
+class TestBalanceCache(unittest.TestCase):
+    ''' Test balance cache.
+    '''
+
+    def test_ttl_and_lru(self):
+        ''' Ensure entry expires and least recently used one is dropped.
+        '''
+        cache = BalanceCache(ttl=0.05, maxsize=2)
+        cache.set('C', '1', {'Balance': '1'})
+        cache.set('C', '2', {'Balance': '2'})
+        assert cache.get('C', '1') == {'Balance': '1'}
+        cache.set('C', '3', {'Balance': '3'})
+        assert cache.get('C', '2') is None
+        time.sleep(0.06)
+        assert cache.get('C', '1') is None
+        assert cache.stats() == {'hits': 1, 'misses': 2, 'size': 1}
+
+    def test_fetch_only_missing(self):
+        ''' Ensure multi account call fetches only account not cached.
+        '''
+        bca = StubBca({'1': '1', '2': '2'}, balance_cache=BalanceCache())
+        bca.get_balance('C', '1')
+        response = bca.get_balance('C', ['1', '2', 'bad'])
+
+        assert bca.calls[-1] == ['2', 'bad']
+        assert response == {
+            'AccountDetailDataSuccess': [
+                {'AccountNumber': '1', 'Balance': '1', 'AvailableBalance': '1'},
+                {'AccountNumber': '2', 'Balance': '2', 'AvailableBalance': '2'},
+            ],
+            'AccountDetailDataFailed': [
+                {'AccountNumber': 'bad', 'English': 'Invalid AccountNumber'}
+            ]
+        }
+        bca.get_balance('C', ['2', '1'])
+        assert len(bca.calls) == 2
+
+    def test_transfer_invalidates(self):
+        ''' Ensure transfer drops source and beneficiary balance.
+        '''
+        bca = StubBca(dict.fromkeys(['1', '2', '3'], '1.00'), balance_cache=BalanceCache())
+        bca.get_balance('C', ['1', '2', '3'])
+        bca.transfer('C', '1', '2', '00000001', '2017-01-01', '1/DP/2017', '1.00')
+        bca.get_balance('C', ['1', '2', '3'])
+
+        assert bca.calls[-1] == ['1', '2']
+
+    def test_transfer_during_fetch(self):
+        ''' Ensure balance fetched while transfer invalidates the account is not cached.
+        '''
+        bca = StubBca({'1': '1', '2': '2'}, balance_cache=BalanceCache())
+        balance = bca._balance
+
+        def invalidated_balance(numbers):
+            bca.balance_cache.invalidate('1')
+            return balance(numbers)
+
+        bca._balance = invalidated_balance
+        bca.get_balance('C', ['1', '2'])
+        bca._balance = balance
+        bca.get_balance('C', ['1', '2'])
+
+        assert bca.calls[-1] == ['1']
+
+    def test_invalidate_every_corporate(self):
+        ''' Ensure account is dropped from every corporate and index follows eviction.
+        '''
+        cache = BalanceCache(maxsize=3)
+        for corporate_id in ('A', 'B', 'C', 'D'):
+            cache.set(corporate_id, '1', {'Balance': corporate_id})
+        cache.set('A', '2', {'Balance': '2'})
+        cache.invalidate('1')
+
+        assert [cache.get(corporate_id, '1') for corporate_id in ('A', 'B', 'C', 'D')] \
+            == [None] * 4
+        assert cache.get('A', '2') == {'Balance': '2'}
+        assert cache._corporates == {'2': {'A'}}
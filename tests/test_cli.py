@@ -0,0 +1,129 @@
+import contextlib
+import csv
+import gzip
+import io
+import json
+import os
+import shutil
+import sys
+import tempfile
+import unittest
+
+from cpybca.bca import Bca, NetworkError
+from cpybca.cli import export_statement, main, output_path, read_accounts
+from cpybca.testing import FakeBcaServer
+
+
+class FailingBca(Bca):
+    ''' Bca losing connection when statement of fail_at window is asked.
+    '''
+
+    fail_at = None
+
+    def get_statement(self, corporate_id, account_number, start_date, end_date=None):
+        if start_date == self.fail_at:
+            raise NetworkError('Something wrong with network connection or server')
+        return super().get_statement(corporate_id, account_number, start_date, end_date)
+
+
+class TestCli(unittest.TestCase):
+    ''' Test of statement export against local stand-in server.
+    '''
+
+    def setUp(self):
+        self.server = FakeBcaServer(statement_rows=2)
+        self.server.start()
+        self.directory = tempfile.mkdtemp()
+        self.options = ['--host', self.server.url, '--api-key', self.server.api_key,
+                        '--api-secret', self.server.api_secret, '--client-id',
+                        self.server.client_id, '--client-secret', self.server.client_secret]
+
+    def tearDown(self):
+        self.server.stop()
+        shutil.rmtree(self.directory)
+
+    def run_main(self, *args):
+        with contextlib.redirect_stderr(io.StringIO()):
+            return main(self.options + list(args))
+
+    def test_ndjson(self):
+        ''' Ensure every account of accounts file is exported once as NDJSON.
+        '''
+        accounts_path = os.path.join(self.directory, 'accounts.txt')
+        with open(accounts_path, 'w') as accounts_file:
+            accounts_file.write('# payroll\n0201245680\n\n0201245681  # second\n')
+
+        assert self.run_main('statement', 'BCAAPI2016', '2016-09-01', '2016-10-15',
+                             '--accounts', accounts_path, '--output-dir', self.directory) == 0
+        for account_number in ('0201245680', '0201245681'):
+            path = output_path(self.directory, 'BCAAPI2016', account_number, '2016-09-01',
+                               '2016-10-15', 'ndjson', False)
+            with open(path) as output:
+                rows = [json.loads(line) for line in output]
+            assert len(rows) == 90
+            assert rows[0]['TransactionDate'] == '01/09'
+            assert not os.path.exists(path + '.progress')
+        assert self.server.calls['statement'] == 4
+
+        # Finished export is not fetched again.
+        assert self.run_main('statement', 'BCAAPI2016', '2016-09-01', '2016-10-15',
+                             '0201245680', '--output-dir', self.directory) == 0
+        assert self.server.calls['statement'] == 4
+
+    def test_csv_gzip(self):
+        ''' Ensure statement is exported as gzipped CSV with header.
+        '''
+        assert self.run_main('statement', 'BCAAPI2016', '2016-09-01', '2016-10-15',
+                             '0201245680', '--output-dir', self.directory, '--format', 'csv',
+                             '--gzip') == 0
+        path = output_path(self.directory, 'BCAAPI2016', '0201245680', '2016-09-01',
+                           '2016-10-15', 'csv', True)
+        with gzip.open(path, 'rt') as output:
+            rows = list(csv.DictReader(output))
+
+        assert len(rows) == 90
+        assert rows[-1]['Trailer'] == '0001/FTSCY/WS95051 Transfer 2016-10-15'
+
+    def test_resume(self):
+        ''' Ensure stopped export continues after its last complete window.
+        '''
+        bca = FailingBca(self.server.api_key, self.server.api_secret, self.server.url)
+        bca.sign_in(self.server.client_id, self.server.client_secret)
+        path = os.path.join(self.directory, 'statement.csv.gz')
+
+        bca.fail_at = '2016-10-02'
+        with self.assertRaises(NetworkError):
+            export_statement(bca, 'BCAAPI2016', '0201245680', '2016-09-01', '2016-11-30',
+                             path, 'csv', True, parallelism=1)
+        with open(path + '.progress') as progress_file:
+            assert json.load(progress_file)['end_date'] == '2016-10-01'
+        with open(path, 'ab') as output:
+            output.write(b'partial window')
+
+        bca.fail_at = None
+        assert export_statement(bca, 'BCAAPI2016', '0201245680', '2016-09-01', '2016-11-30',
+                                path, 'csv', True, parallelism=1) == 182
+        with gzip.open(path, 'rt') as output:
+            rows = list(csv.DictReader(output))
+
+        assert len(rows) == 182
+        assert [row['TransactionDate'] for row in rows[::2]][30:32] == ['01/10', '02/10']
+        assert self.server.calls['statement'] == 2 + 1
+
+    def test_missing_credentials(self):
+        ''' Ensure command exits with usage error when credentials are not given.
+        '''
+        with self.assertRaises(SystemExit), contextlib.redirect_stderr(io.StringIO()):
+            main(['statement', 'BCAAPI2016', '2016-09-01', '2016-09-30', '0201245680'])
+
+    def test_read_accounts_stdin(self):
+        ''' Ensure accounts read from stdin leave it open.
+        '''
+        stdin = sys.stdin
+        sys.stdin = io.StringIO('0201245680 # main\n\n0063001004\n')
+        try:
+            assert read_accounts('-') == ['0201245680', '0063001004']
+            assert not sys.stdin.closed
+            assert read_accounts('-') == []
+        finally:
+            sys.stdin = stdin
@@ -0,0 +1,94 @@
+import concurrent.futures
+import threading
+import time
+import unittest
+
+from cpybca.bca import ApiError
+from cpybca.coalesce import BalanceCoalescer
+from tests._stubs import StubBca
+
+
+class TestBalanceCoalescer(unittest.TestCase):
+    ''' Test coalescing of concurrent balance lookups.
+    '''
+
+    def setUp(self):
+        self.bca = StubBca({'{:010d}'.format(number): '{}.00'.format(number)
+                            for number in range(45)})
+        self.coalescer = BalanceCoalescer(self.bca, window=0.05)
+
+    def run_concurrently(self, account_numbers):
+        with concurrent.futures.ThreadPoolExecutor(len(account_numbers)) as executor:
+            return list(executor.map(
+                lambda number: self.coalescer.get_balance('BCAAPI2016', number),
+                account_numbers
+            ))
+
+    def test_batch(self):
+        ''' Ensure concurrent lookups become one call and each caller gets its own entry.
+        '''
+        numbers = ['{:010d}'.format(number) for number in range(10)] + ['bad']
+        results = self.run_concurrently(numbers * 3)
+
+        assert len(self.bca.calls) == 1
+        assert sorted(self.bca.calls[0]) == sorted(numbers)
+        for number, result in zip(numbers * 3, results):
+            if number == 'bad':
+                assert result['AccountDetailDataSuccess'] == []
+                assert result['AccountDetailDataFailed'][0]['AccountNumber'] == 'bad'
+            else:
+                assert result['AccountDetailDataSuccess'] == [{
+                    'AccountNumber': number, 'Balance': self.bca.balances[number],
+                    'AvailableBalance': self.bca.balances[number]
+                }]
+        assert self.coalescer.stats() == {'requests': 33, 'coalesced': 22, 'calls': 1}
+
+    def test_max_batch(self):
+        ''' Ensure batch holds at most 20 account.
+        '''
+        numbers = ['{:010d}'.format(number) for number in range(45)]
+        self.run_concurrently(numbers)
+
+        assert sorted(len(call) for call in self.bca.calls) == [5, 20, 20]
+
+    def test_list(self):
+        ''' Ensure list of account is answered in requested order.
+        '''
+        result = self.coalescer.get_balance('BCAAPI2016', ['0000000002', 'bad', '0000000001'])
+
+        assert [entry['AccountNumber'] for entry in result['AccountDetailDataSuccess']] \
+            == ['0000000002', '0000000001']
+        assert len(self.bca.calls) == 1
+
+    def test_error(self):
+        ''' Ensure failed call is raised to every waiting caller and is not kept.
+        '''
+        self.bca.errors['0000000001'] = ApiError('Internal server error', 500)
+        with self.assertRaises(ApiError):
+            self.run_concurrently(['0000000001', '0000000002'])
+        with self.assertRaises(ApiError):
+            self.coalescer.get_balance('BCAAPI2016', '0000000001')
+
+        assert len(self.bca.calls) == 2
+
+    def test_join_running_call(self):
+        ''' Ensure caller asking account while its call runs shares that call.
+        '''
+        balance = self.bca._balance
+        running = threading.Event()
+
+        def slow_balance(numbers):
+            running.set()
+            time.sleep(0.3)
+            return balance(numbers)
+
+        self.bca._balance = slow_balance
+        with concurrent.futures.ThreadPoolExecutor(1) as executor:
+            first = executor.submit(self.coalescer.get_balance, 'BCAAPI2016', '0000000001')
+            running.wait(5)
+            second = self.coalescer.get_balance('BCAAPI2016', '0000000001')
+
+        assert first.result() == second
+        assert self.coalescer.stats() == {'requests': 2, 'coalesced': 1, 'calls': 1}
+        self.coalescer.get_balance('BCAAPI2016', '0000000001')
+        assert len(self.bca.calls) == 2
@@ -0,0 +1,56 @@
+import unittest
+
+from cpybca.bca import ApiError, Bca
+from cpybca.testing import FakeBcaServer
+
+
+class TestFakeBcaServer(unittest.TestCase):
+    ''' Functional test of Bca against local stand-in server.
+    '''
+
+    def setUp(self):
+        self.server = FakeBcaServer(statement_rows=2)
+        self.server.start()
+        self.bca = Bca(self.server.api_key, self.server.api_secret, self.server.url)
+        self.bca.sign_in(self.server.client_id, self.server.client_secret)
+
+    def tearDown(self):
+        self.bca.pool.close()
+        self.server.stop()
+
+    def test_bad_client_secret(self):
+        ''' Ensure server rejects wrong client credentials.
+        '''
+        with self.assertRaises(ApiError) as err:
+            Bca(self.server.api_key, self.server.api_secret, self.server.url) \
+                .sign_in(self.server.client_id, 'asdd-asdsd')
+
+        assert err.exception.args[0] == 'Invalid client_id/client_secret/grant_type'
+        assert err.exception.status == 401
+
+    def test_bad_signature(self):
+        ''' Ensure server verifies signature.
+        '''
+        bca = Bca(self.server.api_key, 'wrong-secret', self.server.url)
+        bca.sign_in(self.server.client_id, self.server.client_secret)
+        with self.assertRaises(ApiError) as err:
+            bca.get_balance('BCAAPI2016', '0201245680')
+
+        assert err.exception.args[0] == 'Invalid Signature'
+
+    def test_api_methods(self):
+        ''' Ensure every API method passes signature verification.
+        '''
+        response = self.bca.get_balance('BCAAPI2016', ['0201245680', 'asdsadsad'])
+        assert [entry['AccountNumber'] for entry in response['AccountDetailDataSuccess']] \
+            == ['0201245680']
+        assert response['AccountDetailDataFailed'][0]['English'] == 'Invalid AccountNumber'
+
+        response = self.bca.get_statement('BCAAPI2016', '0201245680', '2016-09-01', '2016-09-02')
+        assert len(response['Data']) == 4
+
+        response = self.bca.transfer('BCAAPI2016', '0201245680', '0201245681', '00000021',
+                                     '2017-07-04', '43287/DP/2017', '100000.00',
+                                     remark1='Transfer Test')
+        assert response['Status'] == 'Success'
+        assert self.server.calls == {'oauth': 1, 'balance': 1, 'statement': 1, 'transfer': 1}
@@ -0,0 +1,48 @@
+import unittest
+
+from cpybca.bca import ApiError, Bca
+from cpybca.instrumentation import Instrumentation
+from cpybca.testing import FakeBcaServer
+
+
+class TestInstrumentation(unittest.TestCase):
+    ''' Test request hooks and metrics.
+    '''
+
+    def setUp(self):
+        self.server = FakeBcaServer()
+        self.server.start()
+        self.instrumentation = Instrumentation()
+        self.bca = Bca(self.server.api_key, self.server.api_secret, self.server.url,
+                       instrumentation=self.instrumentation)
+
+    def tearDown(self):
+        self.bca.pool.close()
+        self.server.stop()
+
+    def test_hooks_and_metrics(self):
+        ''' Ensure every call is reported with status, bytes and phase timing.
+        '''
+        started, finished = [], []
+        self.instrumentation.add_start_hook(started.append)
+        self.instrumentation.add_end_hook(finished.append)
+        self.bca.sign_in(self.server.client_id, self.server.client_secret)
+        self.bca.get_balance('BCAAPI2016', '0201245680')
+        self.server.error_rate = 1
+        with self.assertRaises(ApiError):
+            self.bca.get_balance('BCAAPI2016', '0201245680')
+
+        assert [event.endpoint for event in finished] == ['oauth', 'balance', 'balance']
+        assert [event.status for event in finished] == [200, 200, 500]
+        assert started == finished
+        assert set(finished[0].timings) == {
+            'pool_wait', 'connect', 'tls', 'ttfb', 'read', 'decode', 'total'
+        }
+        assert finished[1].timings['connect'] == 0
+        assert finished[1].response_bytes > 0
+
+        snapshot = self.instrumentation.metrics.snapshot()
+        assert snapshot['balance']['requests'] == {'200': 1, '500': 1}
+        text = self.instrumentation.metrics.prometheus()
+        assert 'cpybca_requests_total{endpoint="balance",status="500"} 1' in text
+        assert 'cpybca_request_duration_seconds_count{endpoint="balance"} 2' in text
@@ -0,0 +1,151 @@
+import http.client
+import http.server
+import json
+import socketserver
+import threading
+import unittest
+
+from cpybca.bca import Bca, NetworkError
+from cpybca.pool import ConnectionPool
+
+
+class _Server(socketserver.ThreadingMixIn, http.server.HTTPServer):
+    daemon_threads = True
+
+
+class _Handler(http.server.BaseHTTPRequestHandler):
+    protocol_version = 'HTTP/1.1'
+
+    def log_message(self, *args):
+        pass
+
+    def _drop(self):
+        ''' Close connection without answering once per /drop request after the first one.
+        '''
+        self.server.seen.append((self.command, self.path))
+        if self.path == '/drop' and self.server.drop:
+            self.server.drop -= 1
+            self.close_connection = True
+            return True
+        return False
+
+    def do_POST(self):
+        self.rfile.read(int(self.headers.get('Content-Length') or 0))
+        if not self._drop():
+            self._answer()
+
+    def do_GET(self):
+        if not self._drop():
+            self._answer()
+
+    def _answer(self):
+        if self.path == '/error':
+            body = json.dumps({'ErrorMessage': {'English': 'Bad request'}}).encode()
+            self.send_response(400)
+        else:
+            body = json.dumps({'Path': self.path,
+                               'Proxy': self.headers.get('Proxy-Authorization')}).encode()
+            self.send_response(200)
+        self.send_header('Content-Type', 'application/json')
+        self.send_header('Content-Length', str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+
+class TestConnectionPool(unittest.TestCase):
+    ''' Test keep-alive connection pool against local server.
+    '''
+
+    def setUp(self):
+        self.server = _Server(('127.0.0.1', 0), _Handler)
+        self.server.seen = []
+        self.server.drop = 0
+        self.thread = threading.Thread(target=self.server.serve_forever, daemon=True)
+        self.thread.start()
+        self.url = 'http://127.0.0.1:{}'.format(self.server.server_address[1])
+        self.pool = ConnectionPool(maxsize=2)
+
+    def tearDown(self):
+        self.pool.close()
+        self.server.shutdown()
+        self.server.server_close()
+
+    def test_connection_reused(self):
+        ''' Ensure sequential requests share one connection.
+        '''
+        for _ in range(3):
+            status, _, data = self.pool.request('GET', self.url + '/a?b=c')
+            assert status == 200
+            assert json.loads(data.decode()) == {'Path': '/a?b=c', 'Proxy': None}
+
+        stats = self.pool.stats()
+        assert stats['created'] == 1
+        assert stats['reused'] == 2
+        assert stats['idle'] == 1
+
+    def test_reconnect_after_server_drop(self):
+        ''' Ensure pool opens new connection when server closed the idle one.
+        '''
+        self.pool.request('GET', self.url + '/')
+        connection, _ = self.pool._hosts[('http', '127.0.0.1', self.server.server_address[1])] \
+            .idle[0]
+        connection.sock.shutdown(2)
+
+        status, _, _ = self.pool.request('GET', self.url + '/')
+        assert status == 200
+        assert self.pool.stats()['created'] == 2
+
+    def test_resend_get_after_drop(self):
+        ''' Ensure GET dropped on reused connection after it was written is sent again.
+        '''
+        self.pool.request('GET', self.url + '/drop')
+        self.server.drop = 1
+
+        status, _, _ = self.pool.request('GET', self.url + '/drop')
+        assert status == 200
+        assert self.server.seen == [('GET', '/drop')] * 3
+        stats = self.pool.stats()
+        assert stats['reconnected'] == 1
+        assert stats['created'] == 2
+
+    def test_post_not_resent_after_drop(self):
+        ''' Ensure POST dropped on reused connection is raised, server may have executed it.
+        '''
+        self.pool.request('POST', self.url + '/drop', body=b'{}')
+        self.server.drop = 1
+
+        with self.assertRaises(http.client.RemoteDisconnected):
+            self.pool.request('POST', self.url + '/drop', body=b'{}')
+        assert self.server.seen == [('POST', '/drop')] * 2
+        assert self.pool.stats()['reconnected'] == 0
+
+    def test_bca_post_dropped_is_sent(self):
+        ''' Ensure Bca reports dropped POST as network error which may have been sent.
+        '''
+        bca = Bca('key', 'secret', self.url, pool=self.pool)
+        self.pool.request('POST', self.url + '/drop', body=b'{}')
+        self.server.drop = 1
+
+        with self.assertRaises(NetworkError) as err:
+            bca._open_url(self.url + '/drop', b'{}', {})
+        assert err.exception.sent
+
+    def test_http_proxy(self):
+        ''' Ensure plain HTTP request is sent to proxy with absolute url and credentials.
+        '''
+        pool = ConnectionPool(proxies={'http': 'http://user:secret@' + self.url[7:]})
+        try:
+            _, _, data = pool.request('GET', 'http://bca.example/a')
+        finally:
+            pool.close()
+        assert json.loads(data.decode()) == {'Path': 'http://bca.example/a',
+                                             'Proxy': 'Basic dXNlcjpzZWNyZXQ='}
+
+    def test_bca_error_message(self):
+        ''' Ensure Bca still turns error response into ValueError.
+        '''
+        bca = Bca('key', 'secret', self.url, pool=self.pool)
+        with self.assertRaises(ValueError) as err:
+            bca._open_url(self.url + '/error')
+
+        assert err.exception.args[0] == 'Bad request'
@@ -0,0 +1,119 @@
+import unittest
+
+from cpybca.reconcile import MATCH_AMOUNT, MATCH_REFERENCE, MATCH_REMARK, Reconciler, reconcile
+
+
+def transfer(transaction_id, amount, transaction_date='2017-07-04', remark1=None):
+    return {
+        'corporate_id': 'BCAAPI2016', 'source_account_number': '0201245680',
+        'beneficiary_account_number': '0201245681', 'transaction_id': transaction_id,
+        'transaction_date': transaction_date, 'reference_id': transaction_id + '/DP/2017',
+        'amount': amount, 'remark1': remark1
+    }
+
+
+def row(date, amount, trailer, transaction_type='D'):
+    return {'TransactionDate': date, 'BranchCode': '0000', 'TransactionType': transaction_type,
+            'TransactionAmount': amount, 'TransactionName': 'TRSF E-BANKING DB',
+            'Trailer': trailer}
+
+
+class _CountingList(list):
+    ''' List counting read of single item.
+    '''
+
+    reads = 0
+
+    def __getitem__(self, index):
+        self.reads += 1
+        return super().__getitem__(index)
+
+
+class TestReconciler(unittest.TestCase):
+    ''' Test matching of transfers against statement rows.
+    '''
+
+    def test_reconcile(self):
+        ''' Ensure each transfer takes the row recognized the strongest way.
+        '''
+        rows = [
+            row('04/07', '50000.00', '0000/FTSCY/WS95051 50000.00 Gaji juli'),
+            row('05/07', '100000.00', '0000/FTSCY/WS95051 100000.00 00000002/DP/2017'),
+            row('04/07', '100000.00', '0000/FTSCY/WS95051 100000.00 00000001/DP/2017'),
+            row('PEND', '75000.00', '0000/FTSCY/WS95051 75000.00'),
+            row('04/07', '75000.00', '0000/FTSCY/WS95051 75000.00', 'C'),
+            row('10/07', '20000.00', '0000/FTSCY/WS95051 20000.00'),
+            row('01/07', '30000.00', '0000/FTSCY/WS95051 30000.00'),
+        ]
+        transfers = [
+            transfer('00000001', '100000.00'),
+            transfer('00000002', '100000'),
+            transfer('00000003', '50000.00', remark1='GAJI  Juli'),
+            transfer('00000004', '75000.00'),
+            transfer('00000005', '20000.00'),
+            transfer('00000006', '30000.00', '2017-07-02'),
+        ]
+        result = reconcile(transfers, [('2017-07-01', '2017-07-31', {'Data': rows})])
+
+        assert [(item['transfer']['transaction_id'], item['row']['TransactionAmount'],
+                 item['match']) for item in result['matched']] == [
+            ('00000001', '100000.00', MATCH_REFERENCE),
+            ('00000002', '100000.00', MATCH_REFERENCE),
+            ('00000003', '50000.00', MATCH_REMARK),
+            ('00000004', '75000.00', MATCH_AMOUNT),
+            ('00000006', '30000.00', MATCH_AMOUNT),
+        ]
+        assert result['matched'][0]['row'] is rows[2]
+        assert [item['transaction_id'] for item in result['missing']] == ['00000005']
+        assert result['unexpected'] == [rows[5]]
+
+    def test_weak_match_does_not_steal(self):
+        ''' Ensure amount-only transfer does not take row named by other transfer.
+        '''
+        reconciler = Reconciler(date_tolerance=0)
+        reconciler.add_response({'StartDate': '2017-07-01', 'EndDate': '2017-07-31', 'Data': [
+            row('04/07', '100000.00', 'TRSF 00000002/DP/2017'),
+            row('04/07', '100000.00', 'TRSF'),
+        ]})
+        transfers = [
+            {'transaction_id': 'X1', 'amount': '100000.00', 'transaction_date': '2017-07-04'},
+            transfer('00000002', '100000.00'),
+        ]
+        for _ in range(2):
+            result = reconciler.reconcile(transfers)
+            assert [item['row']['Trailer'] for item in result['matched']] \
+                == ['TRSF', 'TRSF 00000002/DP/2017']
+
+    def test_identical_transfers(self):
+        ''' Ensure many transfers of the same amount and date compare each row text once.
+        '''
+        count = 20000
+        rows = [row('25/07', '5000000.00', 'GAJI JULI') for _ in range(count)]
+        transfers = [transfer('{:08d}'.format(number), '5000000.00', '2017-07-25', 'gaji juli')
+                     for number in range(count + 1)]
+        reconciler = Reconciler()
+        reconciler.add_rows(rows, '2017-07-01', '2017-07-31')
+        reconciler._texts = _CountingList(reconciler._texts)
+
+        result = reconciler.reconcile(transfers)
+
+        assert reconciler._texts.reads == count
+        assert [item['match'] for item in result['matched']] == [MATCH_REMARK] * count
+        assert len(result['missing']) == 1
+        assert result['unexpected'] == []
+
+    def test_remark_not_in_rows(self):
+        ''' Ensure remark missing from every row does not scan rows of its amount.
+        '''
+        count = 5000
+        rows = [row('25/07', '5000000.00', 'TRSF E-BANKING') for _ in range(count)]
+        transfers = [transfer('{:08d}'.format(number), '5000000.00', '2017-07-25', 'gaji juli')
+                     for number in range(count)]
+        reconciler = Reconciler()
+        reconciler.add_rows(rows, '2017-07-01', '2017-07-31')
+        reconciler._texts = _CountingList(reconciler._texts)
+
+        result = reconciler.reconcile(transfers)
+
+        assert reconciler._texts.reads == 0
+        assert [item['match'] for item in result['matched']] == [MATCH_AMOUNT] * count
@@ -0,0 +1,133 @@
+import datetime
+import decimal
+import unittest
+
+from cpybca.records import Balance, StatementTable, balances, to_minor, transactions
+
+try:
+    import numpy
+except ImportError:
+    numpy = None
+
+RESPONSE = {
+    'StartDate': '2016-12-30',
+    'EndDate': '2017-01-02',
+    'Currency': 'IDR',
+    'StartBalance': '94163880.00',
+    'Data': [
+        {'TransactionDate': '30/12', 'BranchCode': '0000', 'TransactionType': 'C',
+         'TransactionAmount': '1000.00', 'TransactionName': 'KR OTOMATIS', 'Trailer': 'A'},
+        {'TransactionDate': '30/12', 'BranchCode': '0000', 'TransactionType': 'D',
+         'TransactionAmount': '250.50', 'TransactionName': 'TRSF E-BANKING DB',
+         'Trailer': 'B'},
+        {'TransactionDate': '02/01', 'BranchCode': '0998', 'TransactionType': 'D',
+         'TransactionAmount': '5000.00', 'TransactionName': 'TRSF E-BANKING DB',
+         'Trailer': 'C'},
+        {'TransactionDate': 'PEND', 'BranchCode': '0000', 'TransactionType': 'C',
+         'TransactionAmount': '75.25', 'TransactionName': 'KR OTOMATIS', 'Trailer': 'D'},
+    ]
+}
+
+
+class TestRecords(unittest.TestCase):
+    ''' Test typed balance and transaction records.
+    '''
+
+    def test_to_minor(self):
+        ''' Ensure amount string is converted to minor unit with half up rounding.
+        '''
+        assert to_minor('118849999.53') == 11884999953
+        assert to_minor('10.5') == 1050
+        assert to_minor('-0.05') == -5
+        assert to_minor('7') == 700
+        assert to_minor('1.005') == 101
+        assert to_minor(decimal.Decimal('2.50')) == 250
+        with self.assertRaises(ValueError):
+            to_minor('abc')
+
+    def test_balance(self):
+        ''' Ensure balance entry is parsed on access and converts back to dict.
+        '''
+        entries = balances({'AccountDetailDataSuccess': [{
+            'AccountNumber': '0201245680', 'Currency': 'IDR', 'Balance': '118849999.53',
+            'AvailableBalance': '118749999.53', 'FloatAmount': '0.00', 'HoldAmount': '0.00',
+            'Plafon': '0.00'
+        }]})
+        balance = entries[0]
+
+        assert balance.balance == decimal.Decimal('118849999.53')
+        assert balance.available_balance_minor == 11874999953
+        assert balance.to_dict()['Balance'] == '118849999.53'
+        assert not hasattr(balance, '__dict__')
+        assert Balance.from_dict(balance.to_dict()).to_dict() == balance.to_dict()
+
+    def test_transactions(self):
+        ''' Ensure row date is placed in window year and row converts back to dict.
+        '''
+        rows = transactions(RESPONSE)
+
+        assert [row.date for row in rows] == [
+            datetime.date(2016, 12, 30), datetime.date(2016, 12, 30),
+            datetime.date(2017, 1, 2), None
+        ]
+        assert rows[1].amount == decimal.Decimal('250.50')
+        assert rows[1].signed_minor == -25050
+        assert [row.to_dict() for row in rows] == RESPONSE['Data']
+
+
+class TestStatementTable(unittest.TestCase):
+    ''' Test columnar statement table.
+    '''
+
+    def setUp(self):
+        self.table = StatementTable.from_response(RESPONSE)
+
+    def test_columns(self):
+        ''' Ensure rows are kept column by column with text stored once.
+        '''
+        assert len(self.table) == 4
+        assert list(self.table.amount) == [100000, 25050, 500000, 7525]
+        assert self.table.column('transaction_type') == ['C', 'D', 'D', 'C']
+        assert self.table.dictionaries['transaction_name'].values \
+            == ['KR OTOMATIS', 'TRSF E-BANKING DB']
+        assert [row.to_dict() for row in self.table] == RESPONSE['Data']
+
+    def test_aggregation(self):
+        ''' Ensure total per type and net flow per day are computed from columns.
+        '''
+        assert self.table.totals_by_type() == {'C': 107525, 'D': 525050}
+        assert list(self.table.net_flow_by_day().items()) == [
+            (datetime.date(2016, 12, 30), 74950),
+            (datetime.date(2017, 1, 2), -500000),
+            (None, 7525),
+        ]
+
+    def test_filter(self):
+        ''' Ensure rows are filtered by amount range and transaction type.
+        '''
+        table = self.table.filter(min_amount='100', max_amount='1000.00')
+        assert table.column('trailer') == ['A', 'B']
+
+        table = self.table.filter(min_amount='100', transaction_type='D')
+        assert table.column('trailer') == ['B', 'C']
+        assert table.totals_by_type() == {'C': 0, 'D': 525050}
+
+    def test_from_windows(self):
+        ''' Ensure table is built from many windows sharing text dictionaries.
+        '''
+        table = StatementTable.from_windows([
+            ('2016-12-30', '2017-01-02', RESPONSE), ('2016-12-30', '2017-01-02', RESPONSE)
+        ])
+        assert len(table) == 8
+        assert len(table.dictionaries['branch_code']) == 2
+
+    @unittest.skipIf(numpy is None, 'NumPy is not installed')
+    def test_to_numpy(self):
+        ''' Ensure columns are exported as NumPy arrays with missing date as NaT.
+        '''
+        columns = self.table.to_numpy()
+
+        assert columns['amount'].tolist() == [100000, 25050, 500000, 7525]
+        assert str(columns['date'][2]) == '2017-01-02'
+        assert numpy.isnat(columns['date'][3])
+        assert columns['transaction_type'].tolist() == ['C', 'D', 'D', 'C']
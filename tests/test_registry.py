@@ -0,0 +1,78 @@
+import unittest
+
+from cpybca.bca import ApiError
+from cpybca.registry import BcaRegistry
+from cpybca.scheduler import Scheduler
+from cpybca.testing import FakeBcaServer
+
+
+class TestBcaRegistry(unittest.TestCase):
+    ''' Test of tenant routing against two local stand-in servers.
+    '''
+
+    def setUp(self):
+        self.first = FakeBcaServer(api_key='key-1', api_secret='secret-1', client_id='id-1')
+        self.second = FakeBcaServer(api_key='key-2', api_secret='secret-2', client_id='id-2')
+        self.first.start()
+        self.second.start()
+        self.registry = BcaRegistry(scheduler=Scheduler(), max_clients=2)
+        for corporate_id, server in (('CORP1', self.first), ('CORP2', self.second),
+                                     ('CORP3', self.first)):
+            self.registry.register(corporate_id, server.api_key, server.api_secret,
+                                   server.client_id, server.client_secret, host=server.url)
+
+    def tearDown(self):
+        self.registry.close()
+        self.first.stop()
+        self.second.stop()
+
+    def test_route(self):
+        ''' Ensure call is signed with credentials of its tenant on shared transport.
+        '''
+        self.registry.get_balance('CORP1', '0201245680')
+        self.registry.get_statement('CORP2', '0201245680', '2016-09-01', '2016-09-01')
+        response = self.registry.transfer('CORP2', '0201245680', '0201245681', '00000021',
+                                          '2017-07-04', '43287/DP/2017', '100000.00')
+
+        assert response['Status'] == 'Success'
+        assert self.first.calls == {'oauth': 1, 'balance': 1}
+        assert self.second.calls == {'oauth': 1, 'statement': 1, 'transfer': 1}
+        client = self.registry.client('CORP1')
+        assert client.pool is self.registry.pool
+        assert client.scheduler is self.registry.scheduler
+
+    def test_evict(self):
+        ''' Ensure least recently used client is dropped and signs in again when needed.
+        '''
+        self.registry.get_balance('CORP1', '0201245680')
+        self.registry.get_balance('CORP2', '0201245680')
+        self.registry.get_balance('CORP3', '0201245680')
+        self.registry.get_balance('CORP1', '0201245680')
+
+        assert self.registry.stats() == {'tenants': 3, 'clients': 2, 'created': 4,
+                                         'evicted': 2}
+        assert self.first.calls == {'oauth': 3, 'balance': 3}
+
+        self.registry.idle_timeout = 0
+        self.registry.client('CORP2')
+        assert self.registry.stats()['clients'] == 0
+
+    def test_unknown_tenant(self):
+        ''' Ensure call of unregistered tenant raises KeyError.
+        '''
+        with self.assertRaises(KeyError):
+            self.registry.get_balance('CORP9', '0201245680')
+
+        self.registry.unregister('CORP1')
+        assert 'CORP1' not in self.registry
+        assert len(self.registry) == 2
+
+    def test_replace_credentials(self):
+        ''' Ensure client is rebuilt when credentials of tenant change.
+        '''
+        self.registry.register('CORP1', 'key-1', 'wrong-secret', 'id-1', 'client-secret',
+                               host=self.first.url)
+        with self.assertRaises(ApiError) as err:
+            self.registry.get_balance('CORP1', '0201245680')
+
+        assert err.exception.args[0] == 'Invalid Signature'
@@ -0,0 +1,148 @@
+import time
+import unittest
+
+from cpybca.bca import ApiError, Bca, NetworkError
+from cpybca.resilience import CircuitBreaker, CircuitOpenError, HedgePolicy, RetryPolicy
+
+
+class _FlakyBca(Bca):
+    ''' Bca failing its first calls with given errors.
+    '''
+
+    def __init__(self, errors, **kwargs):
+        super().__init__('key', 'secret', 'http://localhost', **kwargs)
+        self.errors = list(errors)
+        self.calls = []
+
+    def _open_url(self, url, data=None, headers=None, endpoint=None):
+        self.calls.append((url, data))
+        if self.errors:
+            raise self.errors.pop(0)
+        return {'Status': 'Success'}
+
+
+def _transfer(bca):
+    return bca.transfer('BCAAPI2016', '0201245680', '0201245681', '00000001', '2017-01-01',
+                        '1/DP/2017', '1.00')
+
+
+class TestRetryPolicy(unittest.TestCase):
+    ''' Test retry of failed call.
+    '''
+
+    def setUp(self):
+        self.policy = RetryPolicy(max_attempts=3, backoff=0)
+
+    def test_get_retried(self):
+        ''' Ensure GET is retried on network and server error.
+        '''
+        bca = _FlakyBca([NetworkError('Down'), ApiError('Busy', 503)], retry_policy=self.policy)
+        assert bca.get_balance('BCAAPI2016', '0201245680') == {'Status': 'Success'}
+        assert len(bca.calls) == 3
+
+    def test_get_not_retried_on_client_error(self):
+        ''' Ensure error caused by request itself is raised at once.
+        '''
+        bca = _FlakyBca([ApiError('Invalid AccountNumber', 400)], retry_policy=self.policy)
+        with self.assertRaises(ApiError):
+            bca.get_balance('BCAAPI2016', 'asdsadsad')
+        assert len(bca.calls) == 1
+
+    def test_transfer_retry(self):
+        ''' Ensure transfer is retried only when it surely was not sent.
+        '''
+        bca = _FlakyBca([NetworkError('Down', sent=False)], retry_policy=self.policy)
+        assert _transfer(bca) == {'Status': 'Success'}
+        assert bca.calls[0][1] == bca.calls[1][1]
+
+        bca = _FlakyBca([NetworkError('Timeout')], retry_policy=self.policy)
+        with self.assertRaises(NetworkError):
+            _transfer(bca)
+
+        bca = _FlakyBca([NetworkError('Timeout')],
+                        retry_policy=RetryPolicy(backoff=0, retry_transfer=True))
+        assert _transfer(bca) == {'Status': 'Success'}
+
+    def test_transfer_resend_duplicate(self):
+        ''' Ensure duplicate TransactionID answer to a resend is not raised as rejection.
+        '''
+        duplicate = ApiError('Duplicate TransactionID', 400, 'ESB-82-011')
+        bca = _FlakyBca([ApiError('Gateway Timeout', 504), duplicate],
+                        retry_policy=RetryPolicy(backoff=0, retry_transfer=True))
+        with self.assertRaises(NetworkError) as err:
+            _transfer(bca)
+        assert err.exception.sent
+        assert err.exception.__cause__ is duplicate
+
+        bca = _FlakyBca([NetworkError('Down', sent=False), duplicate],
+                        retry_policy=self.policy)
+        with self.assertRaises(ApiError):
+            _transfer(bca)
+
+
+class TestCircuitBreaker(unittest.TestCase):
+    ''' Test circuit breaker states.
+    '''
+
+    def test_open_and_recover(self):
+        ''' Ensure circuit opens after failures and closes after successful trial.
+        '''
+        breaker = CircuitBreaker(failure_threshold=2, reset_timeout=0.05)
+        bca = _FlakyBca([NetworkError('Down')] * 2, circuit_breaker=breaker)
+        for _ in range(2):
+            with self.assertRaises(NetworkError):
+                bca.get_balance('BCAAPI2016', '0201245680')
+        with self.assertRaises(CircuitOpenError):
+            bca.get_balance('BCAAPI2016', '0201245680')
+        assert len(bca.calls) == 2
+
+        time.sleep(0.06)
+        assert bca.get_balance('BCAAPI2016', '0201245680') == {'Status': 'Success'}
+        assert breaker.state == 'closed'
+
+    def test_unexpected_error_recorded(self):
+        ''' Ensure failed trial of any kind opens circuit again instead of blocking it.
+        '''
+        breaker = CircuitBreaker(failure_threshold=1, reset_timeout=0.05)
+        bca = _FlakyBca([NetworkError('Down'), RuntimeError('Broken')], circuit_breaker=breaker)
+        with self.assertRaises(NetworkError):
+            bca.get_balance('BCAAPI2016', '0201245680')
+        time.sleep(0.06)
+        with self.assertRaises(RuntimeError):
+            bca.get_balance('BCAAPI2016', '0201245680')
+        assert breaker.state == 'open'
+
+        time.sleep(0.06)
+        assert bca.get_balance('BCAAPI2016', '0201245680') == {'Status': 'Success'}
+        assert breaker.state == 'closed'
+
+    def test_non_json_error_body(self):
+        ''' Ensure error page which is not JSON is raised as ApiError with its status.
+        '''
+        with self.assertRaises(ApiError) as err:
+            Bca._parse_response(502, b'<html>Bad Gateway</html>')
+        assert err.exception.status == 502
+        assert RetryPolicy().should_retry(err.exception, 0, True)
+
+
+class TestHedgePolicy(unittest.TestCase):
+    ''' Test hedged request.
+    '''
+
+    def test_hedge_slow_call(self):
+        ''' Ensure second request answers when first one is slow.
+        '''
+        policy = HedgePolicy(percentile=50, min_samples=3)
+        for _ in range(3):
+            policy.run(lambda: time.sleep(0.01))
+        delays = [0.5, 0]
+
+        def call():
+            time.sleep(delays.pop(0))
+            return 'done'
+
+        started = time.monotonic()
+        assert policy.run(call) == 'done'
+        assert time.monotonic() - started < 0.4
+        assert policy.hedged == 1
+        assert policy.hedge_wins == 1
@@ -0,0 +1,94 @@
+import threading
+import time
+import unittest
+
+from cpybca.bca import Bca
+from cpybca.scheduler import Scheduler
+
+
+class TestScheduler(unittest.TestCase):
+    ''' Test rate limit and priority of API calls.
+    '''
+
+    def test_rate_limit(self):
+        ''' Ensure endpoint rate is kept.
+        '''
+        scheduler = Scheduler(rates={'balance': 20}, burst=1)
+        started = time.monotonic()
+        for _ in range(5):
+            scheduler.acquire('balance')
+
+        assert time.monotonic() - started >= 0.19
+        metrics = scheduler.metrics()
+        assert metrics['queue_depth'] == 0
+        assert metrics['endpoints']['balance']['requests'] == 5
+
+    def test_priority(self):
+        ''' Ensure waiting transfer goes before waiting statement.
+        '''
+        scheduler = Scheduler(global_rate=20, burst=1)
+        scheduler.acquire('statement')
+        order = []
+        lock = threading.Lock()
+
+        def call(endpoint):
+            scheduler.acquire(endpoint)
+            with lock:
+                order.append(endpoint)
+
+        threads = [threading.Thread(target=call, args=('statement',)) for _ in range(3)]
+        for thread in threads:
+            thread.start()
+        while scheduler.metrics()['queue_depth'] < 3:
+            time.sleep(0.001)
+        threads.append(threading.Thread(target=call, args=('transfer',)))
+        threads[-1].start()
+        for thread in threads:
+            thread.join()
+
+        assert order.index('transfer') <= 1
+
+    def test_many_waiters_wake_once(self):
+        ''' Ensure queued waiters of one endpoint sleep until granted instead of polling.
+        '''
+        scheduler = Scheduler(rates={'balance': 200}, burst=1)
+        scheduler.acquire('balance')
+        dispatches = []
+        dispatch = scheduler._dispatch
+
+        def counted_dispatch():
+            dispatches.append(1)
+            dispatch()
+
+        scheduler._dispatch = counted_dispatch
+        threads = [threading.Thread(target=scheduler.acquire, args=('balance',))
+                   for _ in range(40)]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+
+        assert scheduler.metrics()['endpoints']['balance']['requests'] == 41
+        # Waiter dispatches when it enters, becomes first and its timeout passes.
+        assert len(dispatches) <= 40 * 5
+
+    def test_slot_taken_before_signing(self):
+        ''' Ensure request is signed after scheduler slot is granted.
+        '''
+        events = []
+
+        class _Scheduler():
+            def acquire(self, endpoint):
+                events.append(('acquire', endpoint))
+
+        class _SchedulerBca(Bca):
+            def _prepare_request(self, *args, **kwargs):
+                events.append(('sign',))
+                return super()._prepare_request(*args, **kwargs)
+
+            def _open_url(self, url, data=None, headers=None, endpoint=None):
+                return {'Status': 'Success'}
+
+        bca = _SchedulerBca('key', 'secret', 'http://localhost', scheduler=_Scheduler())
+        bca.get_balance('BCAAPI2016', '0201245680')
+        assert events == [('acquire', 'balance'), ('sign',)]
@@ -0,0 +1,72 @@
+import datetime
+import hashlib
+import hmac
+import time
+import unittest
+
+from cpybca.bca import Bca
+from cpybca.signing import TimestampFormatter, UrlTemplate
+
+
+def _legacy_signature(api_secret, relative_url, timestamp, http_method, access_token,
+                      request_body):
+    signature = hmac.new(api_secret.encode(), digestmod=hashlib.sha256)
+    string_to_sign = http_method + ':' + relative_url + ':' + access_token + \
+        ':' + hashlib.sha256(request_body.replace(b' ', b'')).hexdigest() + ':' + timestamp
+    signature.update(string_to_sign.encode())
+    return signature.hexdigest()
+
+
+class TestSigning(unittest.TestCase):
+    ''' Test prepared request signing.
+    '''
+
+    def setUp(self):
+        self.bca = Bca('key', 'secret', 'http://localhost')
+        self.bca.access_token = 'token'
+
+    def test_signature_identical(self):
+        ''' Ensure signature is the same as before preparing signer.
+        '''
+        timestamp = '2017-07-04T10:20:30.123+07:00'
+        body = Bca._transfer_body('BCAAPI2016', '0201245680', '0201245681', '00000001',
+                                  '2017-07-04', '1/DP/2017', '100.00', remark1='Transfer Test')
+        for http_method, relative_url, request_body in (
+                ('GET', self.bca._balance_url('BCAAPI2016', ['0201245680', '0063001004']), b''),
+                ('POST', self.bca.transfer_path, body)):
+            assert self.bca._generate_signature(relative_url, timestamp, http_method,
+                                                request_body) \
+                == _legacy_signature('secret', relative_url, timestamp, http_method, 'token',
+                                     request_body)
+
+        self.bca.api_secret = 'other'
+        assert self.bca._generate_signature('/', timestamp) \
+            == _legacy_signature('other', '/', timestamp, 'GET', 'token', b'')
+
+    def test_prepared_headers(self):
+        ''' Ensure headers carry matching timestamp and signature.
+        '''
+        url, headers = self.bca._prepare_request('/banking/corporates/transfers', 'POST', b'{}')
+
+        assert url == 'http://localhost/banking/corporates/transfers'
+        assert headers['Authorization'] == 'Bearer token'
+        assert headers['X-BCA-Key'] == 'key'
+        assert headers['X-BCA-Signature'] == _legacy_signature(
+            'secret', '/banking/corporates/transfers', headers['X-BCA-Timestamp'], 'POST',
+            'token', b'{}'
+        )
+
+    def test_timestamp(self):
+        ''' Ensure timestamp has the same format as isoformat cut to millisecond.
+        '''
+        now = time.time()
+        expected = datetime.datetime.fromtimestamp(now, datetime.timezone.utc) \
+            .astimezone().isoformat(timespec='microseconds')
+        assert TimestampFormatter()(now) == expected[:23] + expected[26:]
+
+    def test_url_template(self):
+        ''' Ensure template is filled like str.format.
+        '''
+        template = UrlTemplate('/accounts/{account_number}/statements?EndDate={end_date}')
+        assert template.render({'account_number': '1', 'end_date': '2016-09-01'}) \
+            == '/accounts/1/statements?EndDate=2016-09-01'
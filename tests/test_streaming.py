@@ -0,0 +1,175 @@
+import io
+import json
+import unittest
+import zlib
+
+from cpybca.bca import ApiError, Bca
+from cpybca.instrumentation import Instrumentation
+from cpybca.resilience import CircuitBreaker
+from cpybca.streaming import iter_decompressed, iter_json_items
+from cpybca.testing import FakeBcaServer
+
+
+def split(data, size):
+    return [data[index:index + size] for index in range(0, len(data), size)]
+
+
+class TestIterJsonItems(unittest.TestCase):
+    ''' Test of incremental JSON array parser.
+    '''
+
+    def test_any_chunk_size(self):
+        ''' Ensure rows and other values are decoded whatever chunk boundary is.
+        '''
+        content = {
+            'StartDate': '2016-09-01',
+            'StartBalance': 94163880,
+            'Data': [{'TransactionAmount': '1000.00', 'Trailer': 'Transfer é [1], {2}'},
+                     {'TransactionAmount': 2000.5, 'Trailer': None}],
+            'Currency': 'IDR'
+        }
+        data = json.dumps(content, indent=1).encode()
+        for size in (1, 2, 3, 7, len(data)):
+            fields = {}
+            rows = list(iter_json_items(split(data, size), 'Data', fields))
+
+            assert rows == content['Data']
+            assert fields == {'StartDate': '2016-09-01', 'StartBalance': 94163880,
+                              'Currency': 'IDR'}
+
+    def test_number_at_every_cut(self):
+        ''' Ensure top level number split anywhere by chunk boundary is decoded whole.
+        '''
+        data = b'{"Data": [{"a": 1}], "StartBalance": 94163880.00, "Rate": -1.5e+3, "N": 7}'
+        for cut in range(1, len(data)):
+            fields = {}
+            rows = list(iter_json_items([data[:cut], data[cut:]], 'Data', fields))
+
+            assert rows == [{'a': 1}]
+            assert fields == {'StartBalance': 94163880.0, 'Rate': -1500.0, 'N': 7}
+
+    def test_empty(self):
+        ''' Ensure missing or empty array yields nothing.
+        '''
+        assert list(iter_json_items([b'{"Data": []}'])) == []
+        assert list(iter_json_items([b'{}'])) == []
+
+    def test_invalid(self):
+        ''' Ensure malformed or cut JSON raises ValueError.
+        '''
+        with self.assertRaises(ValueError):
+            list(iter_json_items([b'{"Data": [{"a": 1} {"b": 2}]}']))
+        with self.assertRaises(ValueError):
+            list(iter_json_items([b'{"Data": [{"a": 1}, {"b"']))
+
+
+class _GzipResponse():
+    ''' Response-like reader of gzip body.
+    '''
+
+    def __init__(self, data):
+        compressor = zlib.compressobj(wbits=16 + zlib.MAX_WBITS)
+        self.body = io.BytesIO(compressor.compress(data) + compressor.flush())
+
+    def getheader(self, name):
+        return 'gzip' if name == 'Content-Encoding' else None
+
+    def read(self, size):
+        return self.body.read(size)
+
+
+class TestIterDecompressed(unittest.TestCase):
+    ''' Test of gunzip by chunk.
+    '''
+
+    def test_chunk_bounded(self):
+        ''' Ensure highly compressed body is decompressed in chunks of at most chunk_size.
+        '''
+        data = b'0' * 1000000 + b'end'
+        chunks = list(iter_decompressed(_GzipResponse(data), 4096))
+
+        assert max(len(chunk) for chunk in chunks) <= 4096
+        assert b''.join(chunks) == data
+
+
+class TestStreamStatement(unittest.TestCase):
+    ''' Functional test of streamed statement against local stand-in server.
+    '''
+
+    def setUp(self):
+        self.server = FakeBcaServer(statement_rows=50)
+        self.server.start()
+        self.bca = Bca(self.server.api_key, self.server.api_secret, self.server.url)
+        self.bca.sign_in(self.server.client_id, self.server.client_secret)
+
+    def tearDown(self):
+        self.bca.pool.close()
+        self.server.stop()
+
+    def test_stream_statement(self):
+        ''' Ensure streamed rows are the same as get_statement and connection is reused.
+        '''
+        fields = {}
+        rows = list(self.bca.stream_statement('BCAAPI2016', '0201245680', '2016-09-01',
+                                              '2016-09-30', fields=fields, chunk_size=512))
+        response = self.bca.get_statement('BCAAPI2016', '0201245680', '2016-09-01', '2016-09-30')
+
+        assert len(rows) == 1500
+        assert rows == response['Data']
+        assert fields['StartBalance'] == response['StartBalance']
+        assert self.bca.pool.stats()['created'] == 1
+
+    def test_gzip(self):
+        ''' Ensure server answers with gzip body when asked.
+        '''
+        url, headers = self.bca._prepare_request(self.bca._statement_url(
+            'BCAAPI2016', '0201245680', '2016-09-01', '2016-09-30'))
+        headers['Accept-Encoding'] = 'gzip'
+        status, response_headers, body = self.bca.pool.request('GET', url, headers=headers)
+
+        assert status == 200
+        assert response_headers['Content-Encoding'] == 'gzip'
+        content = json.loads(zlib.decompress(body, 16 + zlib.MAX_WBITS).decode())
+        assert len(content['Data']) == 1500
+        assert len(body) * 5 < len(json.dumps(content))
+
+    def test_error(self):
+        ''' Ensure error response is raised before any row.
+        '''
+        with self.assertRaises(ApiError) as err:
+            next(self.bca.stream_statement('BCAAPI2016', '0201245680', '2016-09-01',
+                                           '2016-11-30'))
+
+        assert err.exception.args[0] == 'Maximum date range is 31 days'
+
+    def test_stop_early(self):
+        ''' Ensure connection is not reused when rows are not consumed to the end.
+        '''
+        rows = self.bca.stream_statement('BCAAPI2016', '0201245680', '2016-09-01',
+                                         '2016-09-30', chunk_size=256)
+        next(rows)
+        rows.close()
+        self.bca.get_balance('BCAAPI2016', '0201245680')
+
+        assert self.bca.pool.stats()['created'] == 2
+
+    def test_breaker_and_instrumentation(self):
+        ''' Ensure streamed call is recorded by circuit breaker and instrumentation.
+        '''
+        events = []
+        self.bca.instrumentation = Instrumentation()
+        self.bca.instrumentation.add_end_hook(events.append)
+        self.bca.circuit_breaker = CircuitBreaker(failure_threshold=1)
+        self.server.error_rate = 1
+        with self.assertRaises(ApiError):
+            list(self.bca.stream_statement('BCAAPI2016', '0201245680', '2016-09-01'))
+        assert self.bca.circuit_breaker.state == 'open'
+
+        self.server.error_rate = 0
+        self.bca.circuit_breaker.reset_timeout = 0
+        rows = list(self.bca.stream_statement('BCAAPI2016', '0201245680', '2016-09-01'))
+
+        assert self.bca.circuit_breaker.state == 'closed'
+        assert [(event.endpoint, event.status) for event in events] \
+            == [('statement', 500), ('statement', 200)]
+        assert events[1].response_bytes > len(rows) * 50
@@ -0,0 +1,44 @@
+import datetime
+import unittest
+
+from cpybca.bca import row_date
+from cpybca.sync import StatementSync
+from tests._stubs import StubBca
+
+
+class TestStatementSync(unittest.TestCase):
+    ''' Test incremental statement sync.
+    '''
+
+    def setUp(self):
+        self.today = datetime.date(2017, 1, 10)
+        self.bca = StubBca(today=self.today)
+        self.sync = StatementSync(self.bca, ':memory:')
+
+    def tearDown(self):
+        self.sync.close()
+
+    def test_row_date(self):
+        ''' Ensure row date is placed inside window crossing new year.
+        '''
+        start_date, end_date = datetime.date(2016, 12, 20), datetime.date(2017, 1, 5)
+        assert row_date('25/12', start_date, end_date) == datetime.date(2016, 12, 25)
+        assert row_date('02/01', start_date, end_date) == datetime.date(2017, 1, 2)
+        assert row_date('PEND', start_date, end_date) is None
+
+    def test_incremental_sync(self):
+        ''' Ensure closed day is fetched once and open day again.
+        '''
+        summary = self.sync.sync('BCAAPI2016', '0201245680', '2016-12-01', self.today,
+                                 today=self.today)
+        assert summary == {'windows': 2, 'days': 41, 'rows': 42}
+
+        summary = self.sync.sync('BCAAPI2016', '0201245680', '2016-12-01', self.today,
+                                 today=self.today)
+        assert summary == {'windows': 1, 'days': 1, 'rows': 2}
+        assert self.bca.calls[-1] == ('2017-01-10', '2017-01-10')
+
+        rows = list(self.sync.rows('BCAAPI2016', '0201245680', '2016-12-01', self.today))
+        assert len(rows) == 42
+        assert rows[0]['TransactionDate'] == '01/12'
+        assert rows[-1]['TransactionDate'] == 'PEND'
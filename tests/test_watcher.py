@@ -0,0 +1,104 @@
+import asyncio
+import unittest
+
+from cpybca.bca import ApiError
+from cpybca.watcher import BalanceWatcher
+from tests._stubs import StubBca
+
+
+class TestBalanceWatcher(unittest.TestCase):
+    ''' Test adaptive balance polling of many accounts.
+    '''
+
+    def setUp(self):
+        self.bca = StubBca()
+        self.numbers = ['{:010d}'.format(number) for number in range(25)]
+        for number in self.numbers:
+            self.bca.balances[number] = '100.00'
+        self.changes = []
+        self.watcher = BalanceWatcher(self.bca, 'BCAAPI2016', callback=self.changes.append,
+                                      min_interval=10, max_interval=80)
+        for number in self.numbers:
+            self.watcher.add(number, now=0)
+
+    def test_batch_and_diff(self):
+        ''' Ensure accounts are polled 20 per call and only changed balance is reported.
+        '''
+        assert self.watcher.poll_once(now=0) == []
+        assert self.watcher.poll_once(now=0) == []
+        assert [len(call) for call in self.bca.calls] == [20, 5]
+        assert self.watcher.poll_once(now=5) == []
+
+        self.bca.balances[self.numbers[3]] = '250.00'
+        self.watcher.poll_once(now=10)
+
+        assert [(change.account_number, change.fields, change.previous['Balance'],
+                 change.current['Balance']) for change in self.changes] \
+            == [(self.numbers[3], ('Balance', 'AvailableBalance'), '100.00', '250.00')]
+        assert self.watcher.stats() == {'accounts': 25, 'calls': 3, 'changes': 1,
+                                        'errors': 0}
+
+    def test_adaptive_interval(self):
+        ''' Ensure changing account is polled more often than idle one.
+        '''
+        self.watcher.remove(self.numbers[20])
+        polls = {self.numbers[0]: 0, self.numbers[1]: 0}
+        for now in range(0, 600):
+            if now % 10 == 0:
+                self.bca.balances[self.numbers[0]] = '{}.00'.format(now)
+            count = len(self.bca.calls)
+            self.watcher.poll_once(now=now)
+            for call in self.bca.calls[count:]:
+                for number in polls:
+                    polls[number] += number in call
+
+        assert polls[self.numbers[0]] > 2 * polls[self.numbers[1]]
+        assert all(self.numbers[20] not in call for call in self.bca.calls)
+
+    def test_error(self):
+        ''' Ensure failed call is counted and accounts are polled again later.
+        '''
+        self.bca.errors[self.numbers[0]] = ApiError('Internal server error', 500)
+        assert self.watcher.poll_once(now=0) == []
+        self.bca.errors.clear()
+        self.watcher.poll_once(now=0)
+        assert self.watcher.poll_once(now=10) == []
+
+        assert self.watcher.stats()['errors'] == 1
+        assert len(self.bca.calls) == 3
+
+    def test_unexpected_error(self):
+        ''' Ensure batch is polled again after unexpected error and run loop keeps going.
+        '''
+        self.bca.errors[self.numbers[0]] = KeyError('Balance')
+        with self.assertRaises(KeyError):
+            self.watcher.poll_once(now=0)
+        self.bca.errors.clear()
+        count = len(self.bca.calls)
+        self.watcher.poll_once(now=10)
+        self.watcher.poll_once(now=10)
+
+        assert self.watcher.stats()['errors'] == 1
+        assert sorted(number for call in self.bca.calls[count:] for number in call) \
+            == sorted(self.numbers)
+
+    def test_events(self):
+        ''' Ensure change is delivered by async iterator.
+        '''
+        watcher = BalanceWatcher(self.bca, 'BCAAPI2016', [self.numbers[0]], budget=100,
+                                 min_interval=0.01, max_interval=0.02)
+
+        async def first_change():
+            events = watcher.events()
+            await asyncio.sleep(0.05)
+            self.bca.balances[self.numbers[0]] = '500.00'
+            try:
+                return await asyncio.wait_for(events.__anext__(), 5)
+            finally:
+                events.close()
+
+        try:
+            change = asyncio.run(first_change())
+        finally:
+            watcher.stop()
+        assert change.current['Balance'] == '500.00'